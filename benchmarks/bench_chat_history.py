@@ -0,0 +1,174 @@
+"""
+Streamlit rerun time and session size: list-of-dicts chat history vs ChatHistory.
+
+"list" is the previous format. Every message is a dict in
+`st.session_state.chat_history`, each answer keeps its rendered
+references HTML, and every rerun draws every message. "compact" is
+`graph.chat_history.ChatHistory`. Sources are interned references, the
+HTML comes from a shared cache, only the newest page of messages is
+drawn, and the history is capped.
+
+Each conversation is run in Streamlit's `AppTest` harness, which executes
+the script and serializes its output the way a real rerun does. A turn
+is one question and its answer. Session size is the pickled history.
+
+    python -m benchmarks.bench_chat_history
+    python -m benchmarks.bench_chat_history --turns 10 100 500 1000 --reruns 10
+"""
+
+import argparse
+import logging
+import pickle
+import random
+import statistics
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+from tabulate import tabulate
+
+from graph.chat_history import ChatHistory, render_sources_html
+
+FORMATS = ("list", "compact")
+
+
+def list_app():
+    import streamlit as st
+
+    for msg in st.session_state.chat_history:
+        with st.chat_message(msg["role"]):
+            if msg["role"] == "assistant":
+                content = msg["content"]
+                st.write(content["text"])
+                if content.get("sources_html"):
+                    st.markdown(content["sources_html"], unsafe_allow_html=True)
+                if content.get("response_time"):
+                    st.caption(
+                        f"🕒 Responded in {content['response_time']:.2f} seconds"
+                    )
+            else:
+                st.markdown(msg["content"])
+
+
+def compact_app():
+    import streamlit as st
+
+    from graph.chat_history import render_history
+
+    render_history(st.session_state.chat_history)
+
+
+def conversation(turns: int, seed: int = 0) -> list:
+    """(question, answer, sources, response_time) for each turn."""
+    rng = random.Random(seed)
+    words = "credit course diploma foundation quiz exam fee level term grade".split()
+    pages = [
+        {
+            "title": f"IITM BS {rng.choice(words).title()} page {i}",
+            "url": f"https://study.iitm.ac.in/ds/page-{i}.html",
+        }
+        for i in range(40)
+    ]
+    exchanges = []
+    for _ in range(turns):
+        question = " ".join(rng.choice(words) for _ in range(12)) + "?"
+        answer = "\n\n".join(
+            " ".join(rng.choice(words) for _ in range(40)) + "." for _ in range(3)
+        )
+        sources = rng.sample(pages, rng.randint(1, 4))
+        exchanges.append((question, answer, sources, rng.uniform(1, 6)))
+    return exchanges
+
+
+def list_history(exchanges: list) -> list:
+    history = []
+    for question, answer, sources, response_time in exchanges:
+        history.append({"role": "user", "content": question})
+        history.append(
+            {
+                "role": "assistant",
+                "content": {
+                    "text": answer,
+                    "sources_html": render_sources_html(sources),
+                    "response_time": response_time,
+                },
+            }
+        )
+    return history
+
+
+def compact_history(exchanges: list) -> ChatHistory:
+    history = ChatHistory()
+    for question, answer, sources, response_time in exchanges:
+        history.add_user(question)
+        history.add_assistant(answer, sources, response_time=response_time)
+    return history
+
+
+def rerun_ms(app, history, reruns: int) -> list:
+    at = AppTest.from_function(app, default_timeout=120)
+    at.session_state["chat_history"] = history
+    at.run()
+    timings = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return timings
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--reruns", type=int, default=5)
+    args = parser.parse_args(argv)
+    # AppTest runs scripts outside a server, which Streamlit warns about
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    rows = []
+    for turns in args.turns:
+        exchanges = conversation(turns)
+        histories = {
+            "list": list_history(exchanges),
+            "compact": compact_history(exchanges),
+        }
+        apps = {"list": list_app, "compact": compact_app}
+        for name in FORMATS:
+            history = histories[name]
+            timings = rerun_ms(apps[name], history, args.reruns)
+            if isinstance(history, ChatHistory):
+                shown = len(history.visible())
+            else:
+                shown = len(history)
+            rows.append(
+                {
+                    "turns": turns,
+                    "history": name,
+                    "messages_kept": len(history),
+                    "messages_drawn": shown,
+                    "rerun_p50_ms": statistics.median(timings),
+                    "rerun_max_ms": max(timings),
+                    "session_kb": len(pickle.dumps(history)) / 1000,
+                }
+            )
+    print(tabulate(rows, headers="keys", floatfmt=".1f"))
+
+    longest = [row for row in rows if row["turns"] == max(args.turns)]
+    before, after = (row["rerun_p50_ms"] for row in longest)
+    print(
+        f"\n{max(args.turns)} turns: rerun {before:.0f} → {after:.0f} ms "
+        f"({before / after:.1f}x), session {longest[0]['session_kb']:.0f} → "
+        f"{longest[1]['session_kb']:.0f} KB | {args.reruns} reruns each"
+    )
+    flat = [row["rerun_p50_ms"] for row in rows if row["history"] == "compact"]
+    if max(flat) <= 2 * min(flat):
+        print("✓ Compact rerun time stays flat as the conversation grows")
+    else:
+        print("❌ Compact rerun time grows with the conversation")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
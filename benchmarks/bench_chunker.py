@@ -0,0 +1,111 @@
+"""
+Chunking throughput: `TokenChunker` against the previous splitter.
+
+The baseline reproduces the old `chunk_documents`, which built a
+`RecursiveCharacterTextSplitter.from_tiktoken_encoder` for every call (one
+call per URL). Pages come from a directory of `.txt` files, or from a
+synthetic corpus of multi-paragraph pages. Reports wall time, pages per
+second, chunk count and chunk size in tokens.
+
+    python -m benchmarks.bench_chunker
+    python -m benchmarks.bench_chunker --pages 5000 --workers 8
+    python -m benchmarks.bench_chunker --corpus ./crawl_text/
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from tabulate import tabulate
+
+from ingest.chunker import TokenChunker, get_encoding, split_documents_parallel
+
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 100
+ENCODING = "cl100k_base"
+
+
+def synthetic_pages(pages: int, seed: int = 0) -> list[Document]:
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(3000)] + ["IITM", "BS", "course", "fee"]
+    documents = []
+    for page in range(pages):
+        paragraphs = []
+        for _ in range(rng.randint(5, 30)):
+            sentences = [
+                " ".join(rng.choices(vocabulary, k=rng.randint(6, 25))) + "."
+                for _ in range(rng.randint(1, 8))
+            ]
+            paragraphs.append(" ".join(sentences))
+        documents.append(
+            Document(
+                page_content="\n\n".join(paragraphs),
+                metadata={"source": f"https://study.iitm.ac.in/ds/page{page}.html"},
+            )
+        )
+    return documents
+
+
+def load_pages(directory: Path) -> list[Document]:
+    return [
+        Document(page_content=path.read_text(), metadata={"source": str(path)})
+        for path in sorted(directory.glob("**/*.txt"))
+    ]
+
+
+def baseline(documents: list[Document]) -> list[Document]:
+    chunks = []
+    for doc in documents:
+        splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+            encoding_name=ENCODING, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
+        )
+        chunks.extend(splitter.split_documents([doc]))
+    return chunks
+
+
+def measure(name: str, split, documents: list[Document]) -> dict:
+    start = time.perf_counter()
+    chunks = split(documents)
+    elapsed = time.perf_counter() - start
+    encoding = get_encoding()
+    sizes = [len(encoding.encode_ordinary(c.page_content)) for c in chunks]
+    return {
+        "splitter": name,
+        "seconds": elapsed,
+        "pages_per_s": len(documents) / elapsed,
+        "chunks": len(chunks),
+        "mean_tokens": statistics.mean(sizes) if sizes else 0,
+        "max_tokens": max(sizes, default=0),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", type=Path, default=None)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    documents = load_pages(args.corpus) if args.corpus else synthetic_pages(args.pages)
+    get_encoding()  # Keep the one-time tokenizer load out of every row
+    chunker = TokenChunker(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    rows = [
+        measure("recursive (per call)", baseline, documents),
+        measure("token chunker", chunker.split_documents, documents),
+        measure(
+            f"token chunker x{args.workers} processes",
+            lambda docs: split_documents_parallel(chunker, docs, args.workers),
+            documents,
+        ),
+    ]
+    print(tabulate(rows, headers="keys", floatfmt=".2f"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Prompt size and generation latency with and without context packing.
+
+For each fixture question, retrieves documents from the fixture corpus, adds
+web-search style results, and renders the generation prompt twice: with the
+raw document list (the old `{context}` value) and with `build_context`. The
+fake Groq model charges prefill time per prompt token, so the latency column
+shows the effect of the smaller prompt.
+
+    python -m benchmarks.bench_context
+    python -m benchmarks.bench_context --prefill-tokens-per-second 2000
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from langchain_core.documents import Document
+from tabulate import tabulate
+
+from benchmarks import fakes
+
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+
+WEB_RESULT = Document(
+    page_content=" ".join(
+        ["Long web page text about online degrees, admissions and fees."] * 120
+    ),
+    metadata={"title": "Web", "url": "https://example.com/long"},
+)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--budget", type=int, default=None)
+    parser.add_argument(
+        "--prefill-tokens-per-second",
+        type=float,
+        default=fakes.settings.prefill_tokens_per_second,
+    )
+    args = parser.parse_args(argv)
+
+    fakes.settings.prefill_tokens_per_second = args.prefill_tokens_per_second
+    fakes.install_fakes()
+    from graph.chains.generation import get_generation_chain
+    from graph.context import build_context, count_tokens
+
+    retriever = fakes.FakeRetriever(documents=fakes.load_corpus())
+    chain = get_generation_chain(args.model)
+    questions = json.load(open(fakes.FIXTURES_DIR / "questions.json"))
+
+    rows = []
+    for item in questions:
+        question = item["question"]
+        # Both collections return overlapping chunks; web search appends more
+        documents = retriever.invoke(question) * 2 + [WEB_RESULT]
+        contexts = {
+            "raw": documents,
+            "packed": build_context(documents, args.model, args.budget),
+        }
+        row = [item["id"]]
+        for name, context in contexts.items():
+            tokens = count_tokens(str(context))
+            start = time.perf_counter()
+            chain.invoke({"context": context, "question": question})
+            row += [tokens, (time.perf_counter() - start) * 1000]
+        rows.append(row)
+
+    print(
+        tabulate(
+            rows,
+            headers=["question", "raw tokens", "raw ms", "packed tokens", "packed ms"],
+            floatfmt=".0f",
+        )
+    )
+    raw_tokens = statistics.fmean(row[1] for row in rows)
+    packed_tokens = statistics.fmean(row[3] for row in rows)
+    raw_ms = statistics.fmean(row[2] for row in rows)
+    packed_ms = statistics.fmean(row[4] for row in rows)
+    print(
+        f"\nContext tokens: {raw_tokens:.0f} -> {packed_tokens:.0f} "
+        f"({1 - packed_tokens / raw_tokens:.0%} smaller); "
+        f"generation latency {raw_ms:.0f} ms -> {packed_ms:.0f} ms"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Index size and retrieval latency with and without near-duplicate removal.
+
+Builds two temporary Chroma collections from the same chunks, one as-is and
+one after `NearDuplicateFilter`, and reports chunk count, on-disk size and
+query latency for each. Chunks come from a JSONL file of
+`{"page_content", "metadata"}` records (e.g. dumped from `chunk_documents`),
+or from a synthetic crawl whose pages share navigation, footer and
+announcement text.
+
+    python -m benchmarks.bench_dedup
+    python -m benchmarks.bench_dedup --chunks crawl_chunks.jsonl --threshold 0.8
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from tabulate import tabulate
+
+from ingest.dedup import NearDuplicateFilter
+
+BOILERPLATE = [
+    "Home Academics Admissions Fees Contact us Login IIT Madras BS Degree in "
+    "Data Science and Applications Programming Data Science Electronic Systems",
+    "Copyright IIT Madras. All rights reserved. Follow us on YouTube, LinkedIn, "
+    "Instagram and Twitter. Write to support for any queries about the program.",
+    "Announcement: applications for the {term} term are open. The last date to "
+    "apply is {date}. Check the academic calendar for qualifier exam dates.",
+]
+
+
+def synthetic_chunks(pages: int, seed: int = 0) -> list[Document]:
+    rng = random.Random(seed)
+    vocabulary = [f"topic{i}" for i in range(5000)]
+    chunks = []
+    for page in range(pages):
+        url = f"https://study.iitm.ac.in/ds/page{page}.html"
+        for _ in range(3):
+            text = " ".join(rng.choices(vocabulary, k=120))
+            chunks.append(Document(page_content=text, metadata={"source": url}))
+        for template in BOILERPLATE:
+            text = template.format(term="January", date=f"{rng.randint(1, 3)} Dec")
+            chunks.append(Document(page_content=text, metadata={"source": url}))
+    return chunks
+
+
+def load_chunks(path: Path) -> list[Document]:
+    with open(path) as f:
+        return [Document(**json.loads(line)) for line in f if line.strip()]
+
+
+def directory_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, files in os.walk(path)
+        for name in files
+    )
+
+
+def measure(chunks: list[Document], queries: list[str], k: int) -> dict:
+    directory = tempfile.mkdtemp(prefix="rag-dedup-")
+    start = time.perf_counter()
+    # Fresh copies: the filter assigns ids to representatives
+    documents = [
+        Document(page_content=d.page_content, metadata=d.metadata) for d in chunks
+    ]
+    vectorstore = Chroma.from_documents(
+        documents=documents,
+        collection_name="bench",
+        embedding=DeterministicFakeEmbedding(size=384),
+        persist_directory=directory,
+    )
+    build_s = time.perf_counter() - start
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        vectorstore.similarity_search(query, k=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "chunks": len(chunks),
+        "index_mb": directory_size(directory) / 2**20,
+        "build_s": build_s,
+        "query_p50_ms": statistics.median(latencies),
+        "query_p95_ms": sorted(latencies)[int(0.95 * (len(latencies) - 1))],
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chunks", type=Path, default=None)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    chunks = load_chunks(args.chunks) if args.chunks else synthetic_chunks(args.pages)
+    dedup_filter = NearDuplicateFilter(threshold=args.threshold)
+    start = time.perf_counter()
+    unique = dedup_filter.filter(chunks)
+    dedup_s = time.perf_counter() - start
+
+    rng = random.Random(1)
+    queries = [rng.choice(chunks).page_content[:200] for _ in range(args.queries)]
+    rows = [
+        {"index": "original", **measure(chunks, queries, args.k)},
+        {"index": "deduplicated", **measure(unique, queries, args.k)},
+    ]
+    print(tabulate(rows, headers="keys", floatfmt=".2f"))
+    print(f"\n{dedup_filter.stats.summary()} in {dedup_s:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
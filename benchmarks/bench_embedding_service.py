@@ -0,0 +1,205 @@
+"""
+Query embedding throughput and tail latency: shared service vs per-process models.
+
+"per-process" starts one process per user. Each process loads its own
+model and embeds its questions one at a time, which is how every
+Streamlit worker behaves today. "service" starts one embedding service
+process. The users are threads calling it through `RemoteEmbeddings`,
+and their requests are micro-batched. Model load time is excluded from
+both modes.
+
+MiniLM is the default model. `--embeddings simulated` uses a stand-in
+that burns CPU for a fixed per-call overhead plus a per-text cost, to
+show the batching effect where MiniLM is not installed. Its numbers come
+from the cost model, not from a real forward pass.
+
+    python -m benchmarks.bench_embedding_service
+    python -m benchmarks.bench_embedding_service --embeddings simulated --users 1 8 32
+"""
+
+import argparse
+import multiprocessing
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import requests
+from langchain_core.embeddings import Embeddings
+from tabulate import tabulate
+
+from benchmarks.fakes import HashingEmbedding
+from graph.consts import SAMPLE_QUESTIONS
+from ingest.embedding_service import MicroBatcher, RemoteEmbeddings, make_server
+
+
+class SimulatedEmbedding(HashingEmbedding):
+    """Hashing embedding that spends CPU like a forward pass would."""
+
+    def __init__(self, overhead_ms: float = 8.0, per_text_ms: float = 0.4):
+        super().__init__()
+        self.overhead_s = overhead_ms / 1000
+        self.per_text_s = per_text_ms / 1000
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # CPU time, so processes sharing cores slow each other down
+        cost = self.overhead_s + self.per_text_s * len(texts)
+        deadline = time.thread_time() + cost
+        while time.thread_time() < deadline:
+            pass
+        return super().embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def load_embeddings(name: str) -> Embeddings:
+    if name == "simulated":
+        return SimulatedEmbedding()
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+
+
+def questions_for(user: int, count: int) -> List[str]:
+    return [
+        f"{SAMPLE_QUESTIONS[(user + i) % len(SAMPLE_QUESTIONS)]} ({user}-{i})"
+        for i in range(count)
+    ]
+
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+
+def _own_model_user(name, user, count, barrier, results) -> None:
+    embeddings = load_embeddings(name)
+    embeddings.embed_query("warm up")
+    barrier.wait()
+    latencies = []
+    start = time.perf_counter()
+    for question in questions_for(user, count):
+        t = time.perf_counter()
+        embeddings.embed_query(question)
+        latencies.append(time.perf_counter() - t)
+    results.put((start, time.perf_counter(), latencies))
+
+
+def run_per_process(name: str, users: int, count: int) -> dict:
+    barrier = multiprocessing.Barrier(users)
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=_own_model_user, args=(name, user, count, barrier, results)
+        )
+        for user in range(users)
+    ]
+    for process in processes:
+        process.start()
+    finished = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    start = min(item[0] for item in finished)
+    end = max(item[1] for item in finished)
+    latencies = [latency for item in finished for latency in item[2]]
+    return _row("per-process", users, latencies, end - start, models=users)
+
+
+def _serve(name, port, max_batch_size, max_wait_ms, ready) -> None:
+    batcher = MicroBatcher(load_embeddings(name), max_batch_size, max_wait_ms)
+    batcher.embed(["warm up"])
+    server = make_server(batcher, port=port)
+    ready.set()
+    server.serve_forever()
+
+
+def run_service(url: str, users: int, count: int) -> dict:
+    before = requests.get(f"{url}/health", timeout=10).json()
+    client = RemoteEmbeddings(url)
+
+    def user(index: int) -> List[float]:
+        latencies = []
+        for question in questions_for(index, count):
+            t = time.perf_counter()
+            client.embed_query(question)
+            latencies.append(time.perf_counter() - t)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        per_user = list(pool.map(user, range(users)))
+    elapsed = time.perf_counter() - start
+    after = requests.get(f"{url}/health", timeout=10).json()
+    batches = after["batches"] - before["batches"]
+    row = _row(
+        "service", users, [x for latencies in per_user for x in latencies], elapsed, 1
+    )
+    row["mean_batch"] = (after["texts"] - before["texts"]) / batches if batches else 0
+    return row
+
+
+def _row(mode: str, users: int, latencies: List[float], elapsed: float, models: int):
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        "mode": mode,
+        "users": users,
+        "queries": len(ms),
+        "queries_per_s": len(ms) / elapsed,
+        "p50_ms": percentile(ms, 0.5),
+        "p95_ms": percentile(ms, 0.95),
+        "p99_ms": percentile(ms, 0.99),
+        "models_loaded": models,
+        "mean_batch": 1.0,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--embeddings", choices=["minilm", "simulated"], default="minilm"
+    )
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--queries-per-user", type=int, default=20)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    port = _free_port()
+    ready = multiprocessing.Event()
+    service = multiprocessing.Process(
+        target=_serve,
+        args=(args.embeddings, port, args.max_batch_size, args.max_wait_ms, ready),
+        daemon=True,
+    )
+    service.start()
+    if not ready.wait(timeout=300):
+        print("❌ Embedding service did not start")
+        return 1
+    url = f"http://127.0.0.1:{port}"
+
+    rows = []
+    try:
+        for users in args.users:
+            rows.append(run_per_process(args.embeddings, users, args.queries_per_user))
+            rows.append(run_service(url, users, args.queries_per_user))
+    finally:
+        service.terminate()
+    print(tabulate(rows, headers="keys", floatfmt=".1f"))
+    print(
+        f"\nEmbeddings: {args.embeddings} | service max batch "
+        f"{args.max_batch_size}, max wait {args.max_wait_ms} ms | "
+        f"{multiprocessing.cpu_count()} CPU(s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
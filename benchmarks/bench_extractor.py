@@ -0,0 +1,211 @@
+"""
+Page extraction time and peak memory: BeautifulSoup + read_html vs one lxml parse.
+
+"bs4" is the previous extractor. It runs BeautifulSoup's html.parser over the
+page, then serializes every table and parses it again with `pd.read_html`.
+"lxml" is `ingest.extractor.extract_page` in tree mode and "lxml-bounded"
+is its streaming mode. For each page the benchmark checks that the text
+matches the bs4 output exactly and that every table has the same shape.
+Peak memory is the RSS growth of a fresh process extracting the largest
+page.
+
+The corpus is a directory of saved .html pages. `--save-corpus DIR`
+downloads the pages the crawler has visited (from the crawl state) into
+DIR first. Without a corpus, synthetic programme pages with tables are
+generated, including one very large page.
+
+    python -m benchmarks.bench_extractor --save-corpus ./.html-corpus
+    python -m benchmarks.bench_extractor --corpus ./.html-corpus
+    python -m benchmarks.bench_extractor --pages 50 --large-mb 20
+"""
+
+import argparse
+import hashlib
+import multiprocessing
+import random
+import resource
+import sys
+import time
+from io import StringIO
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pandas as pd
+from bs4 import BeautifulSoup
+from tabulate import tabulate
+
+from ingest.extractor import extract_page
+
+EXTRACTORS = ("bs4", "lxml", "lxml-bounded")
+
+
+def bs4_extract(html: str) -> Tuple[str, List[pd.DataFrame]]:
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    text = soup.get_text(separator="\n")
+    text = "\n".join(line.strip() for line in text.splitlines() if line.strip())
+    tables = []
+    for table in soup.find_all("table"):
+        try:
+            tables.append(pd.read_html(StringIO(str(table)))[0])
+        except Exception:
+            pass
+    return text, tables
+
+
+def run(name: str, html: str) -> Tuple[str, List[pd.DataFrame]]:
+    if name == "bs4":
+        return bs4_extract(html)
+    page = extract_page(html, bounded=name == "lxml-bounded")
+    return page.text, page.tables
+
+
+def synthetic_page(rng: random.Random, sections: int) -> str:
+    words = "credit course diploma foundation quiz exam fee level term".split()
+    parts = ["<html><head><script>var x = 1;</script><style>p{}</style></head>"]
+    parts.append("<body><!-- nav --><nav><a href='/'>Home</a></nav>")
+    for section in range(sections):
+        parts.append(f"<h2>Section {section}</h2>")
+        for _ in range(3):
+            sentence = " ".join(rng.choice(words) for _ in range(30))
+            parts.append(f"<p>{sentence} &amp; <b>{rng.choice(words)}</b></p>")
+        if section % 2 == 0:
+            rows = "".join(
+                f"<tr><td>BS{section}{row:03d}</td><td>{rng.choice(words)}</td>"
+                f"<td>{rng.randint(1, 4)}</td></tr>"
+                for row in range(rng.randint(5, 20))
+            )
+            parts.append(
+                "<table><thead><tr><th>Code</th><th>Course</th><th>Credits</th>"
+                f"</tr></thead><tbody>{rows}</tbody></table>"
+            )
+    parts.append("<footer>Copyright IIT Madras</footer></body></html>")
+    return "\n".join(parts)
+
+
+def synthetic_corpus(pages: int, large_mb: float) -> Dict[str, str]:
+    rng = random.Random(0)
+    corpus = {f"page-{i}.html": synthetic_page(rng, 20) for i in range(pages)}
+    if large_mb:
+        large = synthetic_page(rng, 20)
+        while len(large) < large_mb * 1_000_000:
+            large += synthetic_page(rng, 200)
+        corpus["large.html"] = large
+    return corpus
+
+
+def save_corpus(directory: str, crawl_state: str) -> None:
+    from ingest.crawl_state import CrawlState
+    from llm_generated_ingestion import fetch_html
+
+    target = Path(directory)
+    target.mkdir(parents=True, exist_ok=True)
+    state = CrawlState(crawl_state, bounded_memory=True)
+    saved = 0
+    try:
+        for url in state.visited_urls():
+            html = fetch_html(url)
+            if html:
+                name = hashlib.sha1(url.encode()).hexdigest()[:16] + ".html"
+                (target / name).write_text(html, encoding="utf-8")
+                saved += 1
+    finally:
+        state.close()
+    print(f"✓ Saved {saved} pages to {target}")
+
+
+def _peak_rss(name: str, html: str, results) -> None:
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    run(name, html)
+    results.put(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before)
+
+
+def peak_rss_mb(name: str, html: str) -> float:
+    """Growth of peak RSS while extracting `html` in a fresh process, which
+    includes libxml2's tree as well as Python objects."""
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_peak_rss, args=(name, html, results))
+    process.start()
+    growth_kb = results.get()
+    process.join()
+    return growth_kb / 1000
+
+
+def timed(name: str, html: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(name, html)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", help="directory of saved .html pages")
+    parser.add_argument("--save-corpus", help="download visited pages into DIR")
+    parser.add_argument("--crawl-state", default="./.crawl_state.sqlite")
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--large-mb", type=float, default=10.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.save_corpus:
+        save_corpus(args.save_corpus, args.crawl_state)
+        args.corpus = args.corpus or args.save_corpus
+    if args.corpus:
+        corpus = {
+            path.name: path.read_text(encoding="utf-8", errors="replace")
+            for path in sorted(Path(args.corpus).glob("*.html"))
+        }
+        source = args.corpus
+    else:
+        corpus = synthetic_corpus(args.pages, args.large_mb)
+        source = "synthetic"
+    if not corpus:
+        print(f"❌ No .html pages in {args.corpus}")
+        return 1
+
+    totals = {name: 0.0 for name in EXTRACTORS}
+    mismatches = []
+    for page_name, html in corpus.items():
+        expected_text, expected_tables = None, None
+        for name in EXTRACTORS:
+            totals[name] += timed(name, html, args.repeat)
+            text, tables = run(name, html)
+            if name == "bs4":
+                expected_text, expected_tables = text, tables
+            elif text != expected_text or [t.shape for t in tables] != [
+                t.shape for t in expected_tables
+            ]:
+                mismatches.append((page_name, name))
+
+    size_mb = sum(len(html) for html in corpus.values()) / 1_000_000
+    largest = max(corpus, key=lambda page_name: len(corpus[page_name]))
+    rows = [
+        {
+            "extractor": name,
+            "total_s": totals[name],
+            "ms_per_page": totals[name] / len(corpus) * 1000,
+            "mb_per_s": size_mb / totals[name],
+            "speedup": totals["bs4"] / totals[name],
+            "largest_page_rss_mb": peak_rss_mb(name, corpus[largest]),
+        }
+        for name in EXTRACTORS
+    ]
+    print(tabulate(rows, headers="keys", floatfmt=".2f"))
+    print(
+        f"\nCorpus: {source} | {len(corpus)} pages, {size_mb:.1f} MB | "
+        f"best of {args.repeat} | RSS growth measured on {largest} "
+        f"({len(corpus[largest]) / 1_000_000:.1f} MB)"
+    )
+    for page_name, name in mismatches:
+        print(f"  ✗ {name} differs from bs4 on {page_name}")
+    if not mismatches:
+        print("✓ Text and table shapes match bs4 on every page")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""
+Offline end-to-end benchmark of the adaptive RAG graph.
+
+Runs the fixture question set through `graph.graph.app` with every Groq call,
+the retriever and DuckDuckGo replaced by local stand-ins (see
+`benchmarks/fakes.py`), then compares the results against a stored baseline.
+
+    python -m benchmarks.bench_graph
+    python -m benchmarks.bench_graph --latency 0.2 --tokens-per-second 150
+    python -m benchmarks.bench_graph --update-baseline
+    python -m benchmarks.bench_graph --profile ./.profiles
+
+Exits with status 1 when a question is slower than the baseline by more than
+`--tolerance` and by more than `--min-slack` seconds, or makes more LLM calls
+than it did in the baseline. The absolute slack keeps millisecond-scale
+questions (answered without an LLM) from failing on timer noise.
+`--profile DIR` runs every question once more under the sampling profiler
+and writes one speedscope file per question to DIR.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from tabulate import tabulate
+
+from benchmarks import fakes
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+
+
+def load_questions(path: Path) -> list[dict]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def run_question(app, registry, item: dict, model_name: str) -> dict:
+    llm_calls = Counter()
+
+    def on_span(span):
+        if span.kind == "llm":
+            llm_calls[span.node or "-"] += 1
+
+    registry.add_listener(on_span)
+    try:
+        with fakes.scripted(item.get("script")):
+            start = time.perf_counter()
+            app.invoke({"question": item["question"], "selected_model": model_name})
+            latency = time.perf_counter() - start
+    finally:
+        registry.remove_listener(on_span)
+    return {"latency_s": latency, "llm_calls": dict(llm_calls)}
+
+
+def run_benchmark(questions: list[dict], repeat: int, model_name: str) -> dict:
+    fakes.install_fakes()
+    from graph.graph import app
+    from graph.tracing import registry
+
+    # Warm up lazy one-time costs (tokenizer load, graph compilation caches)
+    run_question(app, registry, questions[0], model_name)
+
+    results = {}
+    start = time.perf_counter()
+    for item in questions:
+        runs = [run_question(app, registry, item, model_name) for _ in range(repeat)]
+        latencies = [run["latency_s"] for run in runs]
+        results[item["id"]] = {
+            "latency_s": round(statistics.median(latencies), 4),
+            "llm_calls": runs[-1]["llm_calls"],
+        }
+    elapsed = time.perf_counter() - start
+
+    return {
+        "questions": results,
+        "throughput_qps": round(len(questions) * repeat / elapsed, 3),
+        "settings": {
+            "latency_s": fakes.settings.latency_s,
+            "tokens_per_second": fakes.settings.tokens_per_second,
+            "prefill_tokens_per_second": fakes.settings.prefill_tokens_per_second,
+            "repeat": repeat,
+        },
+    }
+
+
+def profile_questions(questions: list[dict], model_name: str, directory: str) -> None:
+    from graph.graph import app
+    from graph.profiling import profile_request
+
+    rows = []
+    for item in questions:
+        with fakes.scripted(item.get("script")):
+            with profile_request(item["id"], directory=directory) as profiler:
+                app.invoke({"question": item["question"], "selected_model": model_name})
+        rows.append([item["id"], f"{profiler.elapsed_ms:.0f}", profiler.node_summary()])
+    print(tabulate(rows, headers=["question", "profiled ms", "time per node"]))
+    print(f"✓ Speedscope profiles written to {directory}")
+
+
+def compare(
+    report: dict, baseline: dict, tolerance: float, min_slack: float = 0.05
+) -> list[str]:
+    regressions = []
+    for qid, result in report["questions"].items():
+        base = baseline["questions"].get(qid)
+        if base is None:
+            continue
+        limit = max(base["latency_s"] * (1 + tolerance), base["latency_s"] + min_slack)
+        if result["latency_s"] > limit:
+            regressions.append(
+                f"{qid}: latency {result['latency_s']:.3f}s > {limit:.3f}s"
+            )
+        calls, base_calls = (
+            sum(result["llm_calls"].values()),
+            sum(base["llm_calls"].values()),
+        )
+        if calls > base_calls:
+            regressions.append(f"{qid}: {calls} LLM calls > baseline {base_calls}")
+    return regressions
+
+
+def print_report(report: dict, baseline: dict | None) -> None:
+    rows = []
+    for qid, result in report["questions"].items():
+        base = (baseline or {}).get("questions", {}).get(qid, {})
+        calls = result["llm_calls"]
+        rows.append(
+            [
+                qid,
+                f"{result['latency_s'] * 1000:.0f}",
+                f"{base['latency_s'] * 1000:.0f}" if base else "-",
+                sum(calls.values()),
+                ", ".join(f"{node}={n}" for node, n in sorted(calls.items())),
+            ]
+        )
+    print(
+        tabulate(
+            rows,
+            headers=["question", "latency ms", "baseline ms", "LLM calls", "per node"],
+        )
+    )
+    print(f"\nThroughput: {report['throughput_qps']} questions/s")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--questions", type=Path, default=fakes.FIXTURES_DIR / "questions.json"
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=fakes.settings.latency_s)
+    parser.add_argument(
+        "--tokens-per-second", type=float, default=fakes.settings.tokens_per_second
+    )
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--min-slack",
+        type=float,
+        default=0.05,
+        help="seconds a question may always be slower than its baseline",
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--profile", metavar="DIR", help="write speedscope profiles")
+    args = parser.parse_args(argv)
+
+    fakes.settings.latency_s = args.latency
+    fakes.settings.tokens_per_second = args.tokens_per_second
+
+    report = run_benchmark(load_questions(args.questions), args.repeat, args.model)
+    baseline = None
+    if args.baseline.exists():
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print_report(report, baseline)
+    if args.profile:
+        print()
+        profile_questions(load_questions(args.questions), args.model, args.profile)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✓ Baseline written to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print("⚠️ No baseline found; run with --update-baseline to create one.")
+        return 0
+
+    regressions = compare(report, baseline, args.tolerance, args.min_slack)
+    for line in regressions:
+        print(f"❌ Regression: {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Agreement of the local grounding checker with the LLM hallucination grader.
+
+Runs `GroundingChecker` over the labelled answers in
+`fixtures/grounding_eval.json`. Each answer has its context documents and
+a human grounded/ungrounded label. The report covers:
+- each verdict: grounded, ungrounded or ambiguous;
+- the share of answers decided locally, i.e. LLM grader calls avoided;
+- agreement of the local decisions with the reference;
+- local latency.
+
+The reference is the human label by default. With `--llm-model` the
+Groq hallucination grader is run on every answer as well (GROQ_API_KEY
+required). Agreement is then reported against the LLM, and ambiguous
+answers are settled by it, as in the graph.
+
+`--fit` fits the logistic calibration on the set and scores each answer
+with a calibration fitted on the other answers (leave-one-out).
+`--save-calibration` writes the calibration fitted on all answers to
+`graph/grounding_calibration.json`. The app loads it at import and,
+once it is committed, checks grounding locally by default. Fit with the
+production MiniLM embeddings; `--embeddings hashing` only checks the
+plumbing and cannot be saved.
+
+    python -m benchmarks.bench_grounding --fit
+    python -m benchmarks.bench_grounding --llm-model llama-3.1-8b-instant
+    python -m benchmarks.bench_grounding --fit --save-calibration
+"""
+
+import argparse
+import json
+import statistics
+import sys
+
+from tabulate import tabulate
+
+from benchmarks.fakes import FIXTURES_DIR, HashingEmbedding
+from graph.grounding import (
+    AMBIGUOUS,
+    GROUNDED,
+    GroundingChecker,
+    fit_calibration,
+)
+
+
+def load_embeddings(name: str):
+    if name == "hashing":
+        return HashingEmbedding()
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+
+def llm_verdicts(items: list, model_name: str) -> list:
+    from graph.chains.hallucination_grader import get_hallucination_grader
+    from graph.context import build_context
+
+    grader = get_hallucination_grader(model_name)
+    return [
+        grader.invoke(
+            {
+                "documents": build_context(item["documents"], model_name),
+                "generation": item["generation"],
+            }
+        ).binary_score
+        for item in items
+    ]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--embeddings", choices=["minilm", "hashing"], default="minilm")
+    parser.add_argument("--eval", default=str(FIXTURES_DIR / "grounding_eval.json"))
+    parser.add_argument("--llm-model", help="also run the Groq grader as reference")
+    parser.add_argument("--fit", action="store_true")
+    parser.add_argument("--save-calibration", action="store_true")
+    args = parser.parse_args(argv)
+    if args.save_calibration and args.embeddings != "minilm":
+        parser.error("--save-calibration needs the production MiniLM embeddings")
+
+    with open(args.eval) as f:
+        items = json.load(f)
+    checker = GroundingChecker(load_embeddings(args.embeddings))
+    checker.check("warm up", ["warm up"])
+
+    supports, latencies = [], []
+    for item in items:
+        result = checker.check(item["generation"], item["documents"])
+        supports.append(result.support)
+        latencies.append(result.elapsed_ms)
+    labels = [item["grounded"] for item in items]
+
+    calibrations = [checker.calibration] * len(items)
+    if args.fit or args.save_calibration:
+        calibrations = [
+            fit_calibration(
+                supports[:i] + supports[i + 1 :], labels[:i] + labels[i + 1 :]
+            )
+            for i in range(len(items))
+        ]
+    llm = llm_verdicts(items, args.llm_model) if args.llm_model else None
+    reference = llm if llm is not None else labels
+
+    rows, decided, agreed, final_agreed = [], 0, 0, 0
+    for i, item in enumerate(items):
+        probability = calibrations[i].probability(supports[i])
+        verdict = calibrations[i].verdict(probability)
+        if verdict != AMBIGUOUS:
+            decided += 1
+            agreed += (verdict == GROUNDED) == reference[i]
+            final = verdict == GROUNDED
+        else:
+            # Settled by the LLM grader in the graph
+            final = reference[i]
+        final_agreed += final == reference[i]
+        row = {
+            "answer": item["id"],
+            "label": "grounded" if item["grounded"] else "ungrounded",
+            "support": supports[i],
+            "p_grounded": probability,
+            "local": verdict,
+        }
+        if llm is not None:
+            row["llm"] = "grounded" if llm[i] else "ungrounded"
+        rows.append(row)
+
+    print(tabulate(rows, headers="keys", floatfmt=".2f"))
+    source = f"LLM grader ({args.llm_model})" if llm else "human labels"
+    print(
+        f"\nDecided locally: {decided}/{len(items)} ({decided / len(items):.0%} "
+        f"fewer hallucination-grader calls)"
+    )
+    if decided:
+        print(f"Local decisions agreeing with {source}: {agreed}/{decided}")
+    print(
+        f"Final verdicts (ambiguous ones from the LLM) agreeing with {source}: "
+        f"{final_agreed}/{len(items)}"
+    )
+    if llm is not None:
+        llm_right = sum(v == label for v, label in zip(llm, labels))
+        print(f"LLM grader agreeing with human labels: {llm_right}/{len(items)}")
+    print(
+        f"Local check latency: p50 {statistics.median(latencies):.1f} ms, "
+        f"p95 {percentile(latencies, 0.95):.1f} ms | embeddings: {args.embeddings}"
+    )
+
+    if args.fit or args.save_calibration:
+        fitted = fit_calibration(supports, labels)
+        print(
+            f"Calibration fitted on all answers: slope {fitted.slope:.1f}, "
+            f"midpoint {fitted.midpoint:.3f} (leave-one-out used above)"
+        )
+        if args.save_calibration:
+            fitted.save()
+            print("✓ Saved graph/grounding_calibration.json")
+    else:
+        current = checker.calibration
+        print(
+            f"Calibration: slope {current.slope:.1f}, "
+            f"midpoint {current.midpoint:.3f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Accuracy and latency of the local intent classifier.
+
+Fits `IntentClassifier` on `graph/intent_examples.json`, classifies the
+held-out questions in `fixtures/intent_eval.json`, and reports accuracy,
+per-intent precision/recall, the confusion matrix and per-question latency
+(query embedding plus centroid scoring, and scoring alone). Uses the
+production MiniLM embeddings; `--embeddings hashing` runs offline with the
+bag-of-words stand-in from `benchmarks.fakes`, which only checks the
+plumbing.
+
+    python -m benchmarks.bench_intent
+    python -m benchmarks.bench_intent --embeddings hashing --repeat 200
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections import Counter
+
+from tabulate import tabulate
+
+from benchmarks.fakes import FIXTURES_DIR, HashingEmbedding
+from graph.intent import IntentClassifier, load_examples
+
+LATENCY_TARGET_MS = 10.0
+
+
+def load_embeddings(name: str):
+    if name == "hashing":
+        return HashingEmbedding()
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--embeddings", choices=["minilm", "hashing"], default="minilm")
+    parser.add_argument("--eval", default=str(FIXTURES_DIR / "intent_eval.json"))
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    embeddings = load_embeddings(args.embeddings)
+    start = time.perf_counter()
+    classifier = IntentClassifier(embeddings, load_examples())
+    fit_s = time.perf_counter() - start
+    with open(args.eval) as f:
+        items = json.load(f)
+
+    confusion = Counter()
+    mistakes = []
+    for item in items:
+        predicted = classifier.classify(item["question"]).intent
+        confusion[(item["intent"], predicted)] += 1
+        if predicted != item["intent"]:
+            mistakes.append((item["question"], item["intent"], predicted))
+
+    intents = classifier.intents
+    rows = []
+    for intent in intents:
+        true_positive = confusion[(intent, intent)]
+        predicted = sum(confusion[(other, intent)] for other in intents)
+        actual = sum(confusion[(intent, other)] for other in intents)
+        rows.append(
+            {
+                "intent": intent,
+                "support": actual,
+                "precision": true_positive / predicted if predicted else 0.0,
+                "recall": true_positive / actual if actual else 0.0,
+            }
+        )
+    accuracy = sum(confusion[(i, i)] for i in intents) / len(items)
+
+    total_ms, scoring_ms = [], []
+    for _ in range(args.repeat):
+        for item in items:
+            start = time.perf_counter()
+            embedding = embeddings.embed_query(item["question"])
+            scored = time.perf_counter()
+            classifier.decide(classifier.classify_embedding(embedding))
+            end = time.perf_counter()
+            total_ms.append((end - start) * 1000)
+            scoring_ms.append((end - scored) * 1000)
+
+    print(tabulate(rows, headers="keys", floatfmt=".2f"))
+    print(f"\nAccuracy: {accuracy:.1%} on {len(items)} held-out questions")
+    print("\nConfusion (rows: expected, columns: predicted)")
+    print(
+        tabulate(
+            [[i] + [confusion[(i, j)] for j in intents] for i in intents],
+            headers=["", *intents],
+        )
+    )
+    for question, expected, predicted in mistakes:
+        print(f"  ✗ {question!r}: expected {expected}, got {predicted}")
+    p50, p95 = statistics.median(total_ms), percentile(total_ms, 0.95)
+    met = "✓" if p95 < LATENCY_TARGET_MS else "✗"
+    print(
+        f"\nFit: {fit_s:.2f}s | per question: p50 {p50:.2f} ms, p95 {p95:.2f} ms "
+        f"(scoring alone p50 {statistics.median(scoring_ms) * 1000:.0f} µs) | "
+        f"target < {LATENCY_TARGET_MS:.0f} ms: {met}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""
+Cost and freshness of keeping the index up to date: adaptive recrawl vs daily.
+
+Simulates a site whose pages change at random (Poisson) times. The rates
+come from four classes: announcements change about daily, fee and
+calendar pages weekly, course pages every two months, and the rest never.
+The simulation covers `--days`. Three ways of keeping the index fresh
+are compared:
+- daily full: fetch and re-ingest every page once a day, as rerunning the
+  full ingestion with a fresh crawl state does;
+- daily check: fetch every page daily (conditional GET) and re-ingest only
+  the pages whose text changed;
+- adaptive: `ingest.recrawl.run_cycle` every `--cycle-hours`. It fetches
+  only due URLs and re-ingests the changed pages, like
+  `llm_generated_ingestion.py --recrawl`.
+
+Cost is requests and chunks embedded. Each re-ingested page is counted at
+the mean number of production chunks (500/100 tokens) per page of
+`fixtures/retrieval_pages.json`. Freshness is the mean share of time a
+page's indexed copy is out of date. It also reports the hours from a
+change to its re-ingestion (p50 and p95).
+
+    python -m benchmarks.bench_recrawl
+    python -m benchmarks.bench_recrawl --pages 1000 --days 180 --cycle-hours 3
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from bisect import bisect_right
+from typing import Callable, List
+
+from tabulate import tabulate
+
+from benchmarks.fakes import FIXTURES_DIR
+from ingest.chunker import TokenChunker
+from ingest.recrawl import DAY, HOUR, FetchResult, RecrawlSchedule, run_cycle
+
+# (share of pages, changes per day)
+PAGE_CLASSES = {
+    "announcements": (0.05, 1.0),
+    "fees / calendar": (0.15, 1 / 7),
+    "courses": (0.50, 1 / 60),
+    "static": (0.30, 0.0),
+}
+
+
+class SimulatedSite:
+    def __init__(self, pages: int, days: float, seed: int = 0):
+        rng = random.Random(seed)
+        self.urls = [f"https://study.iitm.ac.in/ds/page-{i}.html" for i in range(pages)]
+        names = list(PAGE_CLASSES)
+        weights = [share for share, _ in PAGE_CLASSES.values()]
+        self.page_class = {url: rng.choices(names, weights)[0] for url in self.urls}
+        self.changes = {}
+        for url in self.urls:
+            rate = PAGE_CLASSES[self.page_class[url]][1] / DAY
+            times, t = [], 0.0
+            while rate and (t := t + rng.expovariate(rate)) < days * DAY:
+                times.append(t)
+            self.changes[url] = times
+
+    def version(self, url: str, now: float) -> int:
+        return bisect_right(self.changes[url], now)
+
+    def fetcher(self, clock: Callable[[], float]):
+        def fetch(url, etag, last_modified):
+            version = str(self.version(url, clock()))
+            if etag == version:
+                return FetchResult(status=304)
+            html = (
+                f"<html><body><main><h1>{url}</h1><p>Revision {version} of the "
+                f"page.</p></main><script>nonce={random.random()}</script>"
+                "</body></html>"
+            )
+            return FetchResult(200, html, etag=version, bytes=len(html))
+
+        return fetch
+
+
+class Freshness:
+    """Tracks the indexed version of every page to measure staleness."""
+
+    def __init__(self, site: SimulatedSite):
+        self.site = site
+        self.indexed = {url: 0 for url in site.urls}
+        self.delays: List[float] = []
+        self.stale_s = 0.0
+
+    def ingest(self, url: str, now: float) -> None:
+        changes = self.site.changes[url]
+        version = self.site.version(url, now)
+        if version > self.indexed[url]:
+            # Stale from the first change the index missed
+            self.stale_s += now - changes[self.indexed[url]]
+            self.delays.extend(now - t for t in changes[self.indexed[url] : version])
+        self.indexed[url] = version
+
+    def finish(self, end: float) -> dict:
+        for url in self.site.urls:
+            changes = self.site.changes[url]
+            if self.indexed[url] < len(changes):
+                self.stale_s += end - changes[self.indexed[url]]
+        delays = sorted(d / HOUR for d in self.delays) or [0.0]
+        return {
+            "stale_%": 100 * self.stale_s / (end * len(self.site.urls)),
+            "delay_p50_h": statistics.median(delays),
+            "delay_p95_h": delays[int(0.95 * (len(delays) - 1))],
+        }
+
+
+def run_daily(site: SimulatedSite, days: int, full: bool) -> dict:
+    freshness = Freshness(site)
+    requests = ingested = 0
+    checked = {url: 0 for url in site.urls}
+    for day in range(1, days + 1):
+        now = day * DAY
+        for url in site.urls:
+            requests += 1
+            version = site.version(url, now)
+            if full or version != checked[url]:
+                ingested += 1
+                freshness.ingest(url, now)
+            checked[url] = version
+    return {"requests": requests, "pages_ingested": ingested, **freshness.finish(now)}
+
+
+def run_adaptive(site: SimulatedSite, days: int, cycle_hours: float) -> tuple:
+    freshness = Freshness(site)
+    requests = ingested = peak = 0
+    now, end = 0.0, days * DAY
+    with tempfile.TemporaryDirectory() as directory:
+        schedule = RecrawlSchedule(f"{directory}/recrawl.sqlite")
+        schedule.add(site.urls, now=now)
+        fetch = site.fetcher(lambda: now)
+        run_cycle(schedule, fetch, now=now, limit=len(site.urls))  # Baseline
+        while (now := now + cycle_hours * HOUR) <= end:
+            report, changed = run_cycle(schedule, fetch, now=now, limit=len(site.urls))
+            requests += report.requests
+            peak = max(peak, report.requests)
+            ingested += len(changed)
+            for url in changed:
+                freshness.ingest(url, now)
+        intervals = {}
+        for url in site.urls:
+            intervals.setdefault(site.page_class[url], []).append(
+                schedule.get(url).interval / HOUR
+            )
+        schedule.close()
+    result = {
+        "requests": requests,
+        "pages_ingested": ingested,
+        **freshness.finish(end),
+        "peak_cycle_requests": peak,
+    }
+    return result, {name: statistics.median(v) for name, v in intervals.items()}
+
+
+def chunks_per_page() -> float:
+    with open(FIXTURES_DIR / "retrieval_pages.json") as f:
+        pages = json.load(f)
+    chunker = TokenChunker(chunk_size=500, chunk_overlap=100)
+    return statistics.mean(len(chunker.split_text(page["text"])) for page in pages)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--cycle-hours", type=float, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    site = SimulatedSite(args.pages, args.days, args.seed)
+    per_page = chunks_per_page()
+    start = time.perf_counter()
+    adaptive, intervals = run_adaptive(site, args.days, args.cycle_hours)
+    simulate_s = time.perf_counter() - start
+    rows = [
+        {"strategy": "daily full", **run_daily(site, args.days, full=True)},
+        {"strategy": "daily check", **run_daily(site, args.days, full=False)},
+        {"strategy": f"adaptive ({args.cycle_hours:g} h cycles)", **adaptive},
+    ]
+    for row in rows:
+        row["chunks_embedded"] = round(row["pages_ingested"] * per_page)
+        row["requests_per_day"] = row["requests"] / args.days
+
+    print(tabulate(rows, headers="keys", floatfmt=".1f", missingval="-"))
+    print("\nMedian revisit interval by page class (h):")
+    print(
+        tabulate(
+            [
+                {
+                    "class": name,
+                    "changes_per_day": PAGE_CLASSES[name][1],
+                    "pages": sum(c == name for c in site.page_class.values()),
+                    "interval_h": intervals.get(name),
+                }
+                for name in PAGE_CLASSES
+            ],
+            headers="keys",
+            floatfmt=".2f",
+        )
+    )
+    full, check, adaptive = rows
+    changes = sum(len(times) for times in site.changes.values())
+    print(
+        f"\n{args.pages} pages, {changes} changes over {args.days} days | "
+        f"{per_page:.1f} chunks per page | simulated in {simulate_s:.1f} s"
+    )
+    print(
+        f"✓ Adaptive vs daily full: requests {full['requests']} → "
+        f"{adaptive['requests']}, chunks embedded {full['chunks_embedded']} → "
+        f"{adaptive['chunks_embedded']}, stale {full['stale_%']:.1f}% → "
+        f"{adaptive['stale_%']:.1f}% of page-time"
+    )
+    if adaptive["stale_%"] > check["stale_%"]:
+        print(
+            f"⚠️ Adaptive recrawl is staler than checking daily "
+            f"({adaptive['stale_%']:.1f}% vs {check['stale_%']:.1f}%)"
+        )
+    if adaptive["requests"] > check["requests"]:
+        print("⚠️ Adaptive recrawl makes more requests than checking daily")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Retrieve-node search latency with and without the shared retrieval cache.
+
+Replays a stream of questions through `graph.nodes.retrieve.search` over
+the production retriever layout: two Chroma collections behind an
+EnsembleRetriever, built on the fixture corpus with a deterministic fake
+embedding. The stream mixes the sample and fixture questions with
+popularity skew. Each question is asked with every model, as happens
+when an answer is regenerated with another model, and the case,
+spacing and punctuation vary; they share one entry. Every cache hit is
+checked against a fresh search for the spelling that filled the entry.
+A new index version must miss.
+
+    python -m benchmarks.bench_retrieval_cache
+    python -m benchmarks.bench_retrieval_cache --requests 2000 --cache-size 16
+"""
+
+import argparse
+import importlib
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from tabulate import tabulate
+
+from benchmarks import fakes
+from graph.consts import MODEL_OPTIONS, SAMPLE_QUESTIONS
+
+
+def question_stream(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    with open(fakes.FIXTURES_DIR / "questions.json") as f:
+        fixture = [item["question"] for item in json.load(f)]
+    questions = list(dict.fromkeys(SAMPLE_QUESTIONS + fixture))
+    # Zipf-like popularity: a few questions are asked most of the time
+    weights = [1 / (rank + 1) for rank in range(len(questions))]
+    stream = []
+    while len(stream) < count:
+        question = rng.choices(questions, weights)[0]
+        for _ in MODEL_OPTIONS:
+            variant = rng.choice(
+                [question, question.lower(), f"  {question}", question.rstrip("?")]
+            )
+            stream.append(variant)
+    return stream[:count]
+
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+
+def replay(search, stream: list) -> list:
+    latencies = []
+    for question in stream:
+        start = time.perf_counter()
+        search(question)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--cache-size", type=int, default=1024)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        retriever = fakes.build_chroma_fixture(directory)
+        fakes.install_fakes(retriever)
+        from graph.retrieval_cache import normalize_query, retrieval_cache
+
+        # graph.nodes re-exports the node function under the module's name
+        search = importlib.import_module("graph.nodes.retrieve").search
+
+        stream = question_stream(args.requests)
+        retriever.invoke("warm up")
+
+        rows = []
+        for name, size in (("uncached", 0), ("cached", args.cache_size)):
+            retrieval_cache.clear()
+            retrieval_cache.max_entries = size
+            retrieval_cache.hits = retrieval_cache.misses = 0
+            latencies = replay(search, stream)
+            stats = retrieval_cache.stats()
+            rows.append(
+                {
+                    "mode": name,
+                    "searches": stats["misses"] if size else len(stream),
+                    "hit_rate": stats["hit_rate"],
+                    "p50_ms": statistics.median(latencies),
+                    "p95_ms": percentile(latencies, 0.95),
+                    "total_s": sum(latencies) / 1000,
+                    "chunks_stored": stats["documents"],
+                }
+            )
+
+        # A hit returns what a fresh search for the spelling that filled the
+        # entry returns; other spellings share it
+        first_spelling = {}
+        for question in stream:
+            first_spelling.setdefault(normalize_query(question), question)
+        mismatches = [
+            question
+            for question in dict.fromkeys(stream)
+            if [d.page_content for d in search(question)]
+            != [
+                d.page_content
+                for d in retriever.invoke(first_spelling[normalize_query(question)])
+            ]
+        ]
+        stale = retrieval_cache.get(stream[0], "next-index-version") is not None
+
+    print(tabulate(rows, headers="keys", floatfmt=".3f"))
+    uncached, cached = rows
+    print(
+        f"\n{len(stream)} requests, {len(set(map(str.lower, stream)))} distinct "
+        f"spellings, {len(MODEL_OPTIONS)} models | vector searches "
+        f"{uncached['searches']} → {cached['searches']}, total "
+        f"{uncached['total_s']:.2f} → {cached['total_s']:.2f} s"
+    )
+    for question in mismatches:
+        print(f"❌ Cached result differs from a fresh search: {question!r}")
+    if not mismatches:
+        print("✓ Cache hits match fresh searches")
+    if stale:
+        print("❌ A new index version was served a cached result")
+    else:
+        print("✓ A new index version misses the cache")
+    return 1 if mismatches or stale else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+"""
+Retrieval quality vs latency over a grid of chunking, k and fusion weights.
+
+Each (chunk size, overlap) pair gets a fresh temporary index laid out as
+in production. Pages of the primary store go into "rag-chroma" and the
+others into "rag-chroma-extra", and an EnsembleRetriever fuses the two.
+Every (k primary, k extra, primary weight) combination is then queried
+with the labelled questions in `fixtures/retrieval_eval.json`. Each
+question lists the sources that answer it. Reported per setting:
+- recall@k: share of a question's relevant sources among the chunks returned;
+- MRR: mean reciprocal rank of the first relevant chunk;
+- chunks, index size on disk and build time (chunking, embedding, insert);
+- p50 over the questions of the best-of-`--repeat` query latency.
+
+A setting is on the Pareto front when no other setting has at least its
+recall, MRR and speed and is better on one of them. The front is listed
+fastest first, along with any setting that beats the current one
+(500/100 tokens, k 2+3, weights 0.3/0.7) on every measure.
+
+Pages come from `fixtures/retrieval_pages.json`, or from `--pages FILE`
+in the same format: a list of {"source", "title", "store", "text"}, with
+store "primary" or "extra". Measure with the production MiniLM
+embeddings; `--embeddings hashing` only checks the plumbing.
+
+    python -m benchmarks.bench_retrieval_sweep
+    python -m benchmarks.bench_retrieval_sweep --chunk-sizes 256 500 800 --overlaps 50
+    python -m benchmarks.bench_retrieval_sweep --embeddings hashing --output sweep.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from langchain_core.documents import Document
+from tabulate import tabulate
+
+from benchmarks.fakes import FIXTURES_DIR, HashingEmbedding
+from ingest.chunker import TokenChunker
+
+# Settings served today: TokenChunker in llm_generated_ingestion and
+# build_retriever in ingestion.py
+CURRENT = {
+    "chunk_size": 500,
+    "overlap": 100,
+    "k_primary": 2,
+    "k_extra": 3,
+    "weight": 0.3,
+}
+STORES = {"primary": "rag-chroma", "extra": "rag-chroma-extra"}
+
+
+def load_embeddings(name: str):
+    if name == "hashing":
+        return HashingEmbedding()
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+
+
+def directory_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def build_index(
+    pages: List[dict], chunk_size: int, overlap: int, directory: str, embeddings
+) -> dict:
+    """Chunks and embeds the pages into one Chroma collection per store."""
+    from langchain_chroma import Chroma
+
+    start = time.perf_counter()
+    chunker = TokenChunker(chunk_size=chunk_size, chunk_overlap=overlap)
+    stores, chunks = {}, 0
+    for store, collection in STORES.items():
+        documents = chunker.split_documents(
+            Document(
+                page_content=page["text"],
+                metadata={"source": page["source"], "title": page["title"]},
+            )
+            for page in pages
+            if page.get("store", "primary") == store
+        )
+        chunks += len(documents)
+        stores[store] = Chroma(
+            collection_name=collection,
+            persist_directory=os.path.join(directory, f".{collection}"),
+            embedding_function=embeddings,
+        )
+        if documents:
+            stores[store].add_documents(documents)
+    return {
+        "stores": stores,
+        "chunks": chunks,
+        "build_s": time.perf_counter() - start,
+        "index_mb": directory_size(directory) / 1_000_000,
+    }
+
+
+def evaluate(
+    stores: Dict[str, object], questions: List[dict], setting: dict, repeat: int
+) -> dict:
+    from langchain.retrievers import EnsembleRetriever
+
+    ensemble = EnsembleRetriever(
+        retrievers=[
+            stores["primary"].as_retriever(search_kwargs={"k": setting["k_primary"]}),
+            stores["extra"].as_retriever(search_kwargs={"k": setting["k_extra"]}),
+        ],
+        weights=[setting["weight"], 1 - setting["weight"]],
+    )
+    recalls, reciprocal_ranks, latencies = [], [], []
+    for item in questions:
+        relevant = set(item["relevant"])
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            documents = ensemble.invoke(item["question"])
+            best = min(best, (time.perf_counter() - start) * 1000)
+        latencies.append(best)
+        sources = [doc.metadata.get("source") for doc in documents]
+        recalls.append(len(relevant & set(sources)) / len(relevant))
+        rank = next((i for i, s in enumerate(sources, 1) if s in relevant), None)
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+    return {
+        "recall": statistics.mean(recalls),
+        "mrr": statistics.mean(reciprocal_ranks),
+        "query_p50_ms": statistics.median(latencies),
+    }
+
+
+def dominates(a: dict, b: dict) -> bool:
+    at_least = (
+        a["recall"] >= b["recall"]
+        and a["mrr"] >= b["mrr"]
+        and a["query_p50_ms"] <= b["query_p50_ms"]
+    )
+    better = (
+        a["recall"] > b["recall"]
+        or a["mrr"] > b["mrr"]
+        or a["query_p50_ms"] < b["query_p50_ms"]
+    )
+    return at_least and better
+
+
+def pareto_front(rows: List[dict]) -> List[dict]:
+    return [row for row in rows if not any(dominates(other, row) for other in rows)]
+
+
+def label(row: dict) -> str:
+    return (
+        f"{row['chunk_size']}/{row['overlap']} k{row['k_primary']}+{row['k_extra']} "
+        f"w{row['weight']:.1f}"
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--embeddings", choices=["minilm", "hashing"], default="minilm")
+    parser.add_argument("--pages", default=str(FIXTURES_DIR / "retrieval_pages.json"))
+    parser.add_argument("--eval", default=str(FIXTURES_DIR / "retrieval_eval.json"))
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[128, 256, 500])
+    parser.add_argument("--overlaps", type=int, nargs="+", default=[0, 50, 100])
+    parser.add_argument("--k-primary", type=int, nargs="+", default=[2, 3])
+    parser.add_argument("--k-extra", type=int, nargs="+", default=[3, 5])
+    parser.add_argument(
+        "--weights",
+        type=float,
+        nargs="+",
+        default=[0.3, 0.5, 0.7],
+        help="weight of the primary store; the extra store gets the rest",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="best of N per query")
+    parser.add_argument("--output", help="write every setting's results as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.pages) as f:
+        pages = json.load(f)
+    with open(args.eval) as f:
+        questions = json.load(f)
+    embeddings = load_embeddings(args.embeddings)
+
+    rows = []
+    for chunk_size, overlap in itertools.product(args.chunk_sizes, args.overlaps):
+        if overlap >= chunk_size:
+            continue
+        with tempfile.TemporaryDirectory() as directory:
+            index = build_index(pages, chunk_size, overlap, directory, embeddings)
+            for k_primary, k_extra, weight in itertools.product(
+                args.k_primary, args.k_extra, args.weights
+            ):
+                setting = {
+                    "chunk_size": chunk_size,
+                    "overlap": overlap,
+                    "k_primary": k_primary,
+                    "k_extra": k_extra,
+                    "weight": weight,
+                }
+                rows.append(
+                    {
+                        **setting,
+                        **evaluate(index["stores"], questions, setting, args.repeat),
+                        "chunks": index["chunks"],
+                        "index_mb": index["index_mb"],
+                        "build_s": index["build_s"],
+                    }
+                )
+        print(
+            f"  built {chunk_size}/{overlap}: {index['chunks']} chunks in "
+            f"{index['build_s']:.1f} s",
+            file=sys.stderr,
+        )
+
+    front = sorted(pareto_front(rows), key=lambda row: row["query_p50_ms"])
+    current = next(
+        (row for row in rows if all(row[k] == v for k, v in CURRENT.items())), None
+    )
+
+    def table_row(row: dict) -> dict:
+        return {
+            "setting": label(row),
+            "recall@k": row["recall"],
+            "mrr": row["mrr"],
+            "query_p50_ms": row["query_p50_ms"],
+            "chunks": row["chunks"],
+            "index_mb": row["index_mb"],
+            "build_s": row["build_s"],
+            "current": "◀" if row is current else "",
+        }
+
+    print(f"Pareto front ({len(front)} of {len(rows)} settings), fastest first:\n")
+    print(tabulate([table_row(row) for row in front], headers="keys", floatfmt=".3f"))
+    print(
+        f"\n{len(questions)} questions, {len(pages)} pages | embeddings: "
+        f"{args.embeddings}"
+    )
+    if current is None:
+        print("⚠️ The current setting is not in the grid")
+    elif current in front:
+        print(f"✓ Current setting {label(current)} is on the Pareto front")
+    else:
+        better = sorted(
+            (row for row in rows if dominates(row, current)),
+            key=lambda row: (-row["recall"], -row["mrr"], row["query_p50_ms"]),
+        )
+        print(
+            f"⚠️ Current setting {label(current)} (recall {current['recall']:.3f}, "
+            f"MRR {current['mrr']:.3f}, {current['query_p50_ms']:.1f} ms) is beaten "
+            f"on every measure by {len(better)} settings, best:\n"
+        )
+        print(
+            tabulate(
+                [table_row(row) for row in better[:5]], headers="keys", floatfmt=".3f"
+            )
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(rows, indent=2))
+        print(f"✓ Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
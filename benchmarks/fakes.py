@@ -0,0 +1,291 @@
+"""
+Local stand-ins for Groq, the Chroma retriever and DuckDuckGo so the graph can
+run offline with predictable latency.
+
+`install_fakes()` must run before `graph.graph` is imported: the real
+`ingestion` module loads MiniLM and both Chroma stores at import time, so it is
+replaced in `sys.modules` by a module backed by the fixture corpus.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import importlib
+import json
+import re
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import RunnableLambda
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+CHAIN_MODULES = [
+    "graph.chains.answer_grader",
+    "graph.chains.generation",
+    "graph.chains.hallucination_grader",
+    "graph.chains.retrieval_grader",
+    "graph.chains.router",
+]
+
+# Structured outputs returned when no script overrides them
+DEFAULT_STRUCTURED = {
+    "GradeDocuments": {"binary_score": True},
+    "GradeHallucinations": {"binary_score": True},
+    "GradeAnswer": {"binary_score": True},
+    "RouteQuery": {"datasource": "vectorstore"},
+}
+
+
+@dataclass
+class FakeLLMSettings:
+    latency_s: float = 0.05  # time to first token
+    tokens_per_second: float = 400.0  # decode rate
+    prefill_tokens_per_second: float = 20000.0  # prompt processing rate
+    answer: str = (
+        "Based on the provided context, here is a concise answer to your question "
+        "about the IIT Madras BS Degree program."
+    )
+    structured_tokens: int = 12
+
+
+settings = FakeLLMSettings()
+
+# Per-run scripts: schema name -> list of outputs consumed in order; the last
+# entry repeats once the list is exhausted.
+_script: contextvars.ContextVar[Optional[Dict[str, list]]] = contextvars.ContextVar(
+    "fake_llm_script", default=None
+)
+_script_lock = threading.Lock()
+
+
+@contextmanager
+def scripted(script: Optional[Dict[str, list]]):
+    state = {name: [list(values), 0] for name, values in (script or {}).items()}
+    token = _script.set(state)
+    try:
+        yield
+    finally:
+        _script.reset(token)
+
+
+def _next_structured(schema_name: str) -> Dict[str, Any]:
+    state = _script.get()
+    if state and schema_name in state:
+        with _script_lock:
+            values, index = state[schema_name]
+            state[schema_name][1] = index + 1
+        value = values[min(index, len(values) - 1)]
+        if not isinstance(value, dict):
+            field_name = next(iter(DEFAULT_STRUCTURED.get(schema_name, {"value": 0})))
+            value = {field_name: value}
+        return value
+    return DEFAULT_STRUCTURED.get(schema_name, {})
+
+
+def count_tokens(text: str) -> int:
+    # Cheap approximation; the fake only needs latency proportional to size
+    return max(1, len(text) // 4)
+
+
+def _delay(prompt: str, output_tokens: int) -> float:
+    return (
+        settings.latency_s
+        + count_tokens(prompt) / settings.prefill_tokens_per_second
+        + output_tokens / settings.tokens_per_second
+    )
+
+
+def _prompt_text(value: Any) -> str:
+    if hasattr(value, "to_string"):
+        return value.to_string()
+    if isinstance(value, list):
+        return "\n".join(str(getattr(m, "content", m)) for m in value)
+    return str(value)
+
+
+class FakeChatGroq(BaseChatModel):
+    """Drop-in for `ChatGroq` that sleeps instead of calling the API."""
+
+    groq_api_key: Optional[str] = None
+    model_name: str = "fake"
+    temperature: float = 0.0
+    max_retries: int = 2
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-groq"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = _prompt_text(messages)
+        time.sleep(_delay(prompt, count_tokens(settings.answer)))
+        message = AIMessage(content=settings.answer)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = _prompt_text(messages)
+        await asyncio.sleep(_delay(prompt, count_tokens(settings.answer)))
+        message = AIMessage(content=settings.answer)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def with_structured_output(self, schema, **kwargs):
+        def invoke(value):
+            time.sleep(_delay(_prompt_text(value), settings.structured_tokens))
+            return schema(**_next_structured(schema.__name__))
+
+        async def ainvoke(value):
+            delay = _delay(_prompt_text(value), settings.structured_tokens)
+            await asyncio.sleep(delay)
+            return schema(**_next_structured(schema.__name__))
+
+        return RunnableLambda(invoke, afunc=ainvoke, name=f"fake_{schema.__name__}")
+
+
+def load_corpus(path: Path = FIXTURES_DIR / "corpus.json") -> List[Document]:
+    with open(path) as f:
+        return [Document(**item) for item in json.load(f)]
+
+
+def _terms(text: str) -> set[str]:
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+class FakeRetriever(BaseRetriever):
+    """Keyword-overlap retriever over an in-memory corpus."""
+
+    documents: List[Document]
+    k: int = 5
+    latency_s: float = 0.01
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        time.sleep(self.latency_s)
+        query_terms = _terms(query)
+        scored = [
+            (len(query_terms & _terms(doc.page_content)), i, doc)
+            for i, doc in enumerate(self.documents)
+        ]
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [doc for score, _, doc in scored[: self.k] if score > 0]
+
+
+class HashingEmbedding(Embeddings):
+    """
+    Bag-of-words embedding via feature hashing. Unlike
+    `DeterministicFakeEmbedding`, texts sharing words get similar vectors, so
+    the intent classifier routes fixture questions sensibly offline.
+    """
+
+    def __init__(self, size: int = 384):
+        self.size = size
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.size
+        for term in re.findall(r"[a-z0-9]+", text.lower()):
+            digest = hashlib.blake2b(term.encode(), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "big") % self.size
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def build_chroma_fixture(persist_directory: str) -> BaseRetriever:
+    """
+    Builds the production retriever layout (two Chroma collections behind an
+    EnsembleRetriever) over the fixture corpus, using a deterministic fake
+    embedding instead of MiniLM.
+    """
+    from langchain.retrievers import EnsembleRetriever
+    from langchain_chroma import Chroma
+
+    embedding = DeterministicFakeEmbedding(size=384)
+    corpus = load_corpus()
+    retriever1 = Chroma.from_documents(
+        documents=corpus,
+        collection_name="rag-chroma",
+        embedding=embedding,
+        persist_directory=f"{persist_directory}/.chroma",
+    ).as_retriever(search_kwargs={"k": 2})
+    retriever2 = Chroma.from_documents(
+        documents=corpus,
+        collection_name="rag-chroma-extra",
+        embedding=embedding,
+        persist_directory=f"{persist_directory}/.chroma-extra",
+    ).as_retriever(search_kwargs={"k": 3})
+    return EnsembleRetriever(retrievers=[retriever1, retriever2], weights=[0.3, 0.7])
+
+
+@dataclass
+class FakeDDGS:
+    latency_s: float = 0.2
+    results: List[Dict[str, str]] = field(
+        default_factory=lambda: [
+            {
+                "title": "Web result",
+                "href": "https://example.com/result",
+                "body": "A web search result body used by the offline benchmark.",
+            }
+        ]
+    )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def text(self, query: str, max_results: int = 3):
+        time.sleep(self.latency_s)
+        return self.results[:max_results]
+
+
+def install_fakes(retriever: Optional[BaseRetriever] = None) -> None:
+    """Routes every Groq, retriever and DuckDuckGo call to the local stand-ins."""
+    retriever = retriever or FakeRetriever(documents=load_corpus())
+
+    if "ingestion" not in sys.modules or not getattr(
+        sys.modules["ingestion"], "__fake__", False
+    ):
+        fake_ingestion = types.ModuleType("ingestion")
+        fake_ingestion.__fake__ = True
+        fake_ingestion.embeddings = HashingEmbedding(size=384)
+        # No table store: the table lookup node passes documents through
+        fake_ingestion.table_store = lambda: None
+        fake_ingestion.index_version = lambda: "fixture"
+        sys.modules["ingestion"] = fake_ingestion
+    sys.modules["ingestion"].retriever = retriever
+
+    for name in CHAIN_MODULES:
+        importlib.import_module(name).ChatGroq = FakeChatGroq
+    # The stand-in has no rate limits to respect
+    importlib.import_module("graph.llm_scheduler").scheduler.set_limits({})
+    # The canned answer is not drawn from the documents, so grounding is left
+    # to the scripted grader
+    importlib.import_module("graph.grounding").GROUNDING_CHECK = "llm"
+
+    # graph.nodes re-exports the node functions under the module names, so the
+    # modules have to be looked up explicitly
+    importlib.import_module("graph.nodes.retrieve").retriever = retriever
+    # Searches cached for the previous stand-in are not this one's results
+    importlib.import_module("graph.retrieval_cache").retrieval_cache.clear()
+    importlib.import_module("graph.nodes.web_search").DDGS = FakeDDGS
@@ -0,0 +1,318 @@
+"""
+Concurrent-session load generator for the chatbot.
+
+Simulates N chat sessions, each asking a sequence of questions drawn from the
+sidebar SAMPLE_QUESTIONS and the benchmark fixture set, at increasing
+concurrency levels. By default the graph runs in-process against the fake
+Groq stand-in and a local Chroma fixture; `--url` targets a serving endpoint
+that accepts `{"question", "selected_model"}` as a JSON POST instead.
+
+    python -m benchmarks.load_test --levels 1 4 16 32
+    python -m benchmarks.load_test --workers 8 --questions-per-session 10
+    python -m benchmarks.load_test --url http://localhost:8000/ask
+
+For every level it reports throughput, latency and queueing-delay
+percentiles, errors and Python heap growth. The shared retriever is wrapped
+in a probe that records how many calls overlapped and whether a query
+returned different documents under concurrency than it did when run alone.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from tabulate import tabulate
+
+from benchmarks import fakes
+from graph.consts import SAMPLE_QUESTIONS
+
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+
+
+@dataclass
+class RequestRecord:
+    submitted: float
+    started: float = 0.0
+    finished: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def latency(self) -> float:
+        return self.finished - self.submitted
+
+    @property
+    def queue_delay(self) -> float:
+        return self.started - self.submitted
+
+
+@dataclass
+class SafetyProbe:
+    """Tracks overlapping calls into a shared object and result consistency."""
+
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    active: int = 0
+    max_active: int = 0
+    entries: int = 0
+    calls: int = 0
+    errors: List[str] = field(default_factory=list)
+    mismatches: List[str] = field(default_factory=list)
+    expected: Dict[str, tuple] = field(default_factory=dict)
+
+    def enter(self) -> int:
+        with self.lock:
+            self.active += 1
+            self.entries += 1
+            self.calls += 1
+            self.max_active = max(self.max_active, self.active)
+            return self.entries if self.active == 1 else -1
+
+    def exit(self, key: str, entry: int, result: Optional[tuple], error=None):
+        with self.lock:
+            # Only calls that ran with no overlap define the expected result
+            solo = entry != -1 and self.entries == entry
+            self.active -= 1
+            if error is not None:
+                self.errors.append(f"{key!r}: {error!r}")
+                return
+            if key not in self.expected:
+                if solo:
+                    self.expected[key] = result
+            elif self.expected[key] != result:
+                self.mismatches.append(key)
+
+
+class ProbedRetriever(BaseRetriever):
+    inner: BaseRetriever
+    probe: SafetyProbe
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        entry = self.probe.enter()
+        try:
+            documents = self.inner.invoke(query)
+        except Exception as e:
+            self.probe.exit(query, entry, None, error=e)
+            raise
+        self.probe.exit(query, entry, tuple(d.page_content for d in documents))
+        return documents
+
+
+def question_mix(sample_weight: float) -> Callable[[random.Random], str]:
+    fixture_questions = [
+        item["question"]
+        for item in json.load(open(fakes.FIXTURES_DIR / "questions.json"))
+        if "script" not in item
+    ]
+
+    def pick(rng: random.Random) -> str:
+        if rng.random() < sample_weight:
+            return rng.choice(SAMPLE_QUESTIONS)
+        return rng.choice(fixture_questions)
+
+    return pick
+
+
+def graph_invoker(model_name: str, retriever: BaseRetriever) -> Callable[[str], Any]:
+    fakes.install_fakes(retriever)
+    from graph.service import answer_question
+
+    def invoke(question: str):
+        return answer_question(question, model_name)
+
+    return invoke
+
+
+def http_invoker(url: str, model_name: str) -> Callable[[str], Any]:
+    def invoke(question: str):
+        body = json.dumps({"question": question, "selected_model": model_name})
+        request = urllib.request.Request(
+            url, data=body.encode(), headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=120) as response:
+            return json.load(response)
+
+    return invoke
+
+
+def run_level(
+    invoke: Callable[[str], Any],
+    concurrency: int,
+    workers: int,
+    questions_per_session: int,
+    think_time: float,
+    pick: Callable[[random.Random], str],
+    seed: int,
+) -> List[RequestRecord]:
+    records: List[RequestRecord] = []
+    records_lock = threading.Lock()
+
+    def timed(question: str, record: RequestRecord) -> RequestRecord:
+        record.started = time.perf_counter()
+        try:
+            invoke(question)
+        except Exception as e:
+            record.error = f"{type(e).__name__}: {e}"
+        record.finished = time.perf_counter()
+        return record
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+
+        def session(index: int) -> None:
+            rng = random.Random(seed + index)
+            for _ in range(questions_per_session):
+                record = RequestRecord(submitted=time.perf_counter())
+                executor.submit(timed, pick(rng), record).result()
+                with records_lock:
+                    records.append(record)
+                if think_time:
+                    time.sleep(rng.expovariate(1 / think_time))
+
+        threads = [
+            threading.Thread(target=session, args=(i,), name=f"session-{i}")
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return records
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+
+def summarize(
+    concurrency: int, records: List[RequestRecord], elapsed: float, memory: tuple
+) -> Dict[str, Any]:
+    ok = [r for r in records if r.error is None]
+    latencies = [r.latency * 1000 for r in ok]
+    delays = [r.queue_delay * 1000 for r in records]
+    current, peak, growth = memory
+    return {
+        "concurrency": concurrency,
+        "requests": len(records),
+        "errors": len(records) - len(ok),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "latency_p50_ms": round(percentile(latencies, 0.50), 1),
+        "latency_p95_ms": round(percentile(latencies, 0.95), 1),
+        "latency_p99_ms": round(percentile(latencies, 0.99), 1),
+        "latency_mean_ms": round(statistics.fmean(latencies), 1) if latencies else 0,
+        "queue_p50_ms": round(percentile(delays, 0.50), 1),
+        "queue_p95_ms": round(percentile(delays, 0.95), 1),
+        "heap_mb": round(current / 2**20, 2),
+        "heap_peak_mb": round(peak / 2**20, 2),
+        "heap_growth_mb": round(growth / 2**20, 2),
+    }
+
+
+def coalesced_requests() -> int:
+    service = sys.modules.get("graph.service")
+    return service.coalescing_stats()["coalesced"] if service else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Requests served at once (default: one per session)",
+    )
+    parser.add_argument("--questions-per-session", type=int, default=5)
+    parser.add_argument("--think-time", type=float, default=0.0)
+    parser.add_argument("--sample-weight", type=float, default=0.6)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--url", default=None)
+    parser.add_argument(
+        "--retriever", choices=["chroma", "keyword"], default="chroma"
+    )
+    parser.add_argument("--latency", type=float, default=fakes.settings.latency_s)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print JSON report")
+    args = parser.parse_args(argv)
+
+    fakes.settings.latency_s = args.latency
+    probe = SafetyProbe()
+    if args.url:
+        invoke = http_invoker(args.url, args.model)
+    else:
+        if args.retriever == "chroma":
+            inner = fakes.build_chroma_fixture(tempfile.mkdtemp(prefix="rag-load-"))
+        else:
+            inner = fakes.FakeRetriever(documents=fakes.load_corpus())
+        invoke = graph_invoker(
+            args.model, ProbedRetriever(inner=inner, probe=probe)
+        )
+
+    pick = question_mix(args.sample_weight)
+    tracemalloc.start()
+    baseline_heap, _ = tracemalloc.get_traced_memory()
+    rows = []
+    for level in args.levels:
+        coalesced_before = coalesced_requests()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        records = run_level(
+            invoke,
+            level,
+            args.workers or level,
+            args.questions_per_session,
+            args.think_time,
+            pick,
+            args.seed,
+        )
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        memory = (current, peak, current - baseline_heap)
+        row = summarize(level, records, elapsed, memory)
+        if not args.url:
+            row["coalesced"] = coalesced_requests() - coalesced_before
+        rows.append(row)
+    tracemalloc.stop()
+
+    thread_safety = {
+        "retriever_calls": probe.calls,
+        "retriever_max_overlap": probe.max_active,
+        "retriever_errors": probe.errors[:10],
+        "retriever_mismatches": sorted(set(probe.mismatches)),
+    }
+    if args.json:
+        print(json.dumps({"levels": rows, "thread_safety": thread_safety}, indent=2))
+    else:
+        print(tabulate(rows, headers="keys"))
+        print(
+            f"\nRetriever: {probe.calls} calls, up to {probe.max_active} overlapping, "
+            f"{len(probe.errors)} errors, "
+            f"{len(thread_safety['retriever_mismatches'])} queries with "
+            "inconsistent results under concurrency"
+        )
+        for line in probe.errors[:10]:
+            print(f"❌ {line}")
+        for query in thread_safety["retriever_mismatches"]:
+            print(f"❌ Inconsistent results for {query!r}")
+
+    failed = probe.errors or probe.mismatches
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
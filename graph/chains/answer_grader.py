@@ -1,10 +1,12 @@
 import os
 
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnableSequence
+from langchain_core.runnables import Runnable
 from langchain_groq import ChatGroq
 from pydantic import BaseModel, Field
 
+from graph.tracing import traced_chain
+
 # from langchain_huggingface import HuggingFaceEndpoint
 
 # llm = HuggingFaceEndpoint(
@@ -24,8 +26,8 @@ class GradeAnswer(BaseModel):
     )
 
 
-def get_answer_grader(model_name: str) -> RunnableSequence:
-    llm = ChatGroq(groq_api_key=GROQ_KEY, model_name=model_name)
+def get_answer_grader(model_name: str) -> Runnable:
+    llm = ChatGroq(groq_api_key=GROQ_KEY, model_name=model_name, max_retries=0)
     structured_llm_grader = llm.with_structured_output(GradeAnswer)
 
     answer_prompt = ChatPromptTemplate.from_messages(
@@ -44,4 +46,6 @@ def get_answer_grader(model_name: str) -> RunnableSequence:
         ]
     )
 
-    return answer_prompt | structured_llm_grader
+    return traced_chain(
+        answer_prompt | structured_llm_grader, "answer_grader", model_name
+    )
@@ -5,6 +5,8 @@ from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_groq import ChatGroq
 
+from graph.tracing import traced_chain
+
 GROQ_KEY = os.getenv("GROQ_API_KEY")
 
 def get_generation_chain(model_name: str):
@@ -30,5 +32,7 @@ def get_generation_chain(model_name: str):
     Answer:
     """)
 
-    llm = ChatGroq(groq_api_key=GROQ_KEY, model_name=model_name,temperature=0.1)
-    return prompt | llm | StrOutputParser()
+    llm = ChatGroq(
+        groq_api_key=GROQ_KEY, model_name=model_name, temperature=0.1, max_retries=0
+    )
+    return traced_chain(prompt | llm | StrOutputParser(), "generation", model_name)
@@ -1,10 +1,12 @@
 import os
 
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnableSequence
+from langchain_core.runnables import Runnable
 from langchain_groq import ChatGroq
 from pydantic import BaseModel, Field
 
+from graph.tracing import traced_chain
+
 # from langchain_huggingface import HuggingFaceEndpoint
 
 # llm = HuggingFaceEndpoint(
@@ -25,8 +27,8 @@ class GradeHallucinations(BaseModel):
     )
 
 
-def get_hallucination_grader(model_name: str) -> RunnableSequence:
-    llm = ChatGroq(groq_api_key=GROQ_KEY, model_name=model_name)
+def get_hallucination_grader(model_name: str) -> Runnable:
+    llm = ChatGroq(groq_api_key=GROQ_KEY, model_name=model_name, max_retries=0)
     structured_llm_grader = llm.with_structured_output(GradeHallucinations)
 
     system_prompt = """
@@ -47,4 +49,6 @@ Never return text or explain your reasoning. Only call the function.
         ]
     )
 
-    return hallucination_prompt | structured_llm_grader
+    return traced_chain(
+        hallucination_prompt | structured_llm_grader, "hallucination_grader", model_name
+    )
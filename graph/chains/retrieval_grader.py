@@ -1,10 +1,12 @@
 import os
 
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnableSequence
+from langchain_core.runnables import Runnable
 from langchain_groq import ChatGroq
 from pydantic import BaseModel, Field
 
+from graph.tracing import traced_chain
+
 GROQ_KEY = os.getenv("GROQ_API_KEY")
 
 
@@ -16,8 +18,8 @@ class GradeDocuments(BaseModel):
     )
 
 
-def get_retrieval_grader(model_name: str) -> RunnableSequence:
-    llm = ChatGroq(groq_api_key=GROQ_KEY, model_name=model_name)
+def get_retrieval_grader(model_name: str) -> Runnable:
+    llm = ChatGroq(groq_api_key=GROQ_KEY, model_name=model_name, max_retries=0)
     structured_llm_grader = llm.with_structured_output(GradeDocuments)
 
     system = """You are a grader assessing relevance of a retrieved document to a user question. \n 
@@ -36,4 +38,6 @@ def get_retrieval_grader(model_name: str) -> RunnableSequence:
         ]
     )
 
-    return grade_prompt | structured_llm_grader
+    return traced_chain(
+        grade_prompt | structured_llm_grader, "retrieval_grader", model_name
+    )
@@ -6,6 +6,8 @@ from langchain_core.runnables import Runnable
 from langchain_groq import ChatGroq
 from pydantic import BaseModel, Field
 
+from graph.tracing import traced_chain
+
 GROQ_KEY = os.getenv("GROQ_API_KEY")
 
 
@@ -30,6 +32,8 @@ route_prompt = ChatPromptTemplate.from_messages(
 
 # ✅ Function that returns the runnable with correct model
 def get_question_router(model_name: str) -> Runnable:
-    llm = ChatGroq(groq_api_key=GROQ_KEY, model_name=model_name)
+    llm = ChatGroq(groq_api_key=GROQ_KEY, model_name=model_name, max_retries=0)
     structured_llm_router = llm.with_structured_output(RouteQuery)
-    return route_prompt | structured_llm_router
+    return traced_chain(
+        route_prompt | structured_llm_router, "question_router", model_name
+    )
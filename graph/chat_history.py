@@ -0,0 +1,194 @@
+"""
+Compact chat history for the Streamlit app.
+
+Turns keep their text and the ids of their sources. The (title, url)
+pairs are interned once per session and shared by every answer that
+cites them, and the references HTML is rendered on demand through a
+process-wide cache. The old format stored a rendered HTML blob per
+message.
+
+On a rerun only the newest `page_size` messages are drawn. Older ones
+are paged in with a "Show earlier messages" button. The history is
+capped by turns and by characters, and the oldest turns are dropped
+first.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+USER = "user"
+ASSISTANT = "assistant"
+
+# Per-session caps; a question and its answer are two turns
+MAX_TURNS = 400
+MAX_CHARS = 500_000
+# Messages drawn on a rerun, and added by each "Show earlier messages" click
+PAGE_SIZE = 20
+
+# st.session_state key holding how many pages are shown
+PAGES_KEY = "chat_history_pages"
+
+Source = Tuple[str, Optional[str]]
+
+
+@dataclass(slots=True)
+class ChatTurn:
+    role: str
+    text: str
+    source_ids: Tuple[int, ...] = ()
+    response_time: Optional[float] = None
+    # Generation time of a precomputed answer, as shown to the user
+    refreshed: Optional[str] = None
+
+
+class ChatHistory:
+    """
+    One session's messages, kept in `st.session_state.chat_history`.
+    Sources of dropped turns stay interned; the table is bounded by the
+    number of distinct pages in the index.
+    """
+
+    def __init__(
+        self,
+        max_turns: int = MAX_TURNS,
+        max_chars: int = MAX_CHARS,
+        page_size: int = PAGE_SIZE,
+    ):
+        self.max_turns = max_turns
+        self.max_chars = max_chars
+        self.page_size = page_size
+        self.turns: Deque[ChatTurn] = deque()
+        self.sources: List[Source] = []
+        self._source_ids: Dict[Source, int] = {}
+        self.chars = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def __getitem__(self, index: int) -> ChatTurn:
+        return self.turns[index]
+
+    def __iter__(self):
+        return iter(self.turns)
+
+    def add_user(self, text: str) -> ChatTurn:
+        return self._append(ChatTurn(USER, text))
+
+    def add_assistant(
+        self,
+        text: str,
+        sources: Iterable[dict] = (),
+        response_time: Optional[float] = None,
+        refreshed: Optional[str] = None,
+    ) -> ChatTurn:
+        """`sources` as returned by `graph.service.collect_sources`."""
+        source_ids = tuple(
+            self._intern((source["title"], source["url"])) for source in sources
+        )
+        return self._append(
+            ChatTurn(ASSISTANT, text, source_ids, response_time, refreshed)
+        )
+
+    def sources_of(self, turn: ChatTurn) -> Tuple[Source, ...]:
+        return tuple(self.sources[i] for i in turn.source_ids)
+
+    def visible(self, pages: int = 1, exclude_last: bool = False) -> List[ChatTurn]:
+        """The newest `pages * page_size` turns, oldest first."""
+        end = len(self.turns) - (1 if exclude_last and self.turns else 0)
+        start = max(0, end - pages * self.page_size)
+        return [self.turns[i] for i in range(start, end)]
+
+    def hidden(self, pages: int = 1, exclude_last: bool = False) -> int:
+        """Turns still in the history but older than the visible ones."""
+        end = len(self.turns) - (1 if exclude_last and self.turns else 0)
+        return max(0, end - pages * self.page_size)
+
+    def _intern(self, source: Source) -> int:
+        source_id = self._source_ids.get(source)
+        if source_id is None:
+            source_id = self._source_ids[source] = len(self.sources)
+            self.sources.append(source)
+        return source_id
+
+    def _append(self, turn: ChatTurn) -> ChatTurn:
+        self.turns.append(turn)
+        self.chars += len(turn.text)
+        # The newest turn is always kept, whatever its size
+        while len(self.turns) > 1 and (
+            len(self.turns) > self.max_turns or self.chars > self.max_chars
+        ):
+            self.chars -= len(self.turns.popleft().text)
+            self.dropped += 1
+        return turn
+
+
+@lru_cache(maxsize=1024)
+def sources_html(sources: Tuple[Source, ...]) -> str:
+    source_lines = []
+    for title, url in sources:
+        if url:
+            source_lines.append(f'<li><a href="{url}" target="_blank">{title}</a></li>')
+        else:
+            source_lines.append(f"<li>{title}</li>")
+    if not source_lines:
+        return ""
+    return f"""
+                    <div style="font-size: 0.85em; margin-top: 1em;">
+                        <strong>References:</strong>
+                        <ul style="margin-top: 0.3em; margin-bottom: 0;">
+                            {''.join(source_lines)}
+                        </ul>
+                    </div>
+                    """
+
+
+def render_sources_html(sources: Iterable[dict]) -> str:
+    """References block for `collect_sources` output."""
+    return sources_html(tuple((source["title"], source["url"]) for source in sources))
+
+
+def render_turn(history: ChatHistory, turn: ChatTurn) -> None:
+    """Draws the message body; call inside `st.chat_message(turn.role)`."""
+    import streamlit as st
+
+    if turn.role != ASSISTANT:
+        st.markdown(turn.text)
+        return
+    st.write(turn.text)
+    html = sources_html(history.sources_of(turn))
+    if html:
+        st.markdown(html, unsafe_allow_html=True)
+    if turn.refreshed:
+        st.caption(f"⚡ Precomputed answer · refreshed {turn.refreshed}")
+    if turn.response_time:
+        st.caption(f"🕒 Responded in {turn.response_time:.2f} seconds")
+
+
+def _show_earlier() -> None:
+    import streamlit as st
+
+    st.session_state[PAGES_KEY] = st.session_state.get(PAGES_KEY, 1) + 1
+
+
+def render_history(history: ChatHistory, exclude_last: bool = False) -> None:
+    """Draws the visible page of the history, with a button paging in older
+    messages and a note about messages dropped by the memory cap."""
+    import streamlit as st
+
+    pages = st.session_state.get(PAGES_KEY, 1)
+    if history.dropped:
+        st.caption(f"{history.dropped} older messages were cleared to save memory.")
+    hidden = history.hidden(pages, exclude_last)
+    if hidden:
+        # Runs before the rerun it triggers, so that rerun shows the new page
+        st.button(
+            f"Show earlier messages ({hidden} more)",
+            key="show_earlier_messages",
+            on_click=_show_earlier,
+        )
+    for turn in history.visible(pages, exclude_last):
+        with st.chat_message(turn.role):
+            render_turn(history, turn)
@@ -2,3 +2,64 @@ RETRIEVE = "retrieve"
 GRADE_DOCUMENTS = "grade_documents"
 GENERATE = "generate"
 WEBSEARCH = "websearch"
+CLASSIFY_INTENT = "classify_intent"
+GLOSSARY = "glossary"
+SMALL_TALK = "small_talk"
+EXPAND_ACRONYMS = "expand_acronyms"
+TABLE_LOOKUP = "table_lookup"
+
+# Sidebar sample questions in main.py; also the default load-test question mix
+SAMPLE_QUESTIONS = [
+    "What is the syllabus for DBMS course?",
+    "What is the full form of MLT in BS Degree Course?",
+    "How can I apply for the IITM BS Degree Program?",
+    "What are the courses offered in Diploma in Data Science?",
+    "Is there a scholarship option available for the BS Degree Course?",
+    "What are the eligibility criteria for the Data Science course?",
+]
+
+# Models offered in the sidebar
+MODEL_OPTIONS = [
+    "llama-3.1-8b-instant",
+    "llama-3.3-70b-versatile",
+    "llama3-8b-8192",
+    "gemma2-9b-it",
+    "mistral-saba-24b",
+    "meta-llama/llama-4-maverick-17b-128e-instruct",
+]
+
+GREETING_RESPONSE = (
+    "👋 Hello! I'm here to help you with any questions about the IIT Madras BS "
+    "Program. Ask me anything!"
+)
+IDENTITY_RESPONSE = (
+    "I’m an AI-powered assistant designed to help you know about the IIT Madras BS "
+    "Degree Program. You can ask me about courses, eligibility, admissions, "
+    "scholarships, and more!"
+)
+
+# Course acronyms: expanded in questions before retrieval, answered directly
+# for "full form" questions
+ACRONYM_MAP = {
+    "MLT": "Machine Learning Techniques",
+    "MLF": "Machine Learning Foundations",
+    "MLP": "Machine Learning Practice",
+    "BDM": "Business Data Management",
+    "PDSA": "Programming Data Structures and Algorithms using Python",
+    "BA": "Business Analytics",
+    "TDS": "Tools in Data Science",
+    "MAD": "Modern Application Development",
+    "AppDev": "Application Development",
+    "ST": "Software Testing",
+    "DSA": "Data Structures and Algorithms",
+    "AI": "Artificial Intelligence",
+    "DS": "Data Science",
+    "CV": "Computer Vision",
+    "NLP": "Natural Language Processing",
+    "LLM": "Large Language Models",
+    "MLOPS": "Machine Learning Operations",
+    "DBMS": "Database Management Systems",
+    "ADS": "Algorithms for Data Science",
+    "Gen AI": "Generative AI",
+    "SC": "System Commands",
+}
@@ -0,0 +1,147 @@
+import hashlib
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional, Union
+
+import tiktoken
+from langchain_core.documents import Document
+
+# Token budget for the packed {context}/{documents} block, per model
+CONTEXT_TOKEN_BUDGETS = {
+    "llama-3.1-8b-instant": 3000,
+    "llama-3.3-70b-versatile": 6000,
+    "llama3-8b-8192": 3000,
+    "gemma2-9b-it": 3000,
+    "mistral-saba-24b": 6000,
+    "meta-llama/llama-4-maverick-17b-128e-instruct": 6000,
+}
+DEFAULT_CONTEXT_TOKEN_BUDGET = 3000
+
+# A single document (e.g. a long web result) may use at most this share of the budget
+MAX_DOCUMENT_SHARE = 0.5
+# Near-duplicate threshold: share of the shorter chunk's shingles found in the other
+DUPLICATE_CONTAINMENT = 0.8
+# Don't bother appending a truncated document with less room than this
+MIN_TRUNCATED_TOKENS = 48
+
+
+@lru_cache(maxsize=None)
+def get_encoding() -> tiktoken.Encoding:
+    # Groq models have their own tokenizers; cl100k_base is a close enough estimate
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str) -> int:
+    return len(get_encoding().encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    tokens = get_encoding().encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return get_encoding().decode(tokens[:max_tokens]).rstrip()
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def _shingles(text: str, size: int = 5) -> set:
+    words = text.split()
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def _as_document(doc: Union[Document, str]) -> Document:
+    return doc if isinstance(doc, Document) else Document(page_content=str(doc))
+
+
+def dedupe_documents(
+    documents: Iterable[Union[Document, str]],
+    threshold: float = DUPLICATE_CONTAINMENT,
+) -> List[Document]:
+    """
+    Drops exact and overlapping duplicates, keeping the first (highest-ranked)
+    copy. Chunks retrieved from both collections or sharing an overlap window
+    are caught by shingle containment.
+    """
+    kept: List[Document] = []
+    kept_shingles: List[set] = []
+    seen_hashes = set()
+    for doc in map(_as_document, documents):
+        normalized = _normalize(doc.page_content)
+        if not normalized:
+            continue
+        digest = hashlib.sha1(normalized.encode()).hexdigest()
+        if digest in seen_hashes:
+            continue
+        shingles = _shingles(normalized)
+        if any(
+            len(shingles & other) / min(len(shingles), len(other)) >= threshold
+            for other in kept_shingles
+        ):
+            continue
+        seen_hashes.add(digest)
+        kept.append(doc)
+        kept_shingles.append(shingles)
+    return kept
+
+
+def order_by_relevance(documents: List[Document]) -> List[Document]:
+    """
+    Sorts by `relevance_score` metadata when present; documents without a score
+    keep their retrieval order and follow the scored ones.
+    """
+    indexed = list(enumerate(documents))
+    indexed.sort(
+        key=lambda item: (
+            -item[1].metadata.get("relevance_score", float("-inf")),
+            item[0],
+        )
+    )
+    return [doc for _, doc in indexed]
+
+
+def format_document(doc: Document) -> str:
+    title = doc.metadata.get("title")
+    url = doc.metadata.get("url") or doc.metadata.get("source")
+    header = " - ".join(part for part in (title, url) if part)
+    content = re.sub(r"\n\s*\n", "\n", doc.page_content.strip())
+    return f"Source: {header}\n{content}" if header else content
+
+
+def build_context(
+    documents: Iterable[Union[Document, str]],
+    model_name: str,
+    budget: Optional[int] = None,
+) -> str:
+    """
+    Formats documents compactly (source line + text, no metadata dicts),
+    removes duplicates, orders them by relevance and packs them into the
+    model's token budget, truncating the last one that only partly fits.
+    """
+    budget = budget or CONTEXT_TOKEN_BUDGETS.get(
+        model_name, DEFAULT_CONTEXT_TOKEN_BUDGET
+    )
+    max_document_tokens = int(budget * MAX_DOCUMENT_SHARE)
+    separator = "\n\n"
+    separator_tokens = count_tokens(separator)
+
+    blocks = []
+    remaining = budget
+    for doc in order_by_relevance(dedupe_documents(documents)):
+        block = format_document(doc)
+        tokens = count_tokens(block)
+        if tokens > max_document_tokens:
+            block = truncate_tokens(block, max_document_tokens)
+            tokens = count_tokens(block)
+        cost = tokens + (separator_tokens if blocks else 0)
+        if cost <= remaining:
+            blocks.append(block)
+            remaining -= cost
+            continue
+        if remaining - separator_tokens >= MIN_TRUNCATED_TOKENS:
+            blocks.append(truncate_tokens(block, remaining - separator_tokens))
+        break
+    return separator.join(blocks)
@@ -1,3 +1,4 @@
+import logging
 import re
 
 from dotenv import load_dotenv
@@ -5,16 +6,47 @@ from langgraph.graph import END, StateGraph
 
 from graph.chains.answer_grader import get_answer_grader
 from graph.chains.hallucination_grader import get_hallucination_grader
-from graph.chains.router import RouteQuery, get_question_router
-from graph.consts import GENERATE, GRADE_DOCUMENTS, RETRIEVE, WEBSEARCH
-from graph.nodes import generate, grade_documents, retrieve, web_search
+from graph.consts import (
+    ACRONYM_MAP,
+    CLASSIFY_INTENT,
+    EXPAND_ACRONYMS,
+    GENERATE,
+    GLOSSARY,
+    GRADE_DOCUMENTS,
+    RETRIEVE,
+    SMALL_TALK,
+    TABLE_LOOKUP,
+    WEBSEARCH,
+)
+from graph.context import build_context
+from graph.grounding import (
+    AMBIGUOUS,
+    GROUNDED,
+    get_grounding_checker,
+    local_grounding_enabled,
+)
+from graph.intent import GREETING, IDENTITY, OUT_OF_SCOPE, PROGRAM
+from graph.nodes import (
+    classify_intent,
+    generate,
+    glossary,
+    grade_documents,
+    retrieve,
+    small_talk,
+    table_lookup,
+    web_search,
+)
 from graph.state import GraphState
+from graph.tracing import configure_from_env, span, traced
 
 load_dotenv()
+configure_from_env()
+logger = logging.getLogger(__name__)
 
 
+@traced(EXPAND_ACRONYMS)
 def expand_acronyms(state: GraphState) -> GraphState:
-    print("---EXPANDING ACRONYMS---")
+    logger.debug("Expanding acronyms")
 
     question = state["question"]
     lowered_question = question.lower().strip()
@@ -32,66 +64,45 @@ def expand_acronyms(state: GraphState) -> GraphState:
 
     for pattern in full_form_patterns:
         if re.search(pattern, lowered_question):
-            print("---SKIPPED: Detected full form/abbreviation question---")
+            logger.info("Skipped expansion: detected full form/abbreviation question")
             return state  # Skip expansion
 
-    # 2. Acronym Expansion Dictionary
-    acronym_map = {
-        "MLT": "Machine Learning Techniques",
-        "MLF": "Machine Learning Foundations",
-        "MLP": "Machine Learning Practice",
-        "BDM": "Business Data Management",
-        "PDSA": "Programming Data Structures and Algorithms using Python",
-        "BA": "Business Analytics",
-        "TDS": "Tools in Data Science",
-        "MAD": "Modern Application Development",
-        "AppDev": "Application Development",
-        "ST": "Software Testing",
-        "DSA": "Data Structures and Algorithms",
-        "AI": "Artificial Intelligence",
-        "DS": "Data Science",
-        "CV": "Computer Vision",
-        "NLP": "Natural Language Processing",
-        "LLM": "Large Language Models",
-        "MLOPS": "Machine Learning Operations",
-        "DBMS": "Database Management Systems",
-        "ADS": "Algorithms for Data Science",
-        "Gen AI": "Generative AI",
-        "SC": "System Commands"
-    }
-
-    # 3. Expand Acronyms in Question
+    # 2. Expand Acronyms in Question
     words = question.split()
     expanded_words = []
 
     for word in words:
         upper_word = word.upper()
-        if upper_word in acronym_map:
-            expanded = acronym_map[upper_word]
-            print(f"Expanded {word} to {expanded}")
+        if upper_word in ACRONYM_MAP:
+            expanded = ACRONYM_MAP[upper_word]
+            logger.debug("Expanded %s to %s", word, expanded)
             expanded_words.append(expanded)
         else:
             expanded_words.append(word)
 
-    state["question"] = " ".join(expanded_words)
+    expanded_question = " ".join(expanded_words)
+    if expanded_question != question:
+        state["question"] = expanded_question
+        # The intent embedding no longer matches the question
+        state["question_embedding"] = None
     return state
 
 
+@traced("decide_to_generate", kind="edge")
 def decide_to_generate(state):
-    print("---ASSESS GRADED DOCUMENTS---")
+    logger.debug("Assessing graded documents")
 
     if state["web_search"]:
-        print(
-            "---DECISION: NOT ALL DOCUMENTS ARE NOT RELEVANT TO QUESTION, INCLUDE WEB SEARCH---"
-        )
+        logger.info("Decision: no relevant documents, include web search")
         return WEBSEARCH
     else:
-        print("---DECISION: GENERATE---")
+        logger.info("Decision: generate")
         return GENERATE
 
 
+@traced("grade_generation", kind="edge")
 def grade_generation_grounded_in_documents_and_question(state: GraphState) -> str:
-    print("---CHECK HALLUCINATIONS---")
+    logger.debug("Checking hallucinations")
 
     question = state["question"]
     documents = state["documents"]
@@ -102,85 +113,117 @@ def grade_generation_grounded_in_documents_and_question(state: GraphState) -> st
     hallucination_grader = get_hallucination_grader(model_name)
     answer_grader = get_answer_grader(model_name)
 
-    score = hallucination_grader.invoke(
-        {"documents": documents, "generation": generation}
-    )
+    # Local check first; the LLM grader only sees answers it cannot decide
+    grounding = None
+    if local_grounding_enabled():
+        with span("grounding_check", kind="grounding") as s:
+            grounding = get_grounding_checker().check(generation, documents)
+            s.tags["verdict"] = grounding.verdict
+        logger.info(
+            "Local grounding check: %s (p=%.2f)",
+            grounding.verdict,
+            grounding.probability,
+        )
+    if grounding is not None and grounding.verdict != AMBIGUOUS:
+        grounded = grounding.verdict == GROUNDED
+    else:
+        score = hallucination_grader.invoke(
+            {
+                "documents": build_context(documents, model_name),
+                "generation": generation,
+            }
+        )
+        grounded = score.binary_score
 
-    if score.binary_score:
-        print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
+    if grounded:
+        logger.info("Decision: generation is grounded in documents")
         score = answer_grader.invoke({"question": question, "generation": generation})
         if score.binary_score:
-            print("---DECISION: GENERATION ADDRESSES QUESTION---")
+            logger.info("Decision: generation addresses question")
             return "useful"
         else:
             if retry_count >= 1:
-                print("---DECISION: GENERATION NOT USEFUL AND MAX RETRIES REACHED---")
+                logger.info("Decision: generation not useful and max retries reached")
                 return "fallback"
             else:
-                print(
-                    "---DECISION: GENERATION NOT USEFUL. WILL RETRY WITH WEB SEARCH---"
+                logger.info(
+                    "Decision: generation not useful, will retry with web search"
                 )
                 return "not useful"
     else:
         if retry_count >= 1:
-            print("---DECISION: MAX RETRIES REACHED FOR HALLUCINATION---")
+            logger.info("Decision: max retries reached for hallucination")
             return "fallback"
         else:
-            print("---DECISION: GENERATION IS NOT GROUNDED. WILL RETRY---")
+            logger.info("Decision: generation is not grounded, will retry")
             return "not supported"
 
 
+@traced("route_question", kind="edge")
 def route_question(state: GraphState) -> str:
-    print("---ROUTE QUESTION---")
-
-    question = state["question"]
-    model_name = state.get("selected_model", "llama-3.1-8b-instant")  # Default fallback
-
-    # Dynamically create the router with the correct model
-    question_router = get_question_router(model_name)
+    intent = state.get("intent", PROGRAM)
+    logger.info("Route question by intent: %s", intent)
+
+    if intent in (GREETING, IDENTITY):
+        return SMALL_TALK
+    if intent == GLOSSARY:
+        return GLOSSARY
+    if intent == OUT_OF_SCOPE:
+        return WEBSEARCH
+    return EXPAND_ACRONYMS
 
-    # Invoke the routing LLM
-    source: RouteQuery = question_router.invoke({"question": question})
 
-    if source.datasource == WEBSEARCH:
-        print("---ROUTE QUESTION TO WEB SEARCH---")
-        return WEBSEARCH
-    elif source.datasource == "vectorstore":
-        print("---ROUTE QUESTION TO RAG---")
-        return RETRIEVE
-    else:
-        print("---UNKNOWN DATASOURCE. DEFAULTING TO VECTORSTORE---")
-        return RETRIEVE
+@traced("decide_after_glossary", kind="edge")
+def decide_after_glossary(state: GraphState) -> str:
+    if state.get("generation"):
+        logger.info("Decision: answered from acronym glossary")
+        return END
+    return EXPAND_ACRONYMS
 
 
+@traced("retry_handler")
 def handle_retry(state: GraphState) -> GraphState:
     retry_count = state.get("retry_count", 0)
     retry_count += 1
     state["retry_count"] = retry_count
-    print(f"Updated retry count to: {retry_count}")
+    logger.info("Updated retry count to: %d", retry_count)
     return state
 
 
 workflow = StateGraph(GraphState)
 
-workflow.add_node("expand_acronyms", expand_acronyms)
+workflow.add_node(CLASSIFY_INTENT, classify_intent)
+workflow.add_node(SMALL_TALK, small_talk)
+workflow.add_node(GLOSSARY, glossary)
+workflow.add_node(EXPAND_ACRONYMS, expand_acronyms)
 workflow.add_node(RETRIEVE, retrieve)
 workflow.add_node(GRADE_DOCUMENTS, grade_documents)
+workflow.add_node(TABLE_LOOKUP, table_lookup)
 workflow.add_node(GENERATE, generate)
 workflow.add_node(WEBSEARCH, web_search)
 
-# workflow.set_conditional_entry_point(
-#     route_question,
-#     {
-#         WEBSEARCH: WEBSEARCH,
-#         RETRIEVE: RETRIEVE,
-#     },
-# )
-workflow.set_entry_point("expand_acronyms")
-workflow.add_edge("expand_acronyms", RETRIEVE)
+workflow.set_entry_point(CLASSIFY_INTENT)
+workflow.add_conditional_edges(
+    CLASSIFY_INTENT,
+    route_question,
+    {
+        SMALL_TALK: SMALL_TALK,
+        GLOSSARY: GLOSSARY,
+        EXPAND_ACRONYMS: EXPAND_ACRONYMS,
+        WEBSEARCH: WEBSEARCH,
+    },
+)
+workflow.add_edge(SMALL_TALK, END)
+workflow.add_conditional_edges(
+    GLOSSARY,
+    decide_after_glossary,
+    {END: END, EXPAND_ACRONYMS: EXPAND_ACRONYMS},
+)
+workflow.add_edge(EXPAND_ACRONYMS, RETRIEVE)
 workflow.add_edge(RETRIEVE, GRADE_DOCUMENTS)
+workflow.add_edge(GRADE_DOCUMENTS, TABLE_LOOKUP)
 workflow.add_conditional_edges(
-    GRADE_DOCUMENTS,
+    TABLE_LOOKUP,
     decide_to_generate,
     {
         WEBSEARCH: WEBSEARCH,
@@ -204,4 +247,5 @@ workflow.add_edge(WEBSEARCH, GENERATE)
 
 app = workflow.compile()
 
-app.get_graph().draw_mermaid_png(output_file_path="graph.png")
+if __name__ == "__main__":
+    app.get_graph().draw_mermaid_png(output_file_path="graph.png")
@@ -0,0 +1,252 @@
+"""
+Local grounding check for generated answers, run before the LLM
+hallucination grader.
+
+The answer is split into sentences. Each sentence with a claim is scored
+against the context chunks. The score mixes the sentence's best MiniLM
+cosine similarity to any chunk with the share of its content words that
+appear in the context. A number missing from the context halves the
+sentence's support. The answer's support is the mean and the weakest
+sentence's support, averaged. A logistic calibration fitted on labelled
+answers (`python -m benchmarks.bench_grounding --save-calibration`) turns
+it into a probability of being grounded. Only answers inside the
+ambiguous band go to the LLM grader.
+
+The local check is off by default: the built-in calibration is a guess,
+not a fit. It turns on once `graph/grounding_calibration.json`, fitted on
+the MiniLM embeddings and labelled answers, is committed, or when
+GROUNDING_CHECK=local is set explicitly.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+GROUNDED = "grounded"
+UNGROUNDED = "ungrounded"
+AMBIGUOUS = "ambiguous"
+
+CALIBRATION_PATH = Path(__file__).with_name("grounding_calibration.json")
+
+# Weight of embedding similarity against lexical overlap in a sentence's support
+SIMILARITY_WEIGHT = 0.5
+# Support multiplier for a sentence quoting a number the context does not have
+MISSING_NUMBER_PENALTY = 0.5
+# Sentences with fewer content words make no checkable claim ("Sure!")
+MIN_CLAIM_TERMS = 3
+
+STOPWORDS = frozenset(
+    """a about above after all also an and any are as at be been being but by
+    can could did do does each for from had has have here how i if in into is
+    it its just may more most must no not of on once only or other our out
+    over own same shall should so some such than that the their them then
+    there these they this those through to too under until up very was we
+    were what when where which while who will with would you your""".split()
+)
+
+
+@dataclass
+class Calibration:
+    """p(grounded) = sigmoid(slope * (support - midpoint)); answers with
+    p between `low` and `high` are ambiguous."""
+
+    slope: float = 12.0
+    midpoint: float = 0.55
+    low: float = 0.2
+    high: float = 0.8
+
+    def probability(self, support: float) -> float:
+        return 1 / (1 + math.exp(-self.slope * (support - self.midpoint)))
+
+    def verdict(self, probability: float) -> str:
+        if probability >= self.high:
+            return GROUNDED
+        if probability <= self.low:
+            return UNGROUNDED
+        return AMBIGUOUS
+
+    def save(self, path: Path = CALIBRATION_PATH) -> None:
+        with open(path, "w") as f:
+            json.dump(self.__dict__, f, indent=2)
+
+    @classmethod
+    def load(cls, path: Path = CALIBRATION_PATH) -> Optional["Calibration"]:
+        """The fitted calibration, or None if none has been saved."""
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return cls(**json.load(f))
+
+
+# Fitted calibration, loaded once at import
+CALIBRATION = Calibration.load()
+# "local" checks locally and asks the LLM only when ambiguous, "llm" always
+# asks the LLM grader. Local is the default only with a fitted calibration.
+GROUNDING_CHECK = os.getenv("GROUNDING_CHECK", "local" if CALIBRATION else "llm")
+
+
+def fit_calibration(
+    supports: Sequence[float],
+    labels: Sequence[bool],
+    low: float = 0.2,
+    high: float = 0.8,
+    iterations: int = 2000,
+) -> Calibration:
+    """One-feature logistic regression (gradient descent on log loss)."""
+    x = np.asarray(supports, dtype=float)
+    y = np.asarray(labels, dtype=float)
+    weight, bias = 1.0, 0.0
+    for _ in range(iterations):
+        p = 1 / (1 + np.exp(-(weight * x + bias)))
+        weight -= 1.0 * float(np.mean((p - y) * x))
+        bias -= 1.0 * float(np.mean(p - y))
+    weight = max(weight, 1e-6)
+    return Calibration(slope=weight, midpoint=-bias / weight, low=low, high=high)
+
+
+@dataclass
+class SentenceSupport:
+    sentence: str
+    similarity: float
+    overlap: float
+    missing_numbers: List[str]
+    support: float
+
+
+@dataclass
+class GroundingResult:
+    verdict: str
+    probability: float
+    support: float
+    sentences: List[SentenceSupport] = field(default_factory=list)
+    elapsed_ms: float = 0.0
+
+
+def split_sentences(text: str) -> List[str]:
+    sentences = []
+    for line in text.splitlines():
+        # Markdown bullets, numbering and emphasis carry no content
+        line = re.sub(r"^\s*(?:[-*•]|\d+[.)])\s+", "", line).replace("**", "")
+        for sentence in re.split(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])", line):
+            sentence = sentence.strip()
+            if sentence:
+                sentences.append(sentence)
+    return sentences
+
+
+def content_terms(text: str) -> List[str]:
+    return [
+        term
+        for term in re.findall(r"[a-z0-9]+", text.lower())
+        if term not in STOPWORDS and len(term) > 1
+    ]
+
+
+def numbers_in(text: str) -> List[str]:
+    # "32,000" and "32000" are the same number
+    return [n.replace(",", "") for n in re.findall(r"\d[\d,]*(?:\.\d+)?", text)]
+
+
+def _unit(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def _text(doc: Union[Document, str]) -> str:
+    return doc.page_content if isinstance(doc, Document) else str(doc)
+
+
+class GroundingChecker:
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        calibration: Optional[Calibration] = None,
+        similarity_weight: float = SIMILARITY_WEIGHT,
+    ):
+        self.embeddings = embeddings
+        self.calibration = calibration or CALIBRATION or Calibration()
+        self.similarity_weight = similarity_weight
+
+    def support(
+        self, generation: str, documents: Iterable[Union[Document, str]]
+    ) -> List[SentenceSupport]:
+        chunks = [text for text in map(_text, documents) if text.strip()]
+        claims = [
+            sentence
+            for sentence in split_sentences(generation)
+            if len(content_terms(sentence)) >= MIN_CLAIM_TERMS
+        ]
+        if not claims or not chunks:
+            return [SentenceSupport(s, 0.0, 0.0, [], 0.0) for s in claims]
+
+        context = "\n".join(chunks)
+        context_terms = set(content_terms(context))
+        context_numbers = set(numbers_in(context))
+        vectors = np.asarray(self.embeddings.embed_documents(claims + chunks))
+        vectors = _unit(vectors.astype(np.float32))
+        similarity = (vectors[: len(claims)] @ vectors[len(claims) :].T).max(axis=1)
+
+        supports = []
+        for claim, best in zip(claims, similarity.tolist()):
+            terms = content_terms(claim)
+            overlap = sum(term in context_terms for term in terms) / len(terms)
+            missing = [n for n in numbers_in(claim) if n not in context_numbers]
+            score = self.similarity_weight * max(best, 0.0) + (
+                1 - self.similarity_weight
+            ) * overlap
+            if missing:
+                score *= MISSING_NUMBER_PENALTY
+            supports.append(SentenceSupport(claim, best, overlap, missing, score))
+        return supports
+
+    def check(
+        self, generation: str, documents: Iterable[Union[Document, str]]
+    ) -> GroundingResult:
+        start = time.perf_counter()
+        sentences = self.support(generation, documents)
+        if not sentences:
+            # No factual claim to contradict the context (e.g. "I don't know")
+            support, probability, verdict = 1.0, 1.0, GROUNDED
+        else:
+            scores = [s.support for s in sentences]
+            support = (sum(scores) / len(scores) + min(scores)) / 2
+            probability = self.calibration.probability(support)
+            verdict = self.calibration.verdict(probability)
+        return GroundingResult(
+            verdict=verdict,
+            probability=probability,
+            support=support,
+            sentences=sentences,
+            elapsed_ms=(time.perf_counter() - start) * 1000,
+        )
+
+
+def local_grounding_enabled() -> bool:
+    return GROUNDING_CHECK == "local"
+
+
+@lru_cache(maxsize=1)
+def get_grounding_checker() -> GroundingChecker:
+    """Shared checker on the retriever's MiniLM embeddings, built on first use."""
+    from ingestion import embeddings
+
+    if CALIBRATION is None:
+        logger.warning(
+            "GROUNDING_CHECK=local without %s; using the uncalibrated defaults",
+            CALIBRATION_PATH.name,
+        )
+
+    return GroundingChecker(embeddings)
@@ -0,0 +1,102 @@
+import json
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+GREETING = "greeting"
+IDENTITY = "identity"
+PROGRAM = "program"
+GLOSSARY = "glossary"
+OUT_OF_SCOPE = "out_of_scope"
+
+INTENT_EXAMPLES_PATH = Path(__file__).with_name("intent_examples.json")
+
+# Below this cosine similarity to every centroid the question is treated as
+# program-related: retrieval is the safe default, since the document grader
+# still falls back to web search
+MIN_SIMILARITY = 0.2
+# Conversational intents must clearly win, so "hi, what are the fees?" is
+# answered as a program question rather than greeted
+CONVERSATIONAL_MARGIN = 0.05
+
+
+def load_examples(path: Path = INTENT_EXAMPLES_PATH) -> Dict[str, List[str]]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def _unit(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+@dataclass
+class Intent:
+    intent: str
+    score: float
+    scores: Dict[str, float]
+    embedding: List[float]
+    elapsed_ms: float
+
+
+class IntentClassifier:
+    """
+    Nearest-centroid intent classifier over sentence embeddings. Centroids
+    are the normalized mean embedding of each intent's examples, so
+    classifying a question costs one query embedding and a dot product.
+    """
+
+    def __init__(self, embeddings: Embeddings, examples: Dict[str, List[str]]):
+        self.embeddings = embeddings
+        self.intents = list(examples)
+        centroids = []
+        for intent in self.intents:
+            vectors = np.asarray(embeddings.embed_documents(examples[intent]))
+            centroids.append(_unit(_unit(vectors).mean(axis=0)))
+        self.centroids = np.stack(centroids).astype(np.float32)
+
+    def classify_embedding(self, embedding: Sequence[float]) -> Dict[str, float]:
+        query = _unit(np.asarray(embedding, dtype=np.float32))
+        return dict(zip(self.intents, (self.centroids @ query).tolist()))
+
+    def decide(self, scores: Dict[str, float]) -> str:
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        best = ranked[0]
+        if scores[best] < MIN_SIMILARITY:
+            return PROGRAM
+        if best in (GREETING, IDENTITY) and len(ranked) > 1:
+            if scores[best] - scores[ranked[1]] < CONVERSATIONAL_MARGIN:
+                return ranked[1]
+        return best
+
+    def classify(
+        self, question: str, embedding: Optional[Sequence[float]] = None
+    ) -> Intent:
+        start = time.perf_counter()
+        if embedding is None:
+            embedding = self.embeddings.embed_query(question)
+        scores = self.classify_embedding(embedding)
+        return Intent(
+            intent=self.decide(scores),
+            score=max(scores.values()),
+            scores=scores,
+            embedding=list(embedding),
+            elapsed_ms=(time.perf_counter() - start) * 1000,
+        )
+
+
+@lru_cache(maxsize=1)
+def get_intent_classifier() -> IntentClassifier:
+    """Shared classifier on the retriever's MiniLM embeddings, built on first use."""
+    from ingestion import embeddings
+
+    return IntentClassifier(embeddings, load_examples())
+
+
+def classify_intent(question: str) -> Intent:
+    return get_intent_classifier().classify(question)
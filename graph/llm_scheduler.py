@@ -0,0 +1,353 @@
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first: the answer the user waits for beats optional grading
+PRIORITIES = {
+    "generation": 0,
+    "question_router": 1,
+    "hallucination_grader": 2,
+    "answer_grader": 2,
+    "retrieval_grader": 3,
+}
+DEFAULT_PRIORITY = 2
+
+# Output tokens reserved per call on top of the prompt estimate
+OUTPUT_TOKENS = {"generation": 512}
+DEFAULT_OUTPUT_TOKENS = 32
+
+
+@dataclass(frozen=True)
+class ModelLimits:
+    rpm: float
+    tpm: float
+
+
+# Groq free-tier limits for the sidebar models; override with LLM_RATE_LIMITS,
+# e.g. '{"llama-3.3-70b-versatile": {"rpm": 1000, "tpm": 300000}}'
+DEFAULT_LIMITS = {
+    "llama-3.1-8b-instant": ModelLimits(rpm=30, tpm=6000),
+    "llama-3.3-70b-versatile": ModelLimits(rpm=30, tpm=12000),
+    "llama3-8b-8192": ModelLimits(rpm=30, tpm=6000),
+    "gemma2-9b-it": ModelLimits(rpm=30, tpm=15000),
+    "mistral-saba-24b": ModelLimits(rpm=30, tpm=6000),
+    "meta-llama/llama-4-maverick-17b-128e-instruct": ModelLimits(rpm=30, tpm=6000),
+}
+MAX_RATE_LIMIT_RETRIES = 3
+# Server errors, timeouts and dropped connections are retried after this many
+# seconds, doubling per attempt (the chains turn off ChatGroq's own retries)
+TRANSIENT_BACKOFF_S = 0.5
+TRANSIENT_STATUS_CODES = {500, 502, 503, 504}
+
+
+def limits_from_env() -> Dict[str, ModelLimits]:
+    limits = dict(DEFAULT_LIMITS)
+    raw = os.getenv("LLM_RATE_LIMITS")
+    if raw:
+        for model, value in json.loads(raw).items():
+            limits[model] = ModelLimits(rpm=value["rpm"], tpm=value["tpm"])
+    return limits
+
+
+def estimate_tokens(inputs: Any, name: str) -> int:
+    """Prompt size from the chain inputs (~4 characters per token) plus the
+    output allowance for the chain."""
+    text = json.dumps(inputs, default=str) if not isinstance(inputs, str) else inputs
+    return len(text) // 4 + OUTPUT_TOKENS.get(name, DEFAULT_OUTPUT_TOKENS)
+
+
+class TokenBucket:
+    """
+    Holds up to `capacity` units, refilled continuously at `rate` per second.
+    A request larger than the bucket is admitted once the bucket is full and
+    charged in full: the level goes negative, and later requests wait for
+    the refill.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units may be taken (0 if they may now)."""
+        self._refill(now)
+        # A request larger than the bucket waits for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= amount
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    Seconds to back off if `error` is a rate-limit (HTTP 429) response, read
+    from `retry-after` or Groq's `x-ratelimit-reset-*` headers; None for any
+    other error.
+    """
+    if getattr(error, "status_code", None) != 429:
+        return None
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    if headers.get("retry-after"):
+        try:
+            return float(headers["retry-after"])
+        except ValueError:
+            pass
+    resets = [
+        _duration(headers[key])
+        for key in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+        if headers.get(key)
+    ]
+    return max(resets) if resets else 1.0
+
+
+def is_transient(error: BaseException) -> bool:
+    """True for errors worth retrying as is: 5xx responses, timeouts and
+    connection failures (groq.APIConnectionError / APITimeoutError included)."""
+    if getattr(error, "status_code", None) in TRANSIENT_STATUS_CODES:
+        return True
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    names = {cls.__name__ for cls in type(error).__mro__}
+    return bool(names & {"APIConnectionError", "APITimeoutError"})
+
+
+def _duration(value: str) -> float:
+    """Parses Groq reset durations such as '2m59.56s' or '7.66s'."""
+    units = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+    parts = re.findall(r"([\d.]+)(ms|h|m|s)", value)
+    return sum(float(number) * units[unit] for number, unit in parts)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    sequence: int
+    tokens: int = field(compare=False)
+
+
+@dataclass
+class SchedulerStats:
+    calls: int = 0
+    rate_limited: int = 0
+    transient_errors: int = 0
+    queue_wait_s: float = 0.0
+    max_queue_wait_s: float = 0.0
+
+
+class _ModelQueue:
+    def __init__(self, limits: ModelLimits):
+        self.requests = TokenBucket(limits.rpm / 60, max(1.0, limits.rpm / 60 * 10))
+        self.tokens = TokenBucket(limits.tpm / 60, limits.tpm / 6)
+        self.waiting: List[_Waiter] = []
+        self.blocked_until = 0.0
+        self.stats = SchedulerStats()
+
+
+class LLMScheduler:
+    """
+    Admits LLM calls per model under client-side request and token buckets.
+    Callers queue by priority (then arrival), and only the head of a model's
+    queue is admitted, so a waiting generation is never overtaken by grading.
+    A 429 blocks the whole model for its retry-after period and re-queues the
+    call at its original position. A server error, timeout or connection
+    failure is retried by the caller alone after an exponential backoff.
+    Models without limits are not queued, but their calls are retried the
+    same way.
+
+    Buckets start with ten seconds' worth of requests and ten seconds' worth
+    of tokens, so short bursts go through while the sustained rate stays
+    under the per-minute limits.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, ModelLimits]] = None,
+        max_retries: int = MAX_RATE_LIMIT_RETRIES,
+    ):
+        self.limits = dict(limits or {})
+        self.max_retries = max_retries
+        self._condition = threading.Condition()
+        self._queues: Dict[str, _ModelQueue] = {}
+        self._sequence = itertools.count()
+
+    def set_limits(self, limits: Dict[str, ModelLimits]) -> None:
+        with self._condition:
+            self.limits = dict(limits)
+            self._queues.clear()
+
+    def _queue(self, model: str) -> Optional[_ModelQueue]:
+        limits = self.limits.get(model)
+        if limits is None:
+            return None
+        queue = self._queues.get(model)
+        if queue is None:
+            queue = self._queues[model] = _ModelQueue(limits)
+        return queue
+
+    def _admit(self, model: str, waiter: _Waiter) -> float:
+        """Blocks until `waiter` may call `model`; returns seconds spent queued."""
+        start = time.monotonic()
+        with self._condition:
+            queue = self._queue(model)
+            if queue is None:
+                return 0.0
+            heapq.heappush(queue.waiting, waiter)
+            while True:
+                now = time.monotonic()
+                timeout = None
+                if queue.waiting[0] is waiter:
+                    timeout = max(
+                        queue.blocked_until - now,
+                        queue.requests.wait_time(1, now),
+                        queue.tokens.wait_time(waiter.tokens, now),
+                    )
+                    if timeout <= 0:
+                        heapq.heappop(queue.waiting)
+                        queue.requests.take(1, now)
+                        queue.tokens.take(waiter.tokens, now)
+                        waited = now - start
+                        queue.stats.calls += 1
+                        queue.stats.queue_wait_s += waited
+                        queue.stats.max_queue_wait_s = max(
+                            queue.stats.max_queue_wait_s, waited
+                        )
+                        # The next caller becomes the head
+                        self._condition.notify_all()
+                        return waited
+                self._condition.wait(timeout)
+
+    def _block(self, model: str, seconds: float) -> float:
+        """Holds back every call to `model`; returns how long the caller itself
+        should sleep (only for models the scheduler does not queue)."""
+        with self._condition:
+            queue = self._queue(model)
+            if queue is None:
+                return seconds
+            queue.stats.rate_limited += 1
+            queue.blocked_until = max(queue.blocked_until, time.monotonic() + seconds)
+            self._condition.notify_all()
+            return 0.0
+
+    def _backoff(self, model: str, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds the caller sleeps before retrying, or None to re-raise."""
+        if attempt == self.max_retries:
+            return None
+        backoff = retry_after(error)
+        if backoff is not None:
+            logger.warning(
+                "Rate limited by %s; retrying in %.1fs (attempt %d)",
+                model,
+                backoff,
+                attempt + 1,
+            )
+            return self._block(model, backoff)
+        if is_transient(error):
+            backoff = TRANSIENT_BACKOFF_S * 2**attempt
+            logger.warning(
+                "%s from %s; retrying in %.1fs (attempt %d)",
+                type(error).__name__,
+                model,
+                backoff,
+                attempt + 1,
+            )
+            with self._condition:
+                queue = self._queue(model)
+                if queue is not None:
+                    queue.stats.transient_errors += 1
+            return backoff
+        return None
+
+    def run(
+        self,
+        model: str,
+        fn: Callable[[], Any],
+        priority: int = DEFAULT_PRIORITY,
+        tokens: int = 0,
+        on_queued: Optional[Callable[[float], None]] = None,
+    ) -> Any:
+        """Runs `fn` once admitted. `on_queued` receives the total queue wait."""
+        waiter = _Waiter(priority, next(self._sequence), tokens)
+        queued = 0.0
+        try:
+            for attempt in range(self.max_retries + 1):
+                queued += self._admit(model, waiter)
+                try:
+                    return fn()
+                except Exception as e:
+                    sleep = self._backoff(model, e, attempt)
+                    if sleep is None:
+                        raise
+                    time.sleep(sleep)
+        finally:
+            if on_queued:
+                on_queued(queued)
+
+    async def arun(
+        self,
+        model: str,
+        afn: Callable[[], Any],
+        priority: int = DEFAULT_PRIORITY,
+        tokens: int = 0,
+        on_queued: Optional[Callable[[float], None]] = None,
+    ) -> Any:
+        """`run` for coroutines; waiting for admission happens off the event loop."""
+        waiter = _Waiter(priority, next(self._sequence), tokens)
+        queued = 0.0
+        try:
+            for attempt in range(self.max_retries + 1):
+                queued += await asyncio.to_thread(self._admit, model, waiter)
+                try:
+                    return await afn()
+                except Exception as e:
+                    sleep = self._backoff(model, e, attempt)
+                    if sleep is None:
+                        raise
+                    await asyncio.sleep(sleep)
+        finally:
+            if on_queued:
+                on_queued(queued)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._condition:
+            return {
+                model: {
+                    "calls": queue.stats.calls,
+                    "waiting": len(queue.waiting),
+                    "rate_limited": queue.stats.rate_limited,
+                    "transient_errors": queue.stats.transient_errors,
+                    "mean_queue_wait_ms": (
+                        queue.stats.queue_wait_s / queue.stats.calls * 1000
+                        if queue.stats.calls
+                        else 0.0
+                    ),
+                    "max_queue_wait_ms": queue.stats.max_queue_wait_s * 1000,
+                }
+                for model, queue in self._queues.items()
+            }
+
+
+# Shared by every chain built with `traced_chain`; LLM_SCHEDULER=0 disables it
+scheduler = LLMScheduler(
+    limits_from_env() if os.getenv("LLM_SCHEDULER", "1") != "0" else {}
+)
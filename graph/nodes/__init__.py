@@ -1,6 +1,19 @@
+from graph.nodes.classify_intent import classify_intent
 from graph.nodes.generate import generate
+from graph.nodes.glossary import glossary
 from graph.nodes.grade_documents import grade_documents
 from graph.nodes.retrieve import retrieve
+from graph.nodes.small_talk import small_talk
+from graph.nodes.table_lookup import table_lookup
 from graph.nodes.web_search import web_search
 
-__all__ = ["generate", "grade_documents", "retrieve", "web_search"]
+__all__ = [
+    "classify_intent",
+    "generate",
+    "glossary",
+    "grade_documents",
+    "retrieve",
+    "small_talk",
+    "table_lookup",
+    "web_search",
+]
@@ -0,0 +1,24 @@
+import logging
+from typing import Any, Dict
+
+from graph.consts import CLASSIFY_INTENT
+from graph.intent import get_intent_classifier
+from graph.state import GraphState
+from graph.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+@traced(CLASSIFY_INTENT)
+def classify_intent(state: GraphState) -> Dict[str, Any]:
+    if state.get("intent") is not None:
+        # Already classified by the caller (see graph.service.answer_question)
+        logger.info("Intent: %s (from caller)", state["intent"])
+        return {}
+    logger.debug("Classifying intent")
+    result = get_intent_classifier().classify(state["question"])
+    logger.info(
+        "Intent: %s (%.2f) in %.1f ms", result.intent, result.score, result.elapsed_ms
+    )
+    # Reused by retrieval unless acronym expansion rewrites the question
+    return {"intent": result.intent, "question_embedding": result.embedding}
@@ -1,17 +1,25 @@
+import logging
 from typing import Any, Dict
 
 from graph.chains.generation import get_generation_chain
+from graph.consts import GENERATE
+from graph.context import build_context
 from graph.state import GraphState
+from graph.tracing import traced
 
+logger = logging.getLogger(__name__)
 
+
+@traced(GENERATE)
 def generate(state: GraphState) -> Dict[str, Any]:
-    print("---GENERATE---")
+    logger.debug("Generating answer")
     question = state["question"]
     documents = state["documents"]
     model_name = state.get("selected_model", "llama-3.1-8b-instant")  # default fallback
 
     generation_chain = get_generation_chain(model_name)
-    generation = generation_chain.invoke({"context": documents, "question": question})
+    context = build_context(documents, model_name)
+    generation = generation_chain.invoke({"context": context, "question": question})
 
     return {
         "documents": documents,
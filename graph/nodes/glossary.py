@@ -0,0 +1,28 @@
+import logging
+import re
+from typing import Any, Dict
+
+from graph.consts import ACRONYM_MAP, GLOSSARY
+from graph.state import GraphState
+from graph.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+@traced(GLOSSARY)
+def glossary(state: GraphState) -> Dict[str, Any]:
+    logger.debug("Looking up acronyms")
+    question = state["question"]
+    found = [
+        (acronym, full_form)
+        for acronym, full_form in ACRONYM_MAP.items()
+        if re.search(rf"\b{re.escape(acronym)}\b", question, re.IGNORECASE)
+    ]
+    if not found:
+        logger.info("No known acronym in question, falling back to retrieval")
+        return {"generation": ""}
+
+    generation = "\n".join(
+        f"**{acronym}** stands for **{full_form}**." for acronym, full_form in found
+    )
+    return {"generation": generation, "documents": []}
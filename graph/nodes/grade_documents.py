@@ -1,10 +1,15 @@
 import asyncio
+import logging
 from typing import Any, Dict, List
 
 from langchain_core.documents import Document
 
 from graph.chains.retrieval_grader import get_retrieval_grader
+from graph.consts import GRADE_DOCUMENTS
 from graph.state import GraphState
+from graph.tracing import traced
+
+logger = logging.getLogger(__name__)
 
 
 async def grade_single_doc(
@@ -16,7 +21,7 @@ async def grade_single_doc(
         )
         return score.binary_score, document
     except Exception as e:
-        print(f"Grading failed for document: {e}")
+        logger.warning("Grading failed for document: %s", e)
         return False, document
 
 
@@ -28,24 +33,47 @@ async def async_grade_documents(
     return await asyncio.gather(*tasks)
 
 
+@traced(GRADE_DOCUMENTS)
 def grade_documents(state: GraphState) -> Dict[str, Any]:
     """
     Grades all retrieved documents in parallel to determine relevance to the question.
     Returns filtered documents and whether web search fallback is needed.
     """
-    print("---CHECK DOCUMENT RELEVANCE TO QUESTION---")
+    logger.debug("Checking document relevance to question")
     question = state["question"]
     documents = state["documents"]
     model_name = state.get("selected_model", "llama-3.1-8b-instant")
 
-    # Run async grading
-    results = asyncio.run(async_grade_documents(question, documents, model_name))
+    # Reuse grades the session working set already holds for similar questions
+    working_set = state.get("working_set")
+    question_embedding = state.get("question_embedding")
+    cached, to_grade = [], documents
+    if working_set is not None and question_embedding is not None:
+        cached, to_grade = [], []
+        for doc in documents:
+            grade = working_set.cached_grade(doc, question_embedding)
+            if grade is None:
+                to_grade.append(doc)
+            else:
+                cached.append((grade, doc))
+        logger.info("Reusing %d cached grades", len(cached))
 
-    # Filter relevant documents
-    filtered_docs = [doc for score, doc in results if score]
+    # Run async grading
+    results = []
+    if to_grade:
+        results = asyncio.run(async_grade_documents(question, to_grade, model_name))
+    if working_set is not None and question_embedding is not None:
+        for score, doc in results:
+            working_set.record_grade(doc, question_embedding, score)
+
+    # Filter relevant documents, keeping retrieval order
+    grades = {id(doc): score for score, doc in cached + list(results)}
+    filtered_docs = [doc for doc in documents if grades.get(id(doc))]
     web_search = len(filtered_docs) == 0
 
-    print(f"✓ {len(filtered_docs)} of {len(documents)} documents marked relevant")
+    logger.info(
+        "%d of %d documents marked relevant", len(filtered_docs), len(documents)
+    )
     return {"documents": filtered_docs, "question": question, "web_search": web_search}
 
 
@@ -1,12 +1,65 @@
-from typing import Any, Dict
+import logging
+from typing import Any, Dict, List
 
+from langchain_core.documents import Document
+
+from graph.consts import RETRIEVE
+from graph.retrieval_cache import retrieval_cache
 from graph.state import GraphState
-from ingestion import retriever
+from graph.tracing import span, traced
+from ingestion import embeddings, index_version, retriever
+
+logger = logging.getLogger(__name__)
+
+
+def search(question: str) -> List[Document]:
+    """Vector search, answered from the shared retrieval cache when the
+    question was already searched on the index being served."""
+    version = index_version()
+    with span("retrieval_cache", kind="retrieval") as s:
+        documents = retrieval_cache.get(question, version)
+        s.tags["outcome"] = "hit" if documents is not None else "miss"
+    if documents is None:
+        with span("vectorstore", kind="retrieval") as s:
+            documents = retriever.invoke(question)
+            s.tags["documents"] = len(documents)
+        retrieval_cache.put(question, version, documents)
+    return documents
 
 
+@traced(RETRIEVE)
 def retrieve(state: GraphState) -> Dict[str, Any]:
-    print("---RETRIEVE---")
+    logger.debug("Retrieving documents")
     question = state["question"]
+    working_set = state.get("working_set")
+
+    if working_set is None:
+        return {"documents": search(question), "question": question}
+
+    question_embedding = state.get("question_embedding")
+    if question_embedding is None:
+        with span("embed_query", kind="embedding"):
+            question_embedding = embeddings.embed_query(question)
+
+    with span("working_set", kind="retrieval") as s:
+        documents = working_set.covering_documents(question_embedding)
+        s.tags["outcome"] = "hit" if documents else "miss"
+
+    if documents:
+        logger.info("Retrieved %d chunks from session working set", len(documents))
+    else:
+        documents = search(question)
+        working_set.touch(documents)
+        new_documents = working_set.missing(documents)
+        if new_documents:
+            with span("embed_documents", kind="embedding"):
+                new_embeddings = embeddings.embed_documents(
+                    [doc.page_content for doc in new_documents]
+                )
+            working_set.add(new_documents, new_embeddings)
 
-    documents = retriever.invoke(question)
-    return {"documents": documents, "question": question}
+    return {
+        "documents": documents,
+        "question": question,
+        "question_embedding": question_embedding,
+    }
@@ -0,0 +1,17 @@
+import logging
+from typing import Any, Dict
+
+from graph.consts import GREETING_RESPONSE, IDENTITY_RESPONSE, SMALL_TALK
+from graph.intent import GREETING
+from graph.state import GraphState
+from graph.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+@traced(SMALL_TALK)
+def small_talk(state: GraphState) -> Dict[str, Any]:
+    logger.debug("Answering small talk")
+    if state.get("intent") == GREETING:
+        return {"generation": GREETING_RESPONSE, "documents": []}
+    return {"generation": IDENTITY_RESPONSE, "documents": []}
@@ -0,0 +1,45 @@
+import logging
+from typing import Any, Dict
+
+from graph.consts import TABLE_LOOKUP
+from graph.state import GraphState
+from graph.tracing import span, traced
+from ingestion import table_store
+
+logger = logging.getLogger(__name__)
+
+# Question terms the best matching row must cover to answer without web search
+MIN_ANSWER_COVERAGE = 0.6
+
+
+@traced(TABLE_LOOKUP)
+def table_lookup(state: GraphState) -> Dict[str, Any]:
+    """
+    Adds the table rows matching the question (fees, course lists, grading
+    schemes) ahead of the graded documents. Rows come straight from the
+    table store, so they need neither grading nor an LLM summary. A match
+    covering most of the question answers it without web search; a weaker
+    one leaves the grader's decision as it was.
+    """
+    documents = state["documents"]
+    store = table_store()
+    if store is None:
+        return {"documents": documents}
+
+    with span("table_store", kind="retrieval") as s:
+        matches = store.search(state["question"])
+        s.tags["rows"] = sum(len(match.rows) for match in matches)
+    if not matches:
+        return {"documents": documents}
+
+    coverage = max(match.coverage for match in matches)
+    logger.info(
+        "Found %d matching table(s), covering %.0f%% of the question",
+        len(matches),
+        coverage * 100,
+    )
+    rows = [match.to_document() for match in matches]
+    update = {"documents": rows + list(documents)}
+    if coverage >= MIN_ANSWER_COVERAGE:
+        update["web_search"] = False
+    return update
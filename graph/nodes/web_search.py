@@ -1,3 +1,4 @@
+import logging
 from typing import Any, Dict
 
 from ddgs import DDGS
@@ -5,9 +6,12 @@ from dotenv import load_dotenv
 from langchain.schema import Document
 from langchain_tavily import TavilySearch
 
+from graph.consts import WEBSEARCH
 from graph.state import GraphState
+from graph.tracing import span, traced
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 # web_search_tool = TavilySearch(max_results=3)
 
 
@@ -32,14 +36,16 @@ load_dotenv()
 #     return {"documents": combined_documents, "question": question}
 
 
+@traced(WEBSEARCH)
 def web_search(state: GraphState) -> Dict[str, Any]:
-    print("---DUCKDUCKGO SEARCH---")
+    logger.debug("Running DuckDuckGo search")
     question = state["question"]
     existing_documents = state.get("documents", []) or []
     new_documents = []
 
-    with DDGS() as ddgs:
+    with DDGS() as ddgs, span("ddgs", kind="web_search") as s:
         results = ddgs.text(question, max_results=3)
+        s.tags["documents"] = len(results)
         for result in results:
             content = result.get("body", "")
             url = result.get("href", "")
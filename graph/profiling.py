@@ -0,0 +1,198 @@
+"""
+Opt-in sampling profiler for single graph runs.
+
+`profile_request(name)` samples the Python stacks of the running request
+every `RAG_PROFILE_INTERVAL_MS` milliseconds of wall time. Time spent
+waiting on Groq, DuckDuckGo or Chroma therefore shows up as well as CPU
+time. The `traced` wrapper frames in a stack are relabelled with the node
+or edge they run, e.g. "node retrieve", so every sample is attributed to
+a graph node. On exit, the samples are written as a speedscope profile
+(https://www.speedscope.app) to `RAG_PROFILE_DIR`, one file per request.
+
+Profiling is enabled for every request by `RAG_PROFILE=1`, or for one
+request by `answer_question(..., profile=True)`. When it is off, the
+only cost is checking the flag.
+
+The thread that calls the graph is sampled, along with any thread that is
+running a graph node at that moment. Nodes of a concurrent request in
+the same process can therefore appear in the profile.
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from graph import tracing
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ALL = os.getenv("RAG_PROFILE", "0") == "1"
+PROFILE_DIR = os.getenv("RAG_PROFILE_DIR", "./.profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("RAG_PROFILE_INTERVAL_MS", "5"))
+
+# Samples outside any traced node, e.g. LangGraph's own scheduling
+OUTSIDE_NODES = "(graph)"
+
+_WRAPPER_CODE = tracing.traced("")(lambda state: None).__code__
+
+Frame = Tuple[str, str, int]
+
+
+def profiling_enabled(requested: bool = False) -> bool:
+    return requested or PROFILE_ALL
+
+
+class SamplingProfiler:
+    """Samples the stacks of the starting thread and of threads running a
+    graph node from a background thread."""
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self.frames: List[Frame] = []
+        self._frame_ids: Dict[Frame, int] = {}
+        # Per thread: stacks of frame ids (root first) and their durations (ms)
+        self.samples: Dict[int, List[List[int]]] = defaultdict(list)
+        self.weights: Dict[int, List[float]] = defaultdict(list)
+        self.thread_names: Dict[int, str] = {}
+        self.node_ms: Dict[str, float] = defaultdict(float)
+        self.elapsed_ms = 0.0
+        self._started = 0.0
+        # Set by `profile_request` once the file is written
+        self.path: Optional[str] = None
+        self._target: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._target = threading.get_ident()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="rag-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.elapsed_ms = (time.perf_counter() - self._started) * 1000
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            self._sample((now - last) * 1000)
+            last = now
+
+    def _frame_id(self, frame: Frame) -> int:
+        frame_id = self._frame_ids.get(frame)
+        if frame_id is None:
+            frame_id = self._frame_ids[frame] = len(self.frames)
+            self.frames.append(frame)
+        return frame_id
+
+    def _sample(self, weight_ms: float) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == threading.get_ident():
+                continue
+            stack, node = [], None
+            while frame is not None:
+                code = frame.f_code
+                if code is _WRAPPER_CODE:
+                    # Free variables of the `traced` closure
+                    local = frame.f_locals
+                    label = f"{local.get('kind')} {local.get('name')}"
+                    node = node or label
+                    stack.append((label, code.co_filename, code.co_firstlineno))
+                else:
+                    stack.append(
+                        (code.co_qualname, code.co_filename, code.co_firstlineno)
+                    )
+                frame = frame.f_back
+            if thread_id != self._target and node is None:
+                continue
+            self.samples[thread_id].append(
+                [self._frame_id(entry) for entry in reversed(stack)]
+            )
+            self.weights[thread_id].append(weight_ms)
+            self.thread_names.setdefault(thread_id, names.get(thread_id, "thread"))
+            self.node_ms[node or OUTSIDE_NODES] += weight_ms
+
+    def to_speedscope(self, name: str) -> dict:
+        profiles = []
+        for thread_id, samples in self.samples.items():
+            weights = self.weights[thread_id]
+            profiles.append(
+                {
+                    "type": "sampled",
+                    "name": f"{name} [{self.thread_names[thread_id]}]",
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            )
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "graph.profiling",
+            "activeProfileIndex": 0,
+            "shared": {
+                "frames": [
+                    {"name": frame, "file": file, "line": line}
+                    for frame, file, line in self.frames
+                ]
+            },
+            "profiles": profiles,
+        }
+
+    def save(self, directory: str, name: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")[:60] or "request"
+        now = time.time()
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now))
+        millis = int(now * 1000) % 1000
+        path = os.path.join(directory, f"{stamp}.{millis:03d}-{slug}.speedscope.json")
+        with open(path, "w") as f:
+            json.dump(self.to_speedscope(name), f)
+        return path
+
+    def node_summary(self) -> str:
+        ranked = sorted(self.node_ms.items(), key=lambda item: -item[1])
+        return ", ".join(f"{node} {ms:.0f} ms" for node, ms in ranked)
+
+
+@contextmanager
+def profile_request(
+    name: str,
+    directory: str = PROFILE_DIR,
+    interval_ms: float = PROFILE_INTERVAL_MS,
+):
+    """Profiles the enclosed block. The file is written even if the block
+    raises; its path is in the profiler's `path` attribute afterwards."""
+    profiler = SamplingProfiler(interval_ms)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        try:
+            profiler.path = profiler.save(directory, name)
+        except OSError as e:
+            logger.warning("Profile of %r not written: %s", name, e)
+        else:
+            logger.info(
+                "Profile of %r in %s (%.0f ms): %s",
+                name,
+                profiler.path,
+                profiler.elapsed_ms,
+                profiler.node_summary(),
+            )
@@ -0,0 +1,148 @@
+"""
+Process-wide cache of vector search results, shared by every model and
+session.
+
+The same question is often searched again, for example when it is asked
+with another model or in another session. The cache maps the normalized
+question (after acronym expansion) and the index version to the ranked
+ids of the chunks the search returned. The chunks are kept once in a
+document store shared by every entry and rehydrated from there, so a
+chunk returned for many questions is stored once. Both are LRU-bounded.
+When the index version changes, everything is dropped.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from graph.session import chunk_id
+
+# Cached searches (0 disables the cache) and chunks kept for rehydration
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "1024"))
+DOC_STORE_SIZE = int(os.getenv("RETRIEVAL_DOC_STORE_SIZE", "4096"))
+
+
+def normalize_query(question: str) -> str:
+    return re.sub(r"\s+", " ", question).strip().strip("?!. ").lower()
+
+
+class DocStore:
+    """Chunks by id, least recently used evicted first. Not thread-safe on
+    its own; `RetrievalCache` serializes access."""
+
+    def __init__(self, max_documents: int = DOC_STORE_SIZE):
+        self.max_documents = max_documents
+        self._documents: "OrderedDict[str, Document]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def put_many(self, documents: Iterable[Document]) -> Tuple[str, ...]:
+        ids = []
+        for doc in documents:
+            key = chunk_id(doc)
+            self._documents[key] = doc
+            self._documents.move_to_end(key)
+            ids.append(key)
+        while len(self._documents) > self.max_documents:
+            self._documents.popitem(last=False)
+        return tuple(ids)
+
+    def get_many(self, ids: Iterable[str]) -> Optional[List[Document]]:
+        """The chunks in order, or None if any has been evicted."""
+        documents = []
+        for key in ids:
+            doc = self._documents.get(key)
+            if doc is None:
+                return None
+            self._documents.move_to_end(key)
+            documents.append(doc)
+        return documents
+
+    def clear(self) -> None:
+        self._documents.clear()
+
+
+class RetrievalCache:
+    def __init__(
+        self,
+        max_entries: int = RETRIEVAL_CACHE_SIZE,
+        max_documents: int = DOC_STORE_SIZE,
+    ):
+        self.max_entries = max_entries
+        self.docs = DocStore(max_documents)
+        self.index_version: Optional[str] = None
+        self._entries: "OrderedDict[str, Tuple[str, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _use_version(self, index_version: str) -> None:
+        # Chunks and rankings of an older index are never served again
+        if index_version != self.index_version:
+            self._entries.clear()
+            self.docs.clear()
+            self.index_version = index_version
+
+    def get(self, question: str, index_version: str) -> Optional[List[Document]]:
+        """The cached search result as a new list (documents are shared and
+        must not be modified), or None."""
+        if not self.enabled:
+            return None
+        key = normalize_query(question)
+        with self._lock:
+            self._use_version(index_version)
+            ids = self._entries.get(key)
+            documents = self.docs.get_many(ids) if ids is not None else None
+            if documents is None:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return documents
+
+    def put(
+        self, question: str, index_version: str, documents: List[Document]
+    ) -> None:
+        if not self.enabled:
+            return
+        key = normalize_query(question)
+        with self._lock:
+            self._use_version(index_version)
+            self._entries[key] = self.docs.put_many(documents)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.docs.clear()
+            self.index_version = None
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "documents": len(self.docs),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "index_version": self.index_version,
+            }
+
+
+retrieval_cache = RetrievalCache()
@@ -0,0 +1,167 @@
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from graph.consts import MODEL_OPTIONS, SAMPLE_QUESTIONS
+from graph.graph import app
+from graph.intent import Intent
+from graph.profiling import profile_request, profiling_enabled
+from graph.singleflight import SingleFlight
+from graph.tracing import span
+from graph.warm_answers import QuestionLog, WarmAnswerRefresher, WarmAnswerStore
+from ingest.index_version import read_index_version
+
+logger = logging.getLogger(__name__)
+
+MAX_ITERATIONS = 2
+WARM_ANSWERS_PATH = "./.warm_answers.json"
+QUESTION_LOG_PATH = "./.question_log.json"
+# Logged questions warmed in addition to the sample questions
+WARM_ANSWER_TOP_N = int(os.getenv("WARM_ANSWER_TOP_N", "10"))
+# Comma-separated models to precompute answers for, e.g. "llama-3.1-8b-instant".
+# Off by default: every warm answer is a full graph run drawing on the same
+# per-model rate limits as live traffic, repeated after each index change
+WARM_ANSWER_MODELS = [
+    model
+    for model in map(str.strip, os.getenv("WARM_ANSWER_MODELS", "").split(","))
+    if model in MODEL_OPTIONS
+]
+
+# Shared by every session served by this process
+_flights = SingleFlight()
+
+
+def normalize_question(question: str) -> str:
+    return re.sub(r"\s+", " ", question).strip().strip("?!. ").lower()
+
+
+warm_store = WarmAnswerStore(WARM_ANSWERS_PATH, normalize_question)
+question_log = QuestionLog(QUESTION_LOG_PATH, normalize_question)
+
+
+def collect_sources(documents: List[Any]) -> List[Dict[str, Optional[str]]]:
+    """Unique web sources of the answer's documents, as {"title", "url"}."""
+    seen_urls = set()
+    sources = []
+    for doc in documents:
+        title = doc.metadata.get("title", doc.metadata.get("source", "Unknown"))
+        url = doc.metadata.get("url") or doc.metadata.get("source")
+        if url and url.startswith("http") and url not in seen_urls:
+            sources.append({"title": title, "url": url})
+            seen_urls.add(url)
+        elif not url:
+            sources.append({"title": title, "url": None})
+    return sources
+
+
+def answer_question(
+    question: str,
+    model_name: str,
+    working_set: Optional[Any] = None,
+    profile: bool = False,
+    intent: Optional[Intent] = None,
+) -> Dict[str, Any]:
+    question_log.record(question)
+    return _answer(question, model_name, working_set, profile, intent)
+
+
+def _answer(
+    question: str,
+    model_name: str,
+    working_set: Optional[Any] = None,
+    profile: bool = False,
+    intent: Optional[Intent] = None,
+) -> Dict[str, Any]:
+    """
+    Runs the graph for one question. Identical questions (after
+    normalization) asked with the same model while a run is in flight wait
+    for that run and share its result, so a burst of clicks on the same
+    sample question costs one set of LLM calls, whichever sessions ask it.
+    The run reads and updates the leader's working set; each coalesced
+    caller then merges the chunks and grades it used into its own. Recorded
+    as a `request` span whose outcome is `executed` or `coalesced`.
+
+    With `profile=True` or `RAG_PROFILE=1` the run is sampled and written
+    as a speedscope file (see `graph.profiling`), whose path is returned
+    under `profile`. A coalesced caller gets no profile of its own.
+
+    A caller that already classified the question passes the `intent`, so
+    the graph does not classify it again.
+    """
+    key = (normalize_question(question), model_name)
+    profile_path = None
+
+    def invoke():
+        state = {
+            "question": question,
+            "selected_model": model_name,
+            "working_set": working_set,
+        }
+        if intent is not None:
+            state["intent"] = intent.intent
+            state["question_embedding"] = intent.embedding
+        return app.invoke(state, config={"max_iterations": MAX_ITERATIONS})
+
+    def run():
+        nonlocal profile_path
+        started = time.monotonic()
+        if not profiling_enabled(profile):
+            return invoke(), working_set, started
+        with profile_request(f"{model_name} {question}") as profiler:
+            result = invoke()
+        profile_path = profiler.path
+        return result, working_set, started
+
+    with span("answer_question", kind="request", model=model_name) as request:
+        (result, leader_set, started), shared = _flights.do(key, run)
+        request.tags["outcome"] = "coalesced" if shared else "executed"
+    if shared:
+        logger.info("Coalesced with in-flight run: %r (%s)", question, model_name)
+        if None not in (working_set, leader_set) and leader_set is not working_set:
+            working_set.merge(leader_set, since=started)
+    # Callers get their own dict; documents inside are shared read-only
+    result = dict(result)
+    if profile_path:
+        result["profile"] = profile_path
+    return result
+
+
+def coalescing_stats() -> Dict[str, Any]:
+    return _flights.stats()
+
+
+# --- Warm Answers ---
+def warm_answer(question: str, model_name: str) -> Optional[dict]:
+    """
+    Precomputed answer for the current index, with `sources` and
+    `generated_at`. A hit counts towards the question's popularity.
+    """
+    entry = warm_store.get(question, model_name, read_index_version())
+    if entry is not None:
+        question_log.record(question)
+    return entry
+
+
+def _precompute(question: str, model_name: str) -> tuple:
+    result = _answer(question, model_name)
+    return result.get("generation", ""), collect_sources(result.get("documents", []))
+
+
+_refresher = WarmAnswerRefresher(
+    warm_store,
+    question_log,
+    answer=_precompute,
+    index_version=read_index_version,
+    models=WARM_ANSWER_MODELS,
+    sample_questions=SAMPLE_QUESTIONS,
+    top_n=WARM_ANSWER_TOP_N,
+)
+
+
+def start_warm_answers() -> None:
+    """Starts the background refresher once per process (idempotent), if
+    `WARM_ANSWER_MODELS` names any model."""
+    if WARM_ANSWER_MODELS:
+        _refresher.start()
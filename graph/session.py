@@ -0,0 +1,156 @@
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+def chunk_id(doc: Document) -> str:
+    """Stable id for a retrieved chunk: the Chroma id, else a content hash."""
+    if getattr(doc, "id", None):
+        return doc.id
+    source = doc.metadata.get("source", "")
+    return hashlib.sha1(f"{source}\n{doc.page_content}".encode()).hexdigest()
+
+
+def _unit(vector: Sequence[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
+
+
+@dataclass
+class WorkingSetEntry:
+    document: Document
+    embedding: np.ndarray
+    # (question embedding, relevant?) for each question this chunk was graded against
+    grades: List[Tuple[np.ndarray, bool]] = field(default_factory=list)
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class SessionWorkingSet:
+    """
+    Chunks recently retrieved in one chat session, with their embeddings and
+    relevance grades. Follow-up questions are answered from this set when it
+    covers the query, and chunks already graded for a similar question are not
+    sent to the grader again. Lives in `st.session_state` next to the chat
+    history and is passed to the graph as `working_set`.
+    """
+
+    def __init__(
+        self,
+        max_chunks: int = 50,
+        k: int = 5,
+        coverage_threshold: float = 0.55,
+        min_covering_chunks: int = 2,
+        grade_reuse_threshold: float = 0.85,
+        max_grades_per_chunk: int = 8,
+    ):
+        self.max_chunks = max_chunks
+        self.k = k
+        self.coverage_threshold = coverage_threshold
+        self.min_covering_chunks = min_covering_chunks
+        self.grade_reuse_threshold = grade_reuse_threshold
+        self.max_grades_per_chunk = max_grades_per_chunk
+        self.entries: Dict[str, WorkingSetEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(
+        self, documents: List[Document], embeddings: List[Sequence[float]]
+    ) -> None:
+        now = time.monotonic()
+        for doc, embedding in zip(documents, embeddings):
+            key = chunk_id(doc)
+            if key in self.entries:
+                self.entries[key].last_used = now
+            else:
+                entry = WorkingSetEntry(doc, _unit(embedding), last_used=now)
+                self.entries[key] = entry
+        self._evict()
+
+    def touch(self, documents: List[Document]) -> None:
+        now = time.monotonic()
+        for doc in documents:
+            entry = self.entries.get(chunk_id(doc))
+            if entry is not None:
+                entry.last_used = now
+
+    def merge(self, other: "SessionWorkingSet", since: float) -> None:
+        """
+        Copies the chunks `other` used since `since`, with their grades. For
+        a session whose question was answered by another session's run.
+        """
+        now = time.monotonic()
+        for key, entry in list(other.entries.items()):
+            if entry.last_used < since:
+                continue
+            own = self.entries.get(key)
+            if own is None:
+                own = self.entries[key] = WorkingSetEntry(
+                    entry.document, entry.embedding
+                )
+            known = {id(grade) for grade in own.grades}
+            own.grades.extend(g for g in entry.grades if id(g) not in known)
+            del own.grades[: -self.max_grades_per_chunk]
+            own.last_used = now
+        self._evict()
+
+    def missing(self, documents: List[Document]) -> List[Document]:
+        return [doc for doc in documents if chunk_id(doc) not in self.entries]
+
+    def _evict(self) -> None:
+        overflow = len(self.entries) - self.max_chunks
+        if overflow > 0:
+            oldest = sorted(self.entries.items(), key=lambda item: item[1].last_used)
+            for key, _ in oldest[:overflow]:
+                del self.entries[key]
+
+    def rank(self, query_embedding: Sequence[float]) -> List[Tuple[float, str]]:
+        if not self.entries:
+            return []
+        keys = list(self.entries)
+        matrix = np.stack([self.entries[key].embedding for key in keys])
+        scores = matrix @ _unit(query_embedding)
+        order = np.argsort(-scores)[: self.k]
+        return [(float(scores[i]), keys[i]) for i in order]
+
+    def covering_documents(
+        self, query_embedding: Sequence[float]
+    ) -> Optional[List[Document]]:
+        """
+        Re-ranks the set against the query. Returns the top chunks if enough
+        of them clear the coverage threshold, otherwise None (go to the store).
+        """
+        ranked = self.rank(query_embedding)
+        covering = [key for score, key in ranked if score >= self.coverage_threshold]
+        if len(covering) < self.min_covering_chunks:
+            return None
+        now = time.monotonic()
+        for key in covering:
+            self.entries[key].last_used = now
+        return [self.entries[key].document for key in covering]
+
+    def cached_grade(
+        self, doc: Document, question_embedding: Sequence[float]
+    ) -> Optional[bool]:
+        entry = self.entries.get(chunk_id(doc))
+        if entry is None or not entry.grades:
+            return None
+        query = _unit(question_embedding)
+        similarity, grade = max(
+            ((float(q @ query), g) for q, g in entry.grades), key=lambda x: x[0]
+        )
+        return grade if similarity >= self.grade_reuse_threshold else None
+
+    def record_grade(
+        self, doc: Document, question_embedding: Sequence[float], grade: bool
+    ) -> None:
+        entry = self.entries.get(chunk_id(doc))
+        if entry is None:
+            return
+        entry.grades.append((_unit(question_embedding), grade))
+        del entry.grades[: -self.max_grades_per_chunk]
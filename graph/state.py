@@ -1,4 +1,4 @@
-from typing import List, TypedDict
+from typing import Any, List, Optional, TypedDict
 
 
 class GraphState(TypedDict):
@@ -12,6 +12,9 @@ class GraphState(TypedDict):
         documents: list of documents
         retyr_count: number of retries
         selected_model: model selected by user
+        working_set: per-session SessionWorkingSet, if the caller keeps one
+        question_embedding: embedding of the (expanded) question
+        intent: local intent classification (graph.intent)
     """
 
     question: str
@@ -20,3 +23,6 @@ class GraphState(TypedDict):
     documents: List[str]
     retry_count: int
     selected_model: str
+    working_set: Optional[Any]
+    question_embedding: Optional[List[float]]
+    intent: Optional[str]
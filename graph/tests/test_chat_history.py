@@ -0,0 +1,39 @@
+from graph.chat_history import ASSISTANT, ChatHistory, render_sources_html, sources_html
+
+SOURCES = [
+    {"title": "Fees", "url": "https://study.iitm.ac.in/ds/fees.html"},
+    {"title": "Notes", "url": None},
+]
+
+
+def test_sources_are_interned_and_rendered_from_references():
+    history = ChatHistory()
+    history.add_user("What are the fees?")
+    first = history.add_assistant("Rs 32,000.", SOURCES, response_time=2.5)
+    second = history.add_assistant("See the fee page.", SOURCES[:1])
+
+    assert len(history.sources) == 2
+    assert second.source_ids == first.source_ids[:1]
+    assert history[1].role == ASSISTANT
+    html = sources_html(history.sources_of(first))
+    assert html == render_sources_html(SOURCES)
+    assert '<a href="https://study.iitm.ac.in/ds/fees.html"' in html
+    assert "<li>Notes</li>" in html
+
+
+def test_caps_drop_oldest_turns_and_pages_show_newest():
+    history = ChatHistory(max_turns=6, max_chars=1_000, page_size=2)
+    for i in range(5):
+        history.add_user(f"question {i}")
+        history.add_assistant(f"answer {i}")
+
+    assert len(history) == 6 and history.dropped == 4
+    assert [t.text for t in history.visible()] == ["question 4", "answer 4"]
+    assert [t.text for t in history.visible(exclude_last=True)] == [
+        "answer 3",
+        "question 4",
+    ]
+    assert history.hidden() == 4 and history.hidden(pages=3) == 0
+
+    history.add_user("x" * 2_000)
+    assert len(history) == 1 and history.chars == 2_000
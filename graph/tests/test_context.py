@@ -0,0 +1,40 @@
+from langchain_core.documents import Document
+
+from graph.context import build_context, count_tokens, dedupe_documents
+
+PARAGRAPH = (
+    "Students in the foundation level take eight courses and may move to the "
+    "diploma level after passing them."
+)
+
+
+def test_duplicates_are_dropped_and_scored_documents_go_first():
+    documents = [
+        Document(page_content=PARAGRAPH, metadata={"source": "a"}),
+        Document(page_content=PARAGRAPH.upper() + "  ", metadata={"source": "b"}),
+        # Shares an overlap window with the first chunk
+        Document(page_content=PARAGRAPH + " Fees are paid per course."),
+        Document(
+            page_content="The term fee is 3000 rupees per course.",
+            metadata={"source": "fees", "relevance_score": 0.9},
+        ),
+    ]
+
+    assert len(dedupe_documents(documents)) == 2
+    context = build_context(documents, "llama-3.1-8b-instant")
+    assert context.startswith("Source: fees\nThe term fee")
+    assert context.count("foundation level") == 1
+
+
+def test_context_fits_the_budget_and_caps_long_documents():
+    long_web_result = Document(page_content="word " * 2000, metadata={"url": "web"})
+    chunks = [
+        Document(page_content=f"Course {i} covers topic {i} " * 20) for i in range(20)
+    ]
+
+    context = build_context([long_web_result] + chunks, "unknown-model", budget=400)
+
+    assert count_tokens(context) <= 400
+    # The web result takes at most half the budget; retrieved chunks follow it
+    assert count_tokens(context.split("\n\n")[0]) <= 200
+    assert "Course 0 covers" in context
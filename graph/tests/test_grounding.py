@@ -0,0 +1,54 @@
+from benchmarks.fakes import HashingEmbedding
+from graph.grounding import (
+    GROUNDED,
+    UNGROUNDED,
+    Calibration,
+    GroundingChecker,
+    fit_calibration,
+    split_sentences,
+)
+
+FEES = (
+    "Fee structure: the foundation level costs Rs 32,000, each diploma costs "
+    "Rs 62,500 and the degree level courses are charged per credit."
+)
+SCHOLARSHIPS = (
+    "Scholarships: need-based fee waivers of 50% or 75% are available to "
+    "students based on annual family income."
+)
+
+
+def test_supported_answers_pass_and_invented_numbers_fail():
+    checker = GroundingChecker(HashingEmbedding())
+    documents = [FEES, SCHOLARSHIPS]
+
+    grounded = checker.check(
+        "The foundation level costs Rs 32000. Fee waivers of 50% or 75% are "
+        "available based on family income.",
+        documents,
+    )
+    wrong_fee = checker.check("The foundation level costs Rs 45,000.", documents)
+
+    assert grounded.verdict == GROUNDED
+    assert wrong_fee.verdict == UNGROUNDED
+    assert wrong_fee.sentences[0].missing_numbers == ["45000"]
+    # Nothing to check against the context
+    assert checker.check("I don't know.", documents).verdict == GROUNDED
+
+
+def test_sentences_and_calibration(tmp_path):
+    assert split_sentences("Courses:\n- **MLF** and MLT.\n1. BDM. Then BA!") == [
+        "Courses:",
+        "MLF and MLT.",
+        "BDM.",
+        "Then BA!",
+    ]
+    calibration = fit_calibration([0.1, 0.2, 0.3, 0.7, 0.8, 0.9], [0, 0, 0, 1, 1, 1])
+    assert 0.3 < calibration.midpoint < 0.7
+    assert calibration.probability(0.9) > 0.8 > 0.2 > calibration.probability(0.1)
+
+    # Only a saved fit counts as a calibration
+    path = tmp_path / "grounding_calibration.json"
+    assert Calibration.load(path) is None
+    calibration.save(path)
+    assert Calibration.load(path) == calibration
@@ -0,0 +1,226 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+import pytest
+from langchain_groq import ChatGroq
+
+from graph import llm_scheduler
+from graph.llm_scheduler import LLMScheduler, ModelLimits, TokenBucket, scheduler
+from graph.tracing import registry, traced_chain
+
+
+class RateLimitedGroq(ThreadingHTTPServer):
+    """OpenAI-compatible chat endpoint that allows `limit` requests per
+    `window` seconds and answers 429 with retry-after beyond that. The first
+    `failures` requests get a 503."""
+
+    daemon_threads = True
+
+    def __init__(self, limit: int, window: float, failures: int = 0):
+        self.limit, self.window = limit, window
+        self.lock = threading.Lock()
+        self.accepted, self.rejected = [], 0
+        self.failures, self.failed = failures, 0
+        super().__init__(("127.0.0.1", 0), self._handler())
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                now = time.monotonic()
+                with server.lock:
+                    unavailable = server.failed < server.failures
+                    recent = [t for t in server.accepted if now - t < server.window]
+                    allowed = len(recent) < server.limit
+                    if unavailable:
+                        server.failed += 1
+                    elif allowed:
+                        server.accepted.append(now)
+                    else:
+                        server.rejected += 1
+                if unavailable:
+                    status, headers = 503, {}
+                    payload = {"error": {"message": "Service unavailable"}}
+                elif allowed:
+                    status, headers = 200, {}
+                    payload = {
+                        "id": "chatcmpl-test",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body["model"],
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": "ok"},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                        "usage": {
+                            "prompt_tokens": 5,
+                            "completion_tokens": 1,
+                            "total_tokens": 6,
+                        },
+                    }
+                else:
+                    status = 429
+                    headers = {"retry-after": str(server.window)}
+                    payload = {"error": {"message": "Rate limit reached"}}
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def test_chains_honour_retry_after_from_rate_limited_endpoint():
+    server = RateLimitedGroq(limit=2, window=0.3)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    llm = ChatGroq(
+        groq_api_key="test",
+        groq_api_base=f"http://127.0.0.1:{server.server_address[1]}",
+        model_name="fake-rate-limited",
+        max_retries=0,
+    )
+    prompt = PromptTemplate.from_template("{question}")
+    chain = traced_chain(
+        prompt | llm | StrOutputParser(), "generation", "fake-rate-limited"
+    )
+    previous = scheduler.limits
+    # Client-side limits looser than the server's, so the 429 path is exercised
+    scheduler.set_limits({"fake-rate-limited": ModelLimits(rpm=6000, tpm=10**6)})
+    try:
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            answers = list(pool.map(chain.invoke, [{"question": "q"}] * 6))
+        stats = scheduler.stats()["fake-rate-limited"]
+    finally:
+        scheduler.set_limits(previous)
+        server.shutdown()
+
+    assert answers == ["ok"] * 6
+    assert server.rejected > 0
+    assert stats["rate_limited"] == server.rejected
+    queued = [
+        m
+        for m in registry.snapshot()["metrics"]
+        if m["kind"] == "llm_queue" and m["model"] == "fake-rate-limited"
+    ]
+    assert queued[0]["count"] == 6
+    assert queued[0]["p99_ms"] > 0
+
+
+def test_generation_is_admitted_before_queued_grading():
+    limited = LLMScheduler({"m": ModelLimits(rpm=600, tpm=10**6)})
+    limited._block("m", 0.2)
+    order = []
+
+    def call(name, priority):
+        limited.run("m", lambda: order.append(name), priority=priority)
+
+    graders = [threading.Thread(target=call, args=("grader", 3)) for _ in range(3)]
+    for thread in graders:
+        thread.start()
+    time.sleep(0.05)
+    generation = threading.Thread(target=call, args=("generation", 0))
+    generation.start()
+    for thread in [*graders, generation]:
+        thread.join(timeout=5)
+
+    assert order[0] == "generation"
+    assert limited.stats()["m"]["calls"] == 4
+
+
+def test_calls_larger_than_the_bucket_are_charged_in_full():
+    # llama-3.1-8b-instant: 6000 TPM, a bucket of ten seconds' worth
+    bucket = TokenBucket(rate=6000 / 60, capacity=1000)
+    bucket.updated = now = 0.0
+    admitted = 0
+    while True:
+        now += bucket.wait_time(3500, now)
+        if now >= 600:
+            break
+        bucket.take(3500, now)
+        admitted += 3500
+
+    # Ten minutes at the limit, plus the initial bucket and the last call
+    assert 6000 * 10 <= admitted <= 6000 * 10 + 1000 + 3500
+
+
+def test_server_errors_are_retried_with_backoff(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "TRANSIENT_BACKOFF_S", 0.01)
+    server = RateLimitedGroq(limit=100, window=1, failures=2)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    llm = ChatGroq(
+        groq_api_key="test",
+        groq_api_base=f"http://127.0.0.1:{server.server_address[1]}",
+        model_name="fake-flaky",
+        max_retries=0,
+    )
+    chain = traced_chain(
+        PromptTemplate.from_template("{question}") | llm | StrOutputParser(),
+        "generation",
+        "fake-flaky",
+    )
+    previous = scheduler.limits
+    scheduler.set_limits({"fake-flaky": ModelLimits(rpm=6000, tpm=10**6)})
+    try:
+        answer = chain.invoke({"question": "q"})
+        stats = scheduler.stats()["fake-flaky"]
+    finally:
+        scheduler.set_limits(previous)
+        server.shutdown()
+
+    assert answer == "ok"
+    assert server.failed == 2
+    assert stats["transient_errors"] == 2 and stats["rate_limited"] == 0
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def test_only_transient_errors_are_retried(monkeypatch):
+    monkeypatch.setattr(llm_scheduler, "TRANSIENT_BACKOFF_S", 0.001)
+    # An unqueued model: retries apply without rate limits too
+    unlimited = LLMScheduler({}, max_retries=2)
+
+    def failing(*errors):
+        attempts = []
+
+        def fn():
+            attempts.append(1)
+            if len(attempts) <= len(errors):
+                raise errors[len(attempts) - 1]
+            return "ok"
+
+        return fn, attempts
+
+    fn, attempts = failing(ConnectionResetError(), HTTPError(502))
+    assert unlimited.run("m", fn) == "ok" and len(attempts) == 3
+
+    for error in (HTTPError(400), ValueError("bad output")):
+        fn, attempts = failing(error)
+        with pytest.raises(type(error)):
+            unlimited.run("m", fn)
+        assert len(attempts) == 1
+
+    fn, attempts = failing(*[TimeoutError()] * 3)
+    with pytest.raises(TimeoutError):
+        unlimited.run("m", fn)
+    assert len(attempts) == 3
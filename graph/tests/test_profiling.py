@@ -0,0 +1,29 @@
+import json
+import time
+
+from graph.profiling import profile_request
+from graph.tracing import traced
+
+
+@traced("slow_node")
+def slow_node(state):
+    time.sleep(0.05)
+    return state
+
+
+def test_samples_are_attributed_to_nodes_and_saved_for_speedscope(tmp_path):
+    directory = str(tmp_path)
+    with profile_request("What is the fee?", directory, interval_ms=1) as p:
+        slow_node({"selected_model": "m"})
+        time.sleep(0.02)
+
+    assert p.node_ms["node slow_node"] >= 30
+    assert p.node_ms["(graph)"] > 0
+    assert p.path.endswith("-what-is-the-fee.speedscope.json")
+    with open(p.path) as f:
+        profile = json.load(f)
+    frames = [frame["name"] for frame in profile["shared"]["frames"]]
+    assert "node slow_node" in frames and "slow_node" in frames
+    sampled = profile["profiles"][0]
+    assert sampled["type"] == "sampled"
+    assert len(sampled["samples"]) == len(sampled["weights"])
@@ -0,0 +1,37 @@
+from langchain_core.documents import Document
+
+from graph.retrieval_cache import RetrievalCache
+
+
+def docs(*names):
+    return [Document(page_content=name, metadata={"source": name}) for name in names]
+
+
+def test_hits_share_chunks_and_ignore_spelling():
+    cache = RetrievalCache(max_entries=8, max_documents=8)
+    cache.put("What is the fee?", "v1", docs("fees", "levels"))
+    cache.put("What are the levels", "v1", docs("levels", "courses"))
+
+    hit = cache.get("  what is the FEE", "v1")
+    assert [d.page_content for d in hit] == ["fees", "levels"]
+    assert len(cache.docs) == 3
+    assert cache.get("What is the fee?", "v1") is not hit
+    assert cache.stats()["hits"] == 2
+
+
+def test_index_version_change_and_eviction_invalidate():
+    cache = RetrievalCache(max_entries=2, max_documents=2)
+    cache.put("q1", "v1", docs("a"))
+    cache.put("q2", "v1", docs("b"))
+    cache.put("q3", "v1", docs("c", "d"))
+    assert cache.get("q1", "v1") is None  # evicted entry
+    # Chunk "b" was evicted from the doc store, so its entry cannot be rehydrated
+    assert cache.get("q2", "v1") is None
+    assert [d.page_content for d in cache.get("q3", "v1")] == ["c", "d"]
+
+    assert cache.get("q3", "v2") is None
+    assert len(cache) == 0 and len(cache.docs) == 0
+
+    disabled = RetrievalCache(max_entries=0)
+    disabled.put("q1", "v1", docs("a"))
+    assert disabled.get("q1", "v1") is None
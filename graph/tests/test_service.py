@@ -0,0 +1,47 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.documents import Document
+
+from benchmarks import fakes
+from graph.session import SessionWorkingSet
+from graph.singleflight import SingleFlight
+
+FEES = Document(page_content="The foundation fee is 32000.", metadata={"source": "a"})
+
+
+def test_sessions_asking_the_same_question_share_one_graph_run(monkeypatch):
+    # Offline stand-ins for the embeddings, retriever and Groq, as in benchmarks
+    fakes.install_fakes()
+    from graph import service
+
+    release = threading.Event()
+    runs = []
+
+    class Graph:
+        def invoke(self, state, config):
+            runs.append(state["question"])
+            state["working_set"].add([FEES], [[1.0, 0.0]])
+            release.wait(5)
+            return {"generation": "32000 rupees", "documents": [FEES]}
+
+    flights = SingleFlight()
+    monkeypatch.setattr(service, "app", Graph())
+    monkeypatch.setattr(service, "_flights", flights)
+    sessions = [SessionWorkingSet(), SessionWorkingSet()]
+    questions = ["What is the foundation fee?", "what is the  foundation fee"]
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(service._answer, questions[0], "m", sessions[0])
+        while flights.in_flight() < 1:
+            threading.Event().wait(0.01)
+        follower = pool.submit(service._answer, questions[1], "m", sessions[1])
+        while flights.stats()["coalesced"] < 1:
+            threading.Event().wait(0.01)
+        release.set()
+        results = [leader.result(), follower.result()]
+
+    assert runs == [questions[0]]
+    assert results[0] == results[1] and results[0] is not results[1]
+    # The follower's session can answer a follow-up from the shared chunks
+    assert [len(working_set) for working_set in sessions] == [1, 1]
@@ -0,0 +1,87 @@
+import itertools
+
+from langchain_core.documents import Document
+
+from graph import session
+from graph.session import SessionWorkingSet, chunk_id
+
+
+def doc(name):
+    return Document(page_content=f"{name} chunk", metadata={"source": name})
+
+
+FEES, FEE_TABLE, LEVELS = doc("fees"), doc("fee-table"), doc("levels")
+
+
+def test_covering_documents_needs_enough_chunks_above_the_threshold():
+    working_set = SessionWorkingSet(coverage_threshold=0.55, min_covering_chunks=2)
+    working_set.add(
+        [FEES, FEE_TABLE, LEVELS], [[1, 0, 0], [0.9, 0.2, 0], [0, 1, 0]]
+    )
+
+    covering = working_set.covering_documents([1, 0, 0])
+    assert covering == [FEES, FEE_TABLE]
+    # Only one chunk is close to this query: go to the store
+    assert working_set.covering_documents([0, 1, 0.1]) is None
+    # Below the threshold for every chunk
+    assert working_set.covering_documents([0, 0, 1]) is None
+
+    single = SessionWorkingSet(coverage_threshold=0.55, min_covering_chunks=1)
+    single.add([LEVELS], [[0, 1, 0]])
+    assert single.covering_documents([0, 1, 0.1]) == [LEVELS]
+    assert working_set.missing([FEES, doc("new")]) == [doc("new")]
+
+
+def test_grades_are_reused_only_for_similar_questions():
+    working_set = SessionWorkingSet(grade_reuse_threshold=0.85, max_grades_per_chunk=2)
+    working_set.add([FEES], [[1, 0, 0]])
+
+    working_set.record_grade(FEES, [1, 0, 0], True)
+    assert working_set.cached_grade(FEES, [0.95, 0.1, 0]) is True
+    assert working_set.cached_grade(FEES, [0, 1, 0]) is None
+    # Not in the set: never graded from here
+    assert working_set.cached_grade(LEVELS, [1, 0, 0]) is None
+    working_set.record_grade(LEVELS, [1, 0, 0], True)
+    assert working_set.cached_grade(LEVELS, [1, 0, 0]) is None
+
+    working_set.record_grade(FEES, [0, 1, 0], False)
+    working_set.record_grade(FEES, [0, 0, 1], False)
+    # Only the latest grades are kept
+    assert len(working_set.entries[chunk_id(FEES)].grades) == 2
+    assert working_set.cached_grade(FEES, [1, 0, 0]) is None
+
+
+def test_least_recently_used_chunks_are_evicted(monkeypatch):
+    clock = itertools.count()
+    monkeypatch.setattr(session.time, "monotonic", lambda: next(clock))
+    working_set = SessionWorkingSet(max_chunks=2, min_covering_chunks=1)
+    working_set.add([FEES], [[1, 0, 0]])
+    working_set.add([LEVELS], [[0, 1, 0]])
+    # Covering a query counts as a use
+    assert working_set.covering_documents([1, 0, 0]) == [FEES]
+
+    working_set.add([FEE_TABLE], [[0, 0, 1]])
+
+    assert len(working_set) == 2
+    assert working_set.missing([FEES, LEVELS, FEE_TABLE]) == [LEVELS]
+
+
+def test_merge_copies_only_the_chunks_used_since_the_shared_run(monkeypatch):
+    clock = itertools.count()
+    monkeypatch.setattr(session.time, "monotonic", lambda: next(clock))
+    leader = SessionWorkingSet()
+    # Retrieved for earlier questions of the leader's session
+    leader.add([LEVELS, FEE_TABLE], [[0, 1, 0], [0, 0, 1]])
+    started = session.time.monotonic()
+    # The shared run retrieves one new chunk and one already in the set
+    leader.add([FEES], [[1, 0, 0]])
+    leader.touch([LEVELS])
+    leader.record_grade(FEES, [1, 0, 0], True)
+
+    follower = SessionWorkingSet()
+    follower.merge(leader, since=started)
+    follower.merge(leader, since=started)
+
+    assert follower.missing([FEES, LEVELS, FEE_TABLE]) == [FEE_TABLE]
+    assert follower.cached_grade(FEES, [1, 0, 0]) is True
+    assert len(follower.entries[chunk_id(FEES)].grades) == 1
@@ -0,0 +1,66 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from graph.singleflight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def run(key):
+        def fn():
+            calls.append(key)
+            release.wait(5)
+            return {"answer": key}
+
+        return flights.do(key, fn)
+
+    keys = [("q", "model-a")] * 8 + [("q", "model-b")] * 2
+    with ThreadPoolExecutor(max_workers=len(keys)) as pool:
+        futures = [pool.submit(run, key) for key in keys]
+        while flights.stats()["coalesced"] < 8:  # 7 + 1 followers waiting
+            threading.Event().wait(0.01)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert sorted(calls) == [("q", "model-a"), ("q", "model-b")]
+    assert all(result == {"answer": key} for (result, _), key in zip(results, keys))
+    assert sum(shared for _, shared in results) == 8
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_followers_receive_the_leaders_error_and_nothing_is_cached():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("rate limited")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flights.do, "k", failing)
+        started.wait(5)
+        follower = pool.submit(flights.do, "k", lambda: "unused")
+        while flights.stats()["coalesced"] < 1:
+            threading.Event().wait(0.01)
+        release.set()
+        errors = []
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError, match="rate limited") as raised:
+                future.result()
+            errors.append(raised.value)
+
+    # The follower re-raises the leader's exception, not a copy
+    assert errors[0] is errors[1]
+    assert flights.stats() == {
+        "executions": 1,
+        "coalesced": 1,
+        "coalesced_ratio": 0.5,
+        "in_flight": 0,
+    }
+    assert flights.do("k", lambda: "fresh") == ("fresh", False)
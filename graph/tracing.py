@@ -0,0 +1,325 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from graph.llm_scheduler import (
+    DEFAULT_PRIORITY,
+    PRIORITIES,
+    estimate_tokens,
+    scheduler,
+)
+
+logger = logging.getLogger(__name__)
+
+# Number of latency samples kept per metric for percentile estimates
+RESERVOIR_SIZE = 2048
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+@dataclass
+class Span:
+    name: str
+    kind: str
+    tags: Dict[str, Any] = field(default_factory=dict)
+    parent: Optional["Span"] = None
+    start: float = 0.0
+    end: float = 0.0
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end - self.start) * 1000
+
+    @property
+    def node(self) -> Optional[str]:
+        """Name of the nearest enclosing graph node or edge, if any."""
+        span = self
+        while span is not None:
+            if span.kind in ("node", "edge"):
+                return span.name
+            span = span.parent
+        return None
+
+
+class Histogram:
+    def __init__(self, size: int = RESERVOIR_SIZE):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+        self.outcomes = defaultdict(int)
+
+    def observe(self, value: float, outcome: str) -> None:
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+        self.outcomes[outcome] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+
+        def pct(p: float) -> float:
+            if not ordered:
+                return 0.0
+            index = min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))
+            return round(ordered[index], 3)
+
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "outcomes": dict(self.outcomes),
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[tuple, Histogram] = {}
+        self._listeners: list[Callable[[Span], None]] = []
+
+    def record(self, span: Span) -> None:
+        key = (span.kind, span.name, span.tags.get("model", ""))
+        outcome = str(span.tags.get("outcome", "ok"))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(span.duration_ms, outcome)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(span)
+
+    def add_listener(self, listener: Callable[[Span], None]) -> None:
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Span], None]) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            items = sorted(self._histograms.items())
+            metrics = [
+                {"kind": kind, "name": name, "model": model, **hist.summary()}
+                for (kind, name, model), hist in items
+            ]
+        return {"generated_at": time.time(), "metrics": metrics}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+registry = MetricsRegistry()
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **tags):
+    """
+    Times the enclosed block and records it under (kind, name, model).
+    Set `span.tags["outcome"]` inside the block to tag the result; exceptions
+    are tagged with their type name and re-raised.
+    """
+    parent = _current_span.get()
+    if "model" not in tags and parent is not None and "model" in parent.tags:
+        tags["model"] = parent.tags["model"]
+    current = Span(name=name, kind=kind, tags=tags, parent=parent)
+    token = _current_span.set(current)
+    current.start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.tags["outcome"] = type(e).__name__
+        raise
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+        registry.record(current)
+        logger.debug(
+            "span kind=%s name=%s model=%s outcome=%s duration_ms=%.1f",
+            kind,
+            name,
+            current.tags.get("model", ""),
+            current.tags.get("outcome", "ok"),
+            current.duration_ms,
+        )
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def traced(name: str, kind: str = "node"):
+    """
+    Decorator for graph nodes and conditional edges. The model is read from
+    the state's `selected_model`; a string return value (an edge decision)
+    becomes the span outcome.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(state, *args, **kwargs):
+            model = state.get("selected_model", "") if isinstance(state, dict) else ""
+            with span(name, kind=kind, model=model) as s:
+                result = func(state, *args, **kwargs)
+                if isinstance(result, str):
+                    s.tags["outcome"] = result
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def traced_chain(chain: Runnable, name: str, model_name: str) -> Runnable:
+    """
+    Wraps an LLM chain so every invoke/ainvoke is admitted by the shared
+    `LLMScheduler` and recorded as an `llm` span. Time spent waiting for a
+    rate-limit slot is tagged on the span as `queue_wait_ms` and recorded
+    separately as an `llm_queue` span.
+    """
+    priority = PRIORITIES.get(name, DEFAULT_PRIORITY)
+
+    def record_queue_wait(s: Span, waited: float) -> None:
+        s.tags["queue_wait_ms"] = round(waited * 1000, 1)
+        registry.record(
+            Span(name=name, kind="llm_queue", tags={"model": model_name}, end=waited)
+        )
+
+    def invoke(inputs, config=None):
+        with span(name, kind="llm", model=model_name) as s:
+            return scheduler.run(
+                model_name,
+                lambda: chain.invoke(inputs, config),
+                priority=priority,
+                tokens=estimate_tokens(inputs, name),
+                on_queued=lambda waited: record_queue_wait(s, waited),
+            )
+
+    async def ainvoke(inputs, config=None):
+        with span(name, kind="llm", model=model_name) as s:
+            return await scheduler.arun(
+                model_name,
+                lambda: chain.ainvoke(inputs, config),
+                priority=priority,
+                tokens=estimate_tokens(inputs, name),
+                on_queued=lambda waited: record_queue_wait(s, waited),
+            )
+
+    return RunnableLambda(invoke, afunc=ainvoke, name=name)
+
+
+# --- Exporters ---
+def dump_metrics(path: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(registry.snapshot(), f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def start_metrics_dump(path: str, interval: float = 30.0) -> threading.Thread:
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                dump_metrics(path)
+            except OSError as e:
+                logger.warning("Failed to dump metrics to %s: %s", path, e)
+
+    thread = threading.Thread(target=loop, name="metrics-dump", daemon=True)
+    thread.start()
+    return thread
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        body = json.dumps(registry.snapshot(), indent=2).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, name="metrics-server", daemon=True
+    )
+    thread.start()
+    logger.info("Serving metrics on http://%s:%d/metrics", host, port)
+    return server
+
+
+# --- Configuration ---
+class _SpanFilter(logging.Filter):
+    def filter(self, record):
+        current = _current_span.get()
+        record.node = (current.node if current else None) or "-"
+        return True
+
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def configure_from_env() -> None:
+    """
+    Idempotent setup driven by environment variables:
+        RAG_LOG_LEVEL: log level for the `graph` loggers (default INFO)
+        RAG_METRICS_PORT: serve the metrics snapshot as JSON on this port
+        RAG_METRICS_FILE: periodically dump the snapshot to this file
+        RAG_METRICS_INTERVAL: seconds between dumps (default 30)
+    """
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        _configured = True
+
+        graph_logger = logging.getLogger("graph")
+        graph_logger.setLevel(os.getenv("RAG_LOG_LEVEL", "INFO").upper())
+        if not graph_logger.handlers:
+            handler = logging.StreamHandler()
+            handler.addFilter(_SpanFilter())
+            handler.setFormatter(
+                logging.Formatter(
+                    "%(asctime)s %(levelname)s %(name)s node=%(node)s %(message)s"
+                )
+            )
+            graph_logger.addHandler(handler)
+            graph_logger.propagate = False
+
+        port = os.getenv("RAG_METRICS_PORT")
+        if port:
+            try:
+                start_metrics_server(int(port))
+            except OSError as e:
+                logger.warning("Metrics server not started on port %s: %s", port, e)
+
+        path = os.getenv("RAG_METRICS_FILE")
+        if path:
+            start_metrics_dump(path, float(os.getenv("RAG_METRICS_INTERVAL", "30")))
@@ -0,0 +1,198 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _write_json(path: str, data: Any) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path: str) -> Any:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+class WarmAnswerStore:
+    """
+    Precomputed answers per model, keyed by normalized question. Each entry
+    records the index version it was generated from and is only served while
+    that version is current.
+    """
+
+    def __init__(self, path: str, normalize: Callable[[str], str]):
+        self.path = path
+        self.normalize = normalize
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, dict]] = _read_json(path) or {}
+
+    def get(self, question: str, model_name: str, index_version: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(model_name, {}).get(self.normalize(question))
+        if entry is None or entry["index_version"] != index_version:
+            return None
+        return entry
+
+    def put(
+        self,
+        question: str,
+        model_name: str,
+        answer: str,
+        sources: List[dict],
+        index_version: str,
+    ) -> None:
+        entry = {
+            "question": question,
+            "answer": answer,
+            "sources": sources,
+            "index_version": index_version,
+            "generated_at": time.time(),
+        }
+        with self._lock:
+            self._entries.setdefault(model_name, {})[self.normalize(question)] = entry
+
+    def retain(self, model_name: str, questions: Iterable[str]) -> None:
+        """Drops a model's entries for questions no longer being warmed."""
+        keep = {self.normalize(q) for q in questions}
+        with self._lock:
+            entries = self._entries.get(model_name, {})
+            for key in [key for key in entries if key not in keep]:
+                del entries[key]
+
+    def save(self) -> None:
+        with self._lock:
+            data = json.loads(json.dumps(self._entries))
+        _write_json(self.path, data)
+
+
+class QuestionLog:
+    """Counts asked questions so the most frequent ones can be warmed."""
+
+    def __init__(
+        self, path: str, normalize: Callable[[str], str], save_every: int = 20
+    ):
+        self.path = path
+        self.normalize = normalize
+        self.save_every = save_every
+        self._lock = threading.Lock()
+        data = _read_json(path) or {}
+        self._counts = Counter(data.get("counts", {}))
+        # Most recent wording seen for each normalized question
+        self._wording: Dict[str, str] = data.get("wording", {})
+        self._unsaved = 0
+
+    def record(self, question: str) -> None:
+        key = self.normalize(question)
+        with self._lock:
+            self._counts[key] += 1
+            self._wording[key] = question
+            self._unsaved += 1
+            due = self._unsaved >= self.save_every
+        if due:
+            self.save()
+
+    def top(self, n: int) -> List[str]:
+        with self._lock:
+            return [self._wording[key] for key, _ in self._counts.most_common(n)]
+
+    def save(self) -> None:
+        with self._lock:
+            data = {"counts": dict(self._counts), "wording": dict(self._wording)}
+            self._unsaved = 0
+        _write_json(self.path, data)
+
+
+class WarmAnswerRefresher:
+    """
+    Background thread that regenerates the store whenever the index version
+    changes (i.e. after each ingestion run) and periodically to pick up newly
+    popular questions. `answer(question, model)` returns `(answer, sources)`.
+    """
+
+    def __init__(
+        self,
+        store: WarmAnswerStore,
+        log: QuestionLog,
+        answer: Callable[[str, str], tuple],
+        index_version: Callable[[], str],
+        models: List[str],
+        sample_questions: List[str],
+        top_n: int = 10,
+        interval: float = 60.0,
+        rewarm_every: float = 6 * 3600,
+    ):
+        self.store = store
+        self.log = log
+        self.answer = answer
+        self.index_version = index_version
+        self.models = models
+        self.sample_questions = sample_questions
+        self.top_n = top_n
+        self.interval = interval
+        self.rewarm_every = rewarm_every
+        self.last_version: Optional[str] = None
+        self.last_refresh = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def questions(self) -> List[str]:
+        questions, seen = [], set()
+        for question in self.sample_questions + self.log.top(self.top_n):
+            key = self.store.normalize(question)
+            if key not in seen:
+                seen.add(key)
+                questions.append(question)
+        return questions
+
+    def refresh(self) -> int:
+        """Fills in every missing or outdated entry; returns how many were made."""
+        version = self.index_version()
+        questions = self.questions()
+        made = 0
+        for model_name in self.models:
+            self.store.retain(model_name, questions)
+            for question in questions:
+                if self.store.get(question, model_name, version) is not None:
+                    continue
+                try:
+                    answer, sources = self.answer(question, model_name)
+                except Exception as e:
+                    logger.warning(
+                        "Warm answer failed for %r (%s): %s", question, model_name, e
+                    )
+                    continue
+                self.store.put(question, model_name, answer, sources, version)
+                made += 1
+            self.store.save()
+        self.log.save()
+        self.last_version, self.last_refresh = version, time.time()
+        logger.info("Warm answers refreshed: %d generated for index %s", made, version)
+        return made
+
+    def _loop(self) -> None:
+        while True:
+            due = time.time() - self.last_refresh >= self.rewarm_every
+            if self.index_version() != self.last_version or due:
+                try:
+                    self.refresh()
+                except Exception:
+                    logger.exception("Warm answer refresh failed")
+                    self.last_refresh = time.time()
+            time.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._loop, name="warm-answers", daemon=True
+            )
+            self._thread.start()
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import re
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, Iterator, List, Set, Tuple
+from urllib.parse import urlparse
+
+
+def _line_key(line: str) -> str:
+    # Case, spacing and numbers (dates, counts) vary between copies of a template
+    normalized = re.sub(r"\d+", "0", re.sub(r"\s+", " ", line.strip().lower()))
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+
+
+@dataclass
+class SiteTemplate:
+    """Per-site statistics: how many crawled pages contain each line. The
+    lines counted for each URL are kept, so a page crawled again replaces
+    its earlier observation instead of being counted twice."""
+
+    pages: int = 0
+    line_pages: Counter = field(default_factory=Counter)
+    url_lines: Dict[str, Set[str]] = field(default_factory=dict)
+
+    def observe(self, url: str, keys: Iterable[str]) -> None:
+        keys = set(keys)
+        previous = self.url_lines.get(url)
+        if previous is None:
+            self.pages += 1
+        else:
+            self.line_pages.subtract(previous)
+            for key in previous - keys:
+                if self.line_pages[key] <= 0:
+                    del self.line_pages[key]
+        self.line_pages.update(keys)
+        self.url_lines[url] = keys
+
+    def prune(self, max_lines: int) -> None:
+        # Bound memory on large crawls: forget lines seen on a single page
+        if len(self.line_pages) > max_lines:
+            self.line_pages = Counter(
+                {key: n for key, n in self.line_pages.items() if n > 1}
+            )
+            for url, keys in self.url_lines.items():
+                self.url_lines[url] = keys & self.line_pages.keys()
+
+
+class BoilerplateDetector:
+    """
+    Learns which lines repeat across pages of the same site (menus, footers,
+    announcement banners) and strips them before chunking.
+
+    Works as a stream: the first `warmup_pages` pages of a site are held back
+    until there are enough statistics, then every page is cleaned as it
+    arrives. A line is boilerplate once the site has `min_pages` pages and the
+    line appears on at least `min_ratio` of them.
+    """
+
+    def __init__(
+        self,
+        min_ratio: float = 0.5,
+        min_pages: int = 5,
+        warmup_pages: int = 10,
+        max_lines_per_site: int = 200_000,
+    ):
+        self.min_ratio = min_ratio
+        self.min_pages = min_pages
+        self.warmup_pages = warmup_pages
+        self.max_lines_per_site = max_lines_per_site
+        self.sites: Dict[str, SiteTemplate] = {}
+        # Sites loaded with saved statistics need no warm-up
+        self._preloaded: frozenset = frozenset()
+        self.lines_in = 0
+        self.lines_removed = 0
+
+    def _site(self, url: str) -> SiteTemplate:
+        return self.sites.setdefault(urlparse(url).netloc, SiteTemplate())
+
+    def observe(self, url: str, text: str) -> None:
+        template = self._site(url)
+        template.observe(
+            url, (_line_key(line) for line in text.splitlines() if line.strip())
+        )
+        template.prune(self.max_lines_per_site)
+
+    def is_boilerplate(self, url: str, line: str) -> bool:
+        template = self._site(url)
+        if template.pages < self.min_pages:
+            return False
+        count = template.line_pages.get(_line_key(line), 0)
+        return count > 1 and count >= self.min_ratio * template.pages
+
+    def clean(self, url: str, text: str) -> str:
+        kept: List[str] = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            self.lines_in += 1
+            if self.is_boilerplate(url, line):
+                self.lines_removed += 1
+            else:
+                kept.append(line)
+        return "\n".join(kept)
+
+    def process(self, pages: Iterable[Tuple]) -> Iterator[Tuple]:
+        """
+        Cleans a stream of `(url, text, *rest)` tuples, yielding
+        `(url, cleaned_text, *rest)`. Output order differs from input order
+        only while a site is warming up.
+        """
+        held: Dict[str, Deque[Tuple]] = {}
+        for page in pages:
+            url, text = page[0], page[1]
+            self.observe(url, text)
+            site = urlparse(url).netloc
+            warming_up = site not in self._preloaded
+            if warming_up and self.sites[site].pages < self.warmup_pages:
+                held.setdefault(site, deque()).append(page)
+                continue
+            for waiting in held.pop(site, ()):
+                yield self._cleaned(waiting)
+            yield self._cleaned(page)
+        for waiting_pages in held.values():
+            for waiting in waiting_pages:
+                yield self._cleaned(waiting)
+
+    def _cleaned(self, page: Tuple) -> Tuple:
+        return (page[0], self.clean(page[0], page[1]), *page[2:])
+
+    @property
+    def removal_ratio(self) -> float:
+        return self.lines_removed / self.lines_in if self.lines_in else 0.0
+
+    # --- Persistence ---
+    def save(self, path: str) -> None:
+        data = {
+            site: {
+                "pages": t.pages,
+                "line_pages": dict(t.line_pages),
+                "url_lines": {url: sorted(keys) for url, keys in t.url_lines.items()},
+            }
+            for site, t in self.sites.items()
+        }
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+    def load(self, path: str) -> None:
+        with open(path) as f:
+            data = json.load(f)
+        for site, stats in data.items():
+            self.sites[site] = SiteTemplate(
+                pages=stats["pages"],
+                line_pages=Counter(stats["line_pages"]),
+                url_lines={
+                    url: set(keys)
+                    for url, keys in stats.get("url_lines", {}).items()
+                },
+            )
+        self._preloaded = frozenset(
+            site for site, t in self.sites.items() if t.pages >= self.min_pages
+        )
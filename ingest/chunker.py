@@ -0,0 +1,208 @@
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import tiktoken
+from bs4 import BeautifulSoup, Tag
+from langchain_core.documents import Document
+
+HEADERS_TO_SPLIT_ON = [
+    ("h1", "Header 1"),
+    ("h2", "Header 2"),
+    ("h3", "Header 3"),
+    ("h4", "Header 4"),
+]
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name: str = "cl100k_base") -> tiktoken.Encoding:
+    return tiktoken.get_encoding(name)
+
+
+class TokenChunker:
+    """
+    Token-aware splitter that encodes each document once.
+
+    Text is cut into segments at line breaks, and long lines further at
+    sentence ends. Each segment is tokenized exactly once, and chunks are
+    packed greedily up to `chunk_size` tokens, carrying trailing segments
+    worth at most `chunk_overlap` tokens into the next chunk. Segments
+    longer than a chunk are split on token windows. Build one instance and
+    reuse it.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 500,
+        chunk_overlap: int = 100,
+        encoding_name: str = "cl100k_base",
+    ):
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.encoding_name = encoding_name
+        self.encoding = get_encoding(encoding_name)
+
+    def _segments(self, text: str) -> List[str]:
+        segments = []
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            # Long lines are cut at sentence ends so chunks end on a boundary
+            if len(line) > self.chunk_size * 2:
+                segments.extend(s for s in _SENTENCE_END.split(line) if s)
+            else:
+                segments.append(line)
+        return segments
+
+    def _window(self, tokens: Sequence[int]) -> List[str]:
+        step = self.chunk_size - self.chunk_overlap
+        return [
+            self.encoding.decode(tokens[start : start + self.chunk_size])
+            for start in range(0, max(len(tokens) - self.chunk_overlap, 1), step)
+        ]
+
+    def split_text(self, text: str) -> List[str]:
+        segments = self._segments(text)
+        if not segments:
+            return []
+        # encode_ordinary_batch starts a thread pool per call; for one page
+        # of short segments that costs more than the encoding itself
+        encode = self.encoding.encode_ordinary
+        token_lists = [encode(segment) for segment in segments]
+
+        chunks: List[str] = []
+        current: List[Tuple[str, int]] = []
+        current_tokens = 0
+
+        def emit():
+            chunks.append("\n".join(segment for segment, _ in current))
+
+        for segment, tokens in zip(segments, token_lists):
+            size = len(tokens) + 1  # +1 for the joining newline
+            if size > self.chunk_size:
+                if current:
+                    emit()
+                    current, current_tokens = [], 0
+                chunks.extend(self._window(tokens))
+                continue
+            if current_tokens + size > self.chunk_size:
+                emit()
+                # Carry the tail of the previous chunk over as overlap
+                overlap: List[Tuple[str, int]] = []
+                overlap_tokens = 0
+                for item in reversed(current):
+                    if overlap_tokens + item[1] > self.chunk_overlap:
+                        break
+                    overlap.insert(0, item)
+                    overlap_tokens += item[1]
+                current, current_tokens = overlap, overlap_tokens
+                if current_tokens + size > self.chunk_size:
+                    current, current_tokens = [], 0
+            current.append((segment, size))
+            current_tokens += size
+        if current:
+            emit()
+        return chunks
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        return [
+            Document(page_content=chunk, metadata=dict(doc.metadata))
+            for doc in documents
+            for chunk in self.split_text(doc.page_content)
+        ]
+
+    def split_html(
+        self, html: str, metadata: Optional[Dict] = None
+    ) -> List[Document]:
+        """Splits on h1-h4 first, adding the header path to each chunk's metadata."""
+        sections = split_html_sections(html)
+        return self.split_documents(
+            Document(page_content=text, metadata={**(metadata or {}), **headers})
+            for headers, text in sections
+        )
+
+
+def split_html_sections(
+    html: str, headers_to_split_on: Sequence[Tuple[str, str]] = HEADERS_TO_SPLIT_ON
+) -> List[Tuple[Dict[str, str], str]]:
+    """
+    Walks the page once, starting a new section at every configured header.
+    Returns (header metadata, section text) pairs, like HTMLHeaderTextSplitter.
+    """
+    levels = {tag: (i, name) for i, (tag, name) in enumerate(headers_to_split_on)}
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+
+    sections: List[Tuple[Dict[str, str], str]] = []
+    active: Dict[str, str] = {}
+    lines: List[str] = []
+    seen_headers = set()
+
+    def flush():
+        text = "\n".join(lines)
+        if text:
+            sections.append((dict(active), text))
+        lines.clear()
+
+    for string in soup.find_all(string=True):
+        if type(string).__name__ != "NavigableString":
+            continue  # comments, doctype, CDATA
+        header = next(
+            (p for p in string.parents if isinstance(p, Tag) and p.name in levels),
+            None,
+        )
+        if header is None:
+            text = string.strip()
+            if text:
+                lines.append(text)
+            continue
+        if id(header) in seen_headers:
+            continue
+        seen_headers.add(id(header))
+        flush()
+        level, name = levels[header.name]
+        for _, deeper in headers_to_split_on[level:]:
+            active.pop(deeper, None)
+        active[name] = header.get_text(" ", strip=True)
+    flush()
+    return sections
+
+
+# --- Process fan-out ---
+_worker_chunker: Optional[TokenChunker] = None
+
+
+def _init_worker(chunk_size: int, chunk_overlap: int, encoding_name: str) -> None:
+    global _worker_chunker
+    _worker_chunker = TokenChunker(chunk_size, chunk_overlap, encoding_name)
+
+
+def _split_batch(documents: List[Document]) -> List[Document]:
+    return _worker_chunker.split_documents(documents)
+
+
+def split_documents_parallel(
+    chunker: TokenChunker,
+    documents: List[Document],
+    workers: int = 4,
+    batch_size: int = 64,
+) -> List[Document]:
+    """Splits documents across worker processes, preserving input order."""
+    if workers <= 1 or len(documents) <= batch_size:
+        return chunker.split_documents(documents)
+    batches = [
+        documents[i : i + batch_size] for i in range(0, len(documents), batch_size)
+    ]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(chunker.chunk_size, chunker.chunk_overlap, chunker.encoding_name),
+    ) as executor:
+        return [doc for batch in executor.map(_split_batch, batches) for doc in batch]
@@ -0,0 +1,376 @@
+"""
+Merges the persistent Chroma stores into one collection and tunes its HNSW index.
+The merged collection is published as a new index snapshot.
+
+Every record keeps its id, text and metadata, plus a `source_tag` naming the
+store it came from, so the retriever can still weight the stores separately
+with metadata filters while only one index is loaded. Records are copied
+with their stored embeddings, so nothing is re-embedded. The merged
+collection is built in a fresh directory and swapped into place, which
+leaves no deleted entries or stale segments behind.
+
+Each HNSW configuration is reported with recall@k against exact
+(brute-force) search, query latency, build time and on-disk size. Queries
+are midpoints of random pairs of stored vectors, which land between chunks
+the way real questions do.
+
+    python -m ingest.consolidate --m 32 --ef-construction 200 --ef-search 64
+    python -m ingest.consolidate --sweep --m 16 32 --ef-search 10 50 100
+"""
+
+import argparse
+import itertools
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Sequence
+
+import chromadb
+import numpy as np
+from chromadb.api.shared_system_client import SharedSystemClient
+from tabulate import tabulate
+
+from ingest.snapshots import SnapshotStore
+
+SOURCE_TAG = "source_tag"
+
+
+@dataclass(frozen=True)
+class StoreSource:
+    path: str
+    collection_name: str
+    tag: str
+
+
+# The stores `ingestion.py` serves from, in ensemble order
+SOURCES = [
+    StoreSource("./.chroma", "rag-chroma", "primary"),
+    StoreSource("./.chroma-extra", "rag-chroma-extra", "extra"),
+]
+CONSOLIDATED_PATH = "./.chroma-consolidated"
+CONSOLIDATED_COLLECTION = "rag-chroma-consolidated"
+
+
+def sources_in(root: str) -> List[StoreSource]:
+    """`SOURCES` inside `root`, e.g. an index snapshot."""
+    return [
+        StoreSource(
+            os.path.normpath(os.path.join(root, source.path)),
+            source.collection_name,
+            source.tag,
+        )
+        for source in SOURCES
+    ]
+
+
+@dataclass(frozen=True)
+class HnswConfig:
+    m: int = 16
+    ef_construction: int = 100
+    ef_search: int = 100
+
+    def configuration(self, space: str) -> dict:
+        return {
+            "hnsw": {
+                "space": space,
+                "max_neighbors": self.m,
+                "ef_construction": self.ef_construction,
+                "ef_search": self.ef_search,
+            }
+        }
+
+    @property
+    def label(self) -> str:
+        return f"M={self.m} efC={self.ef_construction} efS={self.ef_search}"
+
+
+@dataclass
+class Records:
+    ids: List[str]
+    embeddings: np.ndarray
+    documents: List[str]
+    metadatas: List[dict]
+    space: str = "l2"
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def _space(collection) -> str:
+    hnsw = (collection.configuration or {}).get("hnsw") or {}
+    return hnsw.get("space") or (collection.metadata or {}).get("hnsw:space", "l2")
+
+
+def load_records(source: StoreSource, page_size: int = 1000) -> Records:
+    """Reads a whole collection with its embeddings, tagging every record."""
+    client = chromadb.PersistentClient(path=source.path)
+    collection = client.get_collection(source.collection_name)
+    ids, vectors, documents, metadatas = [], [], [], []
+    for offset in range(0, collection.count(), page_size):
+        page = collection.get(
+            include=["embeddings", "documents", "metadatas"],
+            limit=page_size,
+            offset=offset,
+        )
+        for record_id, vector, document, metadata in zip(
+            page["ids"], page["embeddings"], page["documents"], page["metadatas"]
+        ):
+            # Ids are only unique within a store
+            ids.append(f"{source.tag}:{record_id}")
+            vectors.append(vector)
+            documents.append(document)
+            metadatas.append({**(metadata or {}), SOURCE_TAG: source.tag})
+    return Records(
+        ids=ids,
+        embeddings=np.asarray(vectors, dtype=np.float32),
+        documents=documents,
+        metadatas=metadatas,
+        space=_space(collection),
+    )
+
+
+def read_config(path: str, name: str = CONSOLIDATED_COLLECTION) -> HnswConfig:
+    """HNSW settings of an existing merged collection, to rebuild it alike."""
+    collection = chromadb.PersistentClient(path=path).get_collection(name)
+    hnsw = (collection.configuration or {}).get("hnsw") or {}
+    default = HnswConfig()
+    return HnswConfig(
+        m=hnsw.get("max_neighbors", default.m),
+        ef_construction=hnsw.get("ef_construction", default.ef_construction),
+        ef_search=hnsw.get("ef_search", default.ef_search),
+    )
+
+
+def merge_records(parts: Sequence[Records]) -> Records:
+    spaces = {part.space for part in parts if len(part)}
+    if len(spaces) > 1:
+        raise ValueError(f"Cannot merge collections with different spaces: {spaces}")
+    non_empty = [part.embeddings for part in parts if len(part)]
+    return Records(
+        ids=[i for part in parts for i in part.ids],
+        embeddings=np.concatenate(non_empty) if non_empty else np.empty((0, 0)),
+        documents=[d for part in parts for d in part.documents],
+        metadatas=[m for part in parts for m in part.metadatas],
+        space=spaces.pop() if spaces else "l2",
+    )
+
+
+def build_collection(
+    path: str, name: str, records: Records, config: HnswConfig, batch_size: int = 1000
+):
+    client = chromadb.PersistentClient(path=path)
+    collection = client.create_collection(
+        name, configuration=config.configuration(records.space)
+    )
+    for start in range(0, len(records), batch_size):
+        end = start + batch_size
+        collection.add(
+            ids=records.ids[start:end],
+            embeddings=records.embeddings[start:end],
+            documents=records.documents[start:end],
+            metadatas=records.metadatas[start:end],
+        )
+    return collection
+
+
+def _distances(vectors: np.ndarray, queries: np.ndarray, space: str) -> np.ndarray:
+    if space == "cosine":
+        unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        q = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        return 1 - q @ unit.T
+    if space == "ip":
+        return 1 - queries @ vectors.T
+    return (
+        (queries**2).sum(axis=1, keepdims=True)
+        - 2 * queries @ vectors.T
+        + (vectors**2).sum(axis=1)
+    )
+
+
+def exact_top_k(records: Records, queries: np.ndarray, k: int) -> List[set]:
+    distances = _distances(records.embeddings, queries, records.space)
+    top = np.argsort(distances, axis=1)[:, :k]
+    return [{records.ids[i] for i in row} for row in top]
+
+
+def sample_queries(records: Records, count: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, len(records), size=count)
+    b = rng.integers(0, len(records), size=count)
+    return (records.embeddings[a] + records.embeddings[b]) / 2
+
+
+def directory_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def compact(path: str) -> None:
+    """Reclaims free pages in the store's SQLite file."""
+    db_path = os.path.join(path, "chroma.sqlite3")
+    if not os.path.exists(db_path):
+        return
+    try:
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("VACUUM")
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ Could not vacuum {db_path}: {e}")
+
+
+def evaluate(
+    collection, queries: np.ndarray, truth: List[set], k: int
+) -> Dict[str, float]:
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[query], n_results=k, include=[])
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(expected & set(result["ids"][0]))
+    latencies.sort()
+    return {
+        f"recall@{k}": hits / (len(truth) * k),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+    }
+
+
+def _reopen(path: str, name: str):
+    # A loaded index keeps its ef_search until the client is recreated
+    SharedSystemClient.clear_system_cache()
+    return chromadb.PersistentClient(path=path).get_collection(name)
+
+
+def benchmark_config(
+    records: Records,
+    config: HnswConfig,
+    queries: np.ndarray,
+    truth: List[set],
+    k: int,
+    ef_search: Sequence[int] = (),
+    path: Optional[str] = None,
+    name: str = CONSOLIDATED_COLLECTION,
+) -> List[Dict[str, object]]:
+    """
+    Builds the collection (in a temporary directory unless `path` is given)
+    and measures it at `config.ef_search`, then at each of `ef_search`.
+    ef_search is a query-time setting, so those reuse the same index.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = path or tmp
+        start = time.perf_counter()
+        collection = build_collection(path, name, records, config)
+        build_s = time.perf_counter() - start
+        compact(path)
+        disk_mb = directory_size(path) / 1e6
+        rows = []
+        for value in ef_search or [config.ef_search]:
+            if value != config.ef_search:
+                collection.modify(configuration={"hnsw": {"ef_search": value}})
+                collection = _reopen(path, name)
+            row = {"config": replace(config, ef_search=value).label}
+            row.update(evaluate(collection, queries, truth, k))
+            row.update(build_s=build_s, disk_mb=disk_mb)
+            rows.append(row)
+        return rows
+
+
+def consolidate(
+    sources: Sequence[StoreSource] = SOURCES,
+    target_path: str = CONSOLIDATED_PATH,
+    collection_name: str = CONSOLIDATED_COLLECTION,
+    config: HnswConfig = HnswConfig(),
+    k: int = 5,
+    queries: int = 200,
+) -> Dict[str, object]:
+    """Writes the merged collection to `target_path`, replacing any earlier one."""
+    records = merge_records([load_records(source) for source in sources])
+    if not len(records):
+        raise ValueError("No records found in the source stores")
+    sample = sample_queries(records, queries)
+    truth = exact_top_k(records, sample, k)
+
+    staging = f"{target_path.rstrip('/')}.building"
+    shutil.rmtree(staging, ignore_errors=True)
+    [row] = benchmark_config(
+        records, config, sample, truth, k, path=staging, name=collection_name
+    )
+    previous = f"{target_path.rstrip('/')}.previous"
+    if os.path.exists(target_path):
+        os.replace(target_path, previous)
+    os.replace(staging, target_path)
+    shutil.rmtree(previous, ignore_errors=True)
+    row["records"] = len(records)
+    return row
+
+
+def _configs(args) -> List[HnswConfig]:
+    return [
+        HnswConfig(m, ef_construction, args.ef_search[0])
+        for m, ef_construction in itertools.product(args.m, args.ef_construction)
+    ]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--m", type=int, nargs="+", default=[16])
+    parser.add_argument("--ef-construction", type=int, nargs="+", default=[100])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[100])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument(
+        "--sweep",
+        action="store_true",
+        help="only report every configuration; do not write the merged store",
+    )
+    args = parser.parse_args(argv)
+
+    configs = _configs(args)
+    if not args.sweep and (len(configs) > 1 or len(args.ef_search) > 1):
+        parser.error("pass one value per HNSW setting, or --sweep to compare")
+
+    snapshots = SnapshotStore()
+    sources = sources_in(snapshots.path(snapshots.current()))
+    separate_mb = sum(directory_size(source.path) for source in sources) / 1e6
+    print(f"✓ Separate stores: {separate_mb:.1f} MB on disk")
+    if not args.sweep:
+        if snapshots.pending_build():
+            parser.error(f"finish or delete {snapshots.pending_build()} first")
+        # Written into a new snapshot, so serving switches over atomically
+        with snapshots.build() as root:
+            row = consolidate(
+                sources_in(root),
+                os.path.join(root, CONSOLIDATED_PATH),
+                config=configs[0],
+                k=args.k,
+                queries=args.queries,
+            )
+        print(tabulate([row], headers="keys", floatfmt=".3f"))
+        print(f"✓ Wrote {row['records']} records")
+        print(f"✓ Published index snapshot {snapshots.current()}")
+        return 0
+
+    records = merge_records([load_records(source) for source in sources])
+    print(f"✓ Loaded {len(records)} records ({records.space} space)")
+    queries = sample_queries(records, args.queries)
+    truth = exact_top_k(records, queries, args.k)
+    rows = [
+        row
+        for config in configs
+        for row in benchmark_config(
+            records, config, queries, truth, args.k, ef_search=args.ef_search
+        )
+    ]
+    print(tabulate(rows, headers="keys", floatfmt=".3f"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
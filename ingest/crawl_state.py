@@ -0,0 +1,157 @@
+import sqlite3
+import threading
+import time
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# Crawl status of a URL
+QUEUED = "queued"
+VISITED = "visited"
+FAILED = "failed"
+# Ingested without being crawled: seed documents and pseudo-sources such as
+# the acronym glossary. Not listed by `visited_urls`
+SEED = "seed"
+
+# Furthest ingestion stage a URL reached, in pipeline order
+STAGES = ("fetched", "extracted", "documents", "chunked", "deduplicated", "written")
+SKIPPED = "skipped"
+WRITTEN = "written"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    depth INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    error TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS urls_frontier ON urls (status, depth);
+"""
+
+
+class CrawlState:
+    """
+    Persistent crawl frontier, visited set and per-URL ingestion stage,
+    stored in SQLite so an interrupted crawl or ingestion resumes where it
+    stopped. Thread-safe; pipeline stages may record progress concurrently.
+
+    By default the set of finished URLs is also kept in memory to skip
+    redundant writes. With `bounded_memory=True` nothing grows in memory:
+    membership checks, the frontier and URL listings all go through SQLite
+    in fixed-size pages.
+    """
+
+    def __init__(
+        self, path: str = "./.crawl_state.sqlite", bounded_memory: bool = False
+    ):
+        self.path = path
+        self.bounded_memory = bounded_memory
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._done: Optional[set] = None
+        if not bounded_memory:
+            rows = self._db.execute(
+                "SELECT url FROM urls WHERE status != ?", (QUEUED,)
+            )
+            self._done = {url for (url,) in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # --- Crawl frontier ---
+    def enqueue(self, items: Iterable[Tuple[str, int]]) -> None:
+        """Adds (url, depth) pairs; a URL already queued keeps its smallest depth."""
+        if self._done is not None:
+            items = [(url, depth) for url, depth in items if url not in self._done]
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO urls (url, depth, status, updated) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET depth = excluded.depth "
+                "WHERE status = 'queued' AND excluded.depth < depth",
+                ((url, depth, QUEUED, now) for url, depth in items),
+            )
+
+    def next_batch(self, size: int = 50) -> List[Tuple[str, int]]:
+        """Shallowest queued URLs first; they stay queued until marked."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT url, depth FROM urls WHERE status = ? "
+                "ORDER BY depth, rowid LIMIT ?",
+                (QUEUED, size),
+            ).fetchall()
+
+    def _set_status(self, url: str, status: str, error: Optional[str]) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE urls SET status = ?, error = ?, updated = ? WHERE url = ?",
+                (status, error, time.time(), url),
+            )
+        if self._done is not None:
+            self._done.add(url)
+
+    def mark_visited(self, url: str) -> None:
+        self._set_status(url, VISITED, None)
+
+    def mark_failed(self, url: str, error: str) -> None:
+        self._set_status(url, FAILED, error)
+
+    def is_known(self, url: str) -> bool:
+        if self._done is not None and url in self._done:
+            return True
+        with self._lock:
+            row = self._db.execute("SELECT 1 FROM urls WHERE url = ?", (url,))
+            return row.fetchone() is not None
+
+    def visited_urls(self, page_size: int = 1000) -> Iterator[str]:
+        """Successfully crawled URLs in order, read a page at a time."""
+        last = ""
+        while True:
+            with self._lock:
+                page = self._db.execute(
+                    "SELECT url FROM urls WHERE status = ? AND url > ? "
+                    "ORDER BY url LIMIT ?",
+                    (VISITED, last, page_size),
+                ).fetchall()
+            if not page:
+                return
+            for (url,) in page:
+                yield url
+            last = page[-1][0]
+
+    # --- Ingestion progress ---
+    def set_stage(self, url: str, stage: str, error: Optional[str] = None) -> None:
+        now = time.time()
+        with self._lock, self._db:
+            # URLs ingested without being crawled (e.g. seed documents) get a row too
+            self._db.execute(
+                "INSERT INTO urls (url, depth, status, stage, error, updated) "
+                "VALUES (?, 0, ?, ?, ?, ?) ON CONFLICT(url) DO UPDATE SET "
+                "stage = excluded.stage, error = excluded.error, "
+                "updated = excluded.updated",
+                (url, SEED, stage, error, now),
+            )
+
+    def stage_of(self, url: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT stage FROM urls WHERE url = ?", (url,))
+            found = row.fetchone()
+        return found[0] if found else None
+
+    def pending_ingest(self, urls: Iterable[str]) -> Iterator[str]:
+        """Filters out URLs that were already written (or skipped) by a previous run."""
+        for url in urls:
+            if self.stage_of(url) not in (WRITTEN, SKIPPED):
+                yield url
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT status, COALESCE(stage, '-'), COUNT(*) FROM urls "
+                "GROUP BY status, stage"
+            ).fetchall()
+        return {f"{status}/{stage}": n for status, stage, n in rows}
@@ -0,0 +1,214 @@
+import hashlib
+import re
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+# Mersenne prime used for the universal hash permutations
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Separator for the list of other URLs stored in a representative's metadata
+# (Chroma metadata values must be scalars)
+SOURCE_SEPARATOR = " | "
+
+
+def _shingle_hashes(text: str, size: int) -> np.ndarray:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+    return np.array(
+        [
+            int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "big")
+            for s in shingles
+        ],
+        dtype=np.uint64,
+    )
+
+
+def _choose_bands(num_perm: int, threshold: float) -> tuple[int, int]:
+    """Picks (bands, rows) whose LSH S-curve midpoint is closest to threshold."""
+    best = (num_perm, 1)
+    best_error = float("inf")
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+@dataclass
+class DedupStats:
+    chunks_in: int = 0
+    chunks_out: int = 0
+    chars_in: int = 0
+    chars_out: int = 0
+
+    @property
+    def dropped(self) -> int:
+        return self.chunks_in - self.chunks_out
+
+    def summary(self) -> str:
+        saved = 1 - self.chars_out / self.chars_in if self.chars_in else 0.0
+        return (
+            f"{self.chunks_in} chunks -> {self.chunks_out} "
+            f"({self.dropped} near-duplicates removed, {saved:.0%} less text)"
+        )
+
+
+class NearDuplicateFilter:
+    """
+    MinHash/LSH near-duplicate filter for chunks. The first chunk seen in a
+    cluster is kept as the representative; the source URLs of later duplicates
+    are appended to its `duplicate_sources` metadata.
+
+    Streaming: call `filter` once per URL with a shared instance. Duplicates
+    found after a representative was written are reported by
+    `pending_updates()` so its metadata can be updated in the store.
+
+    Re-ingesting: `seed` the filter with the chunks already in the store,
+    and `release` each changed page before filtering its new chunks.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        num_perm: int = 128,
+        shingle_size: int = 5,
+        seed: int = 1,
+    ):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _choose_bands(num_perm, threshold)
+        self.num_perm = self.bands * self.rows
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, size=self.num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=self.num_perm, dtype=np.uint64)
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._signatures: List[np.ndarray] = []
+        # None marks a representative released from the filter
+        self._representatives: List[Optional[Document]] = []
+        self._pending: Dict[int, Document] = {}
+        self.stats = DedupStats()
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = _shingle_hashes(text, self.shingle_size)
+        permuted = (np.outer(hashes, self._a) + self._b) % _PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+    def _find_duplicate(self, signature: np.ndarray) -> Optional[int]:
+        candidates = set()
+        for band, buckets in enumerate(self._buckets):
+            key = signature[band * self.rows : (band + 1) * self.rows].tobytes()
+            candidates.update(buckets.get(key, ()))
+        best, best_similarity = None, self.threshold
+        for index in candidates:
+            if self._representatives[index] is None:
+                continue
+            similarity = float(np.mean(self._signatures[index] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = index, similarity
+        return best
+
+    def _register(self, signature: np.ndarray, doc: Document) -> None:
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        self._representatives.append(doc)
+        for band, buckets in enumerate(self._buckets):
+            key = signature[band * self.rows : (band + 1) * self.rows].tobytes()
+            buckets.setdefault(key, []).append(index)
+
+    def add(self, doc: Document) -> bool:
+        """Returns True if `doc` is new and should be ingested."""
+        self.stats.chunks_in += 1
+        self.stats.chars_in += len(doc.page_content)
+        signature = self.signature(doc.page_content)
+        index = self._find_duplicate(signature)
+
+        if index is None:
+            # Give representatives an id so their metadata can be updated later
+            doc.id = doc.id or str(uuid.uuid4())
+            self._register(signature, doc)
+            self.stats.chunks_out += 1
+            self.stats.chars_out += len(doc.page_content)
+            return True
+
+        representative = self._representatives[index]
+        source = doc.metadata.get("source")
+        own_source = representative.metadata.get("source")
+        recorded = representative.metadata.get("duplicate_sources", "")
+        sources = [s for s in recorded.split(SOURCE_SEPARATOR) if s]
+        if source and source != own_source and source not in sources:
+            sources.append(source)
+            joined = SOURCE_SEPARATOR.join(sources)
+            representative.metadata["duplicate_sources"] = joined
+        representative.metadata["duplicate_count"] = (
+            representative.metadata.get("duplicate_count", 0) + 1
+        )
+        self._pending[index] = representative
+        return False
+
+    def seed(self, documents: Iterable[Document]) -> None:
+        """Registers chunks already in the store as representatives, so their
+        duplicates are not written again. Not counted in `stats`."""
+        for doc in documents:
+            self._register(self.signature(doc.page_content), doc)
+
+    def release(self, source: str) -> List[Document]:
+        """
+        Forgets `source` before its changed page is filtered again. Its
+        representatives that other sources also contain are moved to the
+        first of those sources; the others leave the filter, and their
+        chunks are to be deleted from the store. Returns the representatives
+        whose metadata changed, to be written before that delete.
+        """
+        changed = []
+        for index, doc in enumerate(self._representatives):
+            if doc is None:
+                continue
+            recorded = doc.metadata.get("duplicate_sources", "")
+            sources = [s for s in recorded.split(SOURCE_SEPARATOR) if s]
+            if doc.metadata.get("source") == source:
+                if not sources:
+                    self._representatives[index] = None
+                    self._pending.pop(index, None)
+                    continue
+                doc.metadata["source"] = sources.pop(0)
+            elif source in sources:
+                sources.remove(source)
+            else:
+                continue
+            doc.metadata["duplicate_sources"] = SOURCE_SEPARATOR.join(sources)
+            doc.metadata["duplicate_count"] = max(
+                doc.metadata.get("duplicate_count", 0) - 1, 0
+            )
+            changed.append(doc)
+        return changed
+
+    def filter(self, documents: Iterable[Document]) -> List[Document]:
+        kept = [doc for doc in documents if self.add(doc)]
+        # Representatives from this batch are written with their final metadata
+        total = len(self._representatives)
+        for index in range(total - len(kept), total):
+            self._pending.pop(index, None)
+        return kept
+
+    def pending_updates(self) -> List[Document]:
+        """Previously returned representatives whose metadata has since changed."""
+        updates = list(self._pending.values())
+        self._pending.clear()
+        return updates
+
+
+def deduplicate_chunks(
+    documents: List[Document], threshold: float = 0.85
+) -> List[Document]:
+    return NearDuplicateFilter(threshold=threshold).filter(documents)
@@ -0,0 +1,229 @@
+"""
+Local embedding service: loads MiniLM once and embeds for every app process.
+
+Requests from all clients go into one queue. A worker takes the oldest
+request and keeps adding to its batch until `max_batch_size` texts are
+collected or `max_wait_ms` has passed since that request arrived. The
+batch then goes through the model in a single forward pass. Point the app
+at the service with `EMBEDDING_SERVICE_URL`; `ingestion.embeddings` then
+becomes a `RemoteEmbeddings` client.
+
+    python -m ingest.embedding_service --port 8765 --max-batch-size 32 --max-wait-ms 5
+"""
+
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+import requests
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_PORT = 8765
+MAX_BATCH_SIZE = 32
+MAX_WAIT_MS = 5.0
+
+
+@dataclass
+class _Request:
+    texts: List[str]
+    future: Future = field(default_factory=Future)
+    queued_at: float = field(default_factory=time.perf_counter)
+
+
+@dataclass
+class BatcherStats:
+    requests: int = 0
+    texts: int = 0
+    batches: int = 0
+    busy_s: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "texts": self.texts,
+            "batches": self.batches,
+            "mean_batch_size": self.texts / self.batches if self.batches else 0.0,
+            "busy_s": round(self.busy_s, 3),
+        }
+
+
+class MicroBatcher:
+    """
+    Groups concurrent `embed` calls into batches for `embeddings`. A request
+    is never split, so one larger than `max_batch_size` runs as its own batch.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_wait_ms: float = MAX_WAIT_MS,
+    ):
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000
+        self.stats = BatcherStats()
+        self._queue: queue.Queue = queue.Queue()
+        self._pending: Optional[_Request] = None
+        self._worker = threading.Thread(target=self._loop, daemon=True)
+        self._worker.start()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        request = _Request(list(texts))
+        self._queue.put(request)
+        return request.future.result()
+
+    def _next_batch(self) -> List[_Request]:
+        first = self._pending or self._queue.get()
+        self._pending = None
+        batch, size = [first], len(first.texts)
+        deadline = first.queued_at + self.max_wait_s
+        while size < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                request = (
+                    self._queue.get(timeout=timeout)
+                    if timeout > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if size + len(request.texts) > self.max_batch_size:
+                # Starts the next batch instead
+                self._pending = request
+                break
+            batch.append(request)
+            size += len(request.texts)
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._next_batch()
+            texts = [text for request in batch for text in request.texts]
+            start = time.perf_counter()
+            try:
+                vectors = self.embeddings.embed_documents(texts)
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            self.stats.busy_s += time.perf_counter() - start
+            self.stats.requests += len(batch)
+            self.stats.texts += len(texts)
+            self.stats.batches += 1
+            offset = 0
+            for request in batch:
+                end = offset + len(request.texts)
+                request.future.set_result(vectors[offset:end])
+                offset = end
+
+
+def make_server(
+    batcher: MicroBatcher, host: str = "127.0.0.1", port: int = DEFAULT_PORT
+) -> ThreadingHTTPServer:
+    """`POST /embed {"texts": [...]}` returns `{"embeddings": [...]}`;
+    `GET /health` returns the batcher statistics."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Small JSON replies on kept-alive connections would otherwise wait on
+        # Nagle's algorithm and delayed ACKs (~40 ms per request)
+        disable_nagle_algorithm = True
+
+        def _reply(self, status: int, body: dict) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path != "/health":
+                return self._reply(404, {"error": "not found"})
+            self._reply(200, batcher.stats.as_dict())
+
+        def do_POST(self):
+            if self.path != "/embed":
+                return self._reply(404, {"error": "not found"})
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                texts = json.loads(self.rfile.read(length))["texts"]
+                self._reply(200, {"embeddings": batcher.embed(texts)})
+            except Exception as e:
+                self._reply(500, {"error": str(e)})
+
+        def log_message(self, format, *args):
+            pass
+
+    return _Server((host, port), Handler)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Every app process connects at once on startup; the default backlog of 5
+    # drops connections, which clients only retry after a second
+    request_queue_size = 128
+
+
+class RemoteEmbeddings(Embeddings):
+    """LangChain `Embeddings` client for the embedding service."""
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        # Keeps connections open between calls; one session per thread
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        response = self._session().post(
+            f"{self.url}/embed", json={"texts": texts}, timeout=self.timeout
+        )
+        if response.status_code != 200:
+            raise RuntimeError(
+                f"Embedding service error {response.status_code}: {response.text}"
+            )
+        return response.json()["embeddings"]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    args = parser.parse_args(argv)
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+    batcher = MicroBatcher(embeddings, args.max_batch_size, args.max_wait_ms)
+    server = make_server(batcher, args.host, args.port)
+    print(f"✓ Embedding service listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+"""
+Single-parse page extraction on lxml (libxml2).
+
+`extract_page(html)` parses a page once. From that parse it returns:
+
+- the visible text, line for line as
+  `BeautifulSoup(html, "html.parser").get_text("\\n")` with scripts,
+  styles and noscript removed and blank lines dropped;
+- the h1-h6 headings;
+- the tables as data frames, built from the parsed cells the way
+  `pd.read_html` would (thead / all-`<th>` header rows, colspan and
+  rowspan copied, numeric columns inferred). No table is serialized
+  back to a string and parsed again.
+
+Pages over `BOUNDED_THRESHOLD` characters are fed to a SAX-style parser
+target in slices. No tree is built, so memory use is the size of the
+output, not of the document.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import pandas as pd
+from lxml import etree
+from pandas.io.parsers import TextParser
+
+SKIP_TAGS = {"script", "style", "noscript"}
+HEADING_TAGS = {f"h{level}": level for level in range(1, 7)}
+# Pages larger than this (in characters) are parsed in bounded-memory mode
+BOUNDED_THRESHOLD = 2_000_000
+FEED_SIZE = 64 * 1024
+
+# Cell text clean-up used by pd.read_html
+_CELL_WHITESPACE = re.compile(r"[\r\n]+|\s{2,}")
+# libxml2's tree builder drops anything after </html>; html.parser keeps it
+_DOCUMENT_END = re.compile(r"</(?:html|body)\s*>", re.IGNORECASE)
+
+
+@dataclass
+class ExtractedPage:
+    text: str
+    headings: List[Tuple[int, str]] = field(default_factory=list)
+    tables: List[pd.DataFrame] = field(default_factory=list)
+
+
+@dataclass
+class _Cell:
+    text: str
+    rowspan: int = 1
+    colspan: int = 1
+    header: bool = False
+
+
+def _span(value: Optional[str]) -> int:
+    try:
+        return max(1, int(value or 1))
+    except ValueError:
+        return 1
+
+
+def _expand(rows: List[List[_Cell]], remainder: list) -> Tuple[List[List[str]], list]:
+    """Copies colspan/rowspan cells into every position they cover."""
+    expanded = []
+    for row in rows:
+        texts, next_remainder, index = [], [], 0
+        for cell in row:
+            while remainder and remainder[0][0] <= index:
+                prev_index, prev_text, prev_rowspan = remainder.pop(0)
+                texts.append(prev_text)
+                if prev_rowspan > 1:
+                    next_remainder.append((prev_index, prev_text, prev_rowspan - 1))
+                index += 1
+            for _ in range(cell.colspan):
+                texts.append(cell.text)
+                if cell.rowspan > 1:
+                    next_remainder.append((index, cell.text, cell.rowspan - 1))
+                index += 1
+        for prev_index, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append((prev_index, prev_text, prev_rowspan - 1))
+        expanded.append(texts)
+        remainder = next_remainder
+    return expanded, remainder
+
+
+def table_frame(
+    head: List[List[_Cell]], body: List[List[_Cell]], foot: List[List[_Cell]]
+) -> Optional[pd.DataFrame]:
+    if not head:
+        # No <thead>: leading all-<th> rows are the header
+        while body and body[0] and all(cell.header for cell in body[0]):
+            head.append(body.pop(0))
+    head_texts, remainder = _expand(head, [])
+    body_texts, remainder = _expand(body, remainder)
+    foot_texts, _ = _expand(foot, remainder)
+    rows = [row for row in head_texts + body_texts + foot_texts if row]
+    if not rows:
+        return None
+    width = max(len(row) for row in rows)
+    rows = [row + [""] * (width - len(row)) for row in rows]
+
+    header = None
+    if head_texts:
+        if len(head_texts) == 1:
+            header = 0
+        else:
+            header = [i for i, row in enumerate(head_texts) if any(row)]
+    with TextParser(rows, header=header) as parser:
+        return parser.read()
+
+
+def _clean_lines(strings, lines: List[str]) -> None:
+    for string in strings:
+        for line in string.splitlines():
+            line = line.strip()
+            if line:
+                lines.append(line)
+
+
+# --- Tree mode ---
+def _text_content(element) -> str:
+    return "".join(element.itertext())
+
+
+def _cells(tr) -> List[_Cell]:
+    return [
+        _Cell(
+            text=_CELL_WHITESPACE.sub(" ", _text_content(td)).strip(),
+            rowspan=_span(td.get("rowspan")),
+            colspan=_span(td.get("colspan")),
+            header=td.tag == "th",
+        )
+        for td in tr
+        if td.tag in ("td", "th")
+    ]
+
+
+def _tree_table(table) -> Optional[pd.DataFrame]:
+    head, body, foot = [], [], []
+    for child in table:
+        if child.tag == "tr":
+            body.append(_cells(child))
+        elif child.tag in ("thead", "tbody", "tfoot"):
+            rows = {"thead": head, "tbody": body, "tfoot": foot}[child.tag]
+            rows.extend(_cells(tr) for tr in child.iter("tr"))
+            # <thead><th>..</th></thead> without a <tr>
+            if child.tag == "thead" and any(c.tag in ("td", "th") for c in child):
+                head.append(_cells(child))
+    return table_frame(head, body, foot)
+
+
+def _extract_tree(html: str) -> ExtractedPage:
+    parser = etree.HTMLParser()
+    root = etree.fromstring(_DOCUMENT_END.sub("", html), parser)
+    if root is None:
+        return ExtractedPage(text="")
+    strings, headings, tables = [], [], []
+    walker = etree.iterwalk(root, events=("start", "end", "comment", "pi"))
+    for event, element in walker:
+        if event in ("comment", "pi"):
+            # Only the text after them is visible
+            if element.tail:
+                strings.append(element.tail)
+            continue
+        if event == "start":
+            if element.tag in SKIP_TAGS:
+                walker.skip_subtree()
+                continue
+            if element.text:
+                strings.append(element.text)
+            if element.tag in HEADING_TAGS:
+                heading = " ".join(_text_content(element).split())
+                if heading:
+                    headings.append((HEADING_TAGS[element.tag], heading))
+            elif element.tag == "table":
+                frame = _tree_table(element)
+                if frame is not None:
+                    tables.append(frame)
+        elif element.tail and element is not root:
+            strings.append(element.tail)
+    lines = []
+    _clean_lines(strings, lines)
+    return ExtractedPage(text="\n".join(lines), headings=headings, tables=tables)
+
+
+# --- Bounded-memory mode ---
+class _Table:
+    def __init__(self):
+        self.sections = {"head": [], "body": [], "foot": []}
+        self.section = "body"
+        self.row: Optional[List[_Cell]] = None
+        self.cell: Optional[_Cell] = None
+        self.cell_text: List[str] = []
+
+
+class _StreamingTarget:
+    """lxml parser target: receives tags and text in document order and keeps
+    only what the output needs."""
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.headings: List[Tuple[int, str]] = []
+        self.tables: List[pd.DataFrame] = []
+        self._text: List[str] = []
+        self._skip = 0
+        self._heading: Optional[Tuple[int, List[str]]] = None
+        self._tables: List[_Table] = []
+
+    def _flush(self) -> None:
+        # Text between two tags is one string, however the parser chunks it
+        if self._text:
+            _clean_lines(["".join(self._text)], self.lines)
+            self._text = []
+
+    def start(self, tag, attrib):
+        self._flush()
+        if self._skip or tag in SKIP_TAGS:
+            self._skip += 1
+            return
+        if tag in HEADING_TAGS and self._heading is None:
+            self._heading = (HEADING_TAGS[tag], [])
+        if tag == "table":
+            self._tables.append(_Table())
+        elif self._tables:
+            table = self._tables[-1]
+            if tag in ("thead", "tbody", "tfoot"):
+                table.section = tag[1:] if tag != "tbody" else "body"
+            elif tag == "tr":
+                table.row = []
+                table.sections[table.section].append(table.row)
+            elif tag in ("td", "th") and table.row is not None and table.cell is None:
+                table.cell = _Cell(
+                    "",
+                    rowspan=_span(attrib.get("rowspan")),
+                    colspan=_span(attrib.get("colspan")),
+                    header=tag == "th",
+                )
+                table.cell_text = []
+
+    def end(self, tag):
+        self._flush()
+        if self._skip:
+            self._skip -= 1
+            return
+        if tag in HEADING_TAGS and self._heading is not None:
+            level, parts = self._heading
+            if HEADING_TAGS[tag] == level:
+                heading = " ".join("".join(parts).split())
+                if heading:
+                    self.headings.append((level, heading))
+                self._heading = None
+        if tag == "table" and self._tables:
+            table = self._tables.pop()
+            frame = table_frame(
+                table.sections["head"], table.sections["body"], table.sections["foot"]
+            )
+            if frame is not None:
+                self.tables.append(frame)
+        elif self._tables:
+            table = self._tables[-1]
+            if tag in ("td", "th") and table.cell is not None:
+                text = "".join(table.cell_text)
+                table.cell.text = _CELL_WHITESPACE.sub(" ", text).strip()
+                table.row.append(table.cell)
+                table.cell = None
+            elif tag in ("thead", "tfoot"):
+                table.section = "body"
+
+    def data(self, data):
+        if self._skip:
+            return
+        self._text.append(data)
+        if self._heading is not None:
+            self._heading[1].append(data)
+        for table in self._tables:
+            if table.cell is not None:
+                table.cell_text.append(data)
+
+    def comment(self, text):
+        self._flush()
+
+    def close(self) -> ExtractedPage:
+        self._flush()
+        return ExtractedPage(
+            text="\n".join(self.lines), headings=self.headings, tables=self.tables
+        )
+
+
+def _extract_streaming(html: str, feed_size: int = FEED_SIZE) -> ExtractedPage:
+    parser = etree.HTMLParser(target=_StreamingTarget())
+    for start in range(0, len(html), feed_size):
+        parser.feed(html[start : start + feed_size])
+    return parser.close()
+
+
+def extract_page(html: str, bounded: Optional[bool] = None) -> ExtractedPage:
+    """`bounded=None` picks the bounded-memory parser for pages over
+    `BOUNDED_THRESHOLD` characters."""
+    if not html or not html.strip():
+        return ExtractedPage(text="")
+    if bounded is None:
+        bounded = len(html) > BOUNDED_THRESHOLD
+    return _extract_streaming(html) if bounded else _extract_tree(html)
@@ -0,0 +1,33 @@
+import os
+import time
+import uuid
+
+# Lives next to the Chroma files so the version travels with the index
+INDEX_VERSION_PATH = "./.chroma/INDEX_VERSION"
+UNVERSIONED = "unversioned"
+
+
+def read_index_version(path: str = INDEX_VERSION_PATH) -> str:
+    try:
+        with open(path) as f:
+            return f.read().strip() or UNVERSIONED
+    except FileNotFoundError:
+        return UNVERSIONED
+
+
+def new_index_version() -> str:
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def write_index_version(version: str, path: str = INDEX_VERSION_PATH) -> str:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, path)
+    return version
+
+
+def bump_index_version(path: str = INDEX_VERSION_PATH) -> str:
+    """Marks the index as changed; call once an ingestion run has finished writing."""
+    return write_index_version(new_index_version(), path)
@@ -0,0 +1,369 @@
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from langchain_core.documents import Document
+
+# End-of-stream marker passed down the queues
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """
+    One step of a `Pipeline`. `fn(item)` returns an iterable of outputs
+    (empty or None drops the item). With `batch_size > 1`, `fn` receives a
+    list of up to that many queued items instead. A `stream` stage gets the
+    whole input iterator and yields outputs; it always runs on one worker.
+    `maxsize` bounds the stage's input queue, which is what applies
+    backpressure to the stages before it.
+    """
+
+    name: str
+    fn: Callable[[Any], Optional[Iterable[Any]]]
+    workers: int = 1
+    maxsize: int = 8
+    batch_size: int = 1
+    stream: bool = False
+
+
+@dataclass
+class StageStats:
+    items_in: int = 0
+    items_out: int = 0
+    errors: int = 0
+    busy_s: float = 0.0
+    finished_workers: int = 0
+
+
+class Pipeline:
+    """
+    Runs stages concurrently in threads connected by bounded queues, so
+    network, LLM, CPU and disk work overlap. `run(source)` yields the outputs
+    of the last stage; consume it to completion. A failing item is counted
+    and reported, and the pipeline carries on with the rest. Stages can add
+    to named `counters` (e.g. chunks embedded) with `count`.
+    """
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        report_interval: Optional[float] = None,
+        report: Callable[[str], None] = print,
+    ):
+        self.stages = stages
+        self.report_interval = report_interval
+        self.report = report
+        self.stats = [StageStats() for _ in stages]
+        self.counters: Dict[str, int] = {}
+        self.queues: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._started = 0.0
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def stage_stats(self, name: str) -> StageStats:
+        return next(
+            stats for stage, stats in zip(self.stages, self.stats) if stage.name == name
+        )
+
+    # --- Workers ---
+    def _feed(self, source: Iterable[Any]) -> None:
+        inbox = self.queues[0]
+        try:
+            for item in source:
+                inbox.put(item)
+        finally:
+            inbox.put(_DONE)
+
+    def _process(self, index: int, payload: Any, count: int) -> None:
+        stage, stats = self.stages[index], self.stats[index]
+        outbox = self.queues[index + 1]
+        start = time.perf_counter()
+        try:
+            outputs = list(stage.fn(payload) or ())
+        except Exception as e:
+            outputs = []
+            with self._lock:
+                stats.errors += count
+            self.report(f"⚠️ Stage {stage.name} failed: {e}")
+        with self._lock:
+            stats.items_in += count
+            stats.busy_s += time.perf_counter() - start
+            stats.items_out += len(outputs)
+        for output in outputs:
+            outbox.put(output)
+
+    def _worker(self, index: int) -> None:
+        stage, inbox = self.stages[index], self.queues[index]
+        done = False
+        while not done:
+            item = inbox.get()
+            if item is _DONE:
+                break
+            batch = [item]
+            while len(batch) < stage.batch_size:
+                try:
+                    item = inbox.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+            payload = batch if stage.batch_size > 1 else batch[0]
+            self._process(index, payload, len(batch))
+        # Let sibling workers see the end of the stream too
+        inbox.put(_DONE)
+        self._finish(index)
+
+    def _stream_worker(self, index: int) -> None:
+        stage, stats = self.stages[index], self.stats[index]
+        inbox, outbox = self.queues[index], self.queues[index + 1]
+
+        def items() -> Iterator[Any]:
+            while True:
+                item = inbox.get()
+                if item is _DONE:
+                    inbox.put(_DONE)
+                    return
+                with self._lock:
+                    stats.items_in += 1
+                yield item
+
+        stream = items()
+        try:
+            for output in stage.fn(stream):
+                with self._lock:
+                    stats.items_out += 1
+                outbox.put(output)
+        except Exception as e:
+            self.report(f"⚠️ Stage {stage.name} failed: {e}")
+            # Drain the rest so upstream stages are not blocked forever
+            for _ in stream:
+                with self._lock:
+                    stats.errors += 1
+        self._finish(index)
+
+    def _finish(self, index: int) -> None:
+        stage, stats = self.stages[index], self.stats[index]
+        with self._lock:
+            stats.finished_workers += 1
+            last = stats.finished_workers == (1 if stage.stream else stage.workers)
+        if last:
+            self.queues[index + 1].put(_DONE)
+
+    # --- Reporting ---
+    def report_line(self) -> str:
+        elapsed = max(time.perf_counter() - self._started, 1e-9)
+        parts = []
+        for stage, stats, inbox in zip(self.stages, self.stats, self.queues):
+            parts.append(
+                f"{stage.name} {stats.items_in}→{stats.items_out} "
+                f"({stats.items_out / elapsed:.1f}/s, "
+                f"queue {inbox.qsize()}/{stage.maxsize})"
+            )
+        return " | ".join(parts)
+
+    def summary(self) -> List[dict]:
+        elapsed = max(time.perf_counter() - self._started, 1e-9)
+        return [
+            {
+                "stage": stage.name,
+                "workers": 1 if stage.stream else stage.workers,
+                "in": stats.items_in,
+                "out": stats.items_out,
+                "errors": stats.errors,
+                "per_s": stats.items_out / elapsed,
+                # Share of worker time spent in the stage function
+                "utilization": stats.busy_s
+                / (elapsed * (1 if stage.stream else stage.workers)),
+            }
+            for stage, stats in zip(self.stages, self.stats)
+        ]
+
+    def _reporter(self, stop: threading.Event) -> None:
+        while not stop.wait(self.report_interval):
+            self.report(self.report_line())
+
+    # --- Entry point ---
+    def run(self, source: Iterable[Any]) -> Iterator[Any]:
+        self.stats = [StageStats() for _ in self.stages]
+        self.counters = {}
+        self.queues = [queue.Queue(maxsize=stage.maxsize) for stage in self.stages]
+        self.queues.append(queue.Queue(maxsize=self.stages[-1].maxsize))
+        self._started = time.perf_counter()
+
+        threads = [threading.Thread(target=self._feed, args=(source,), daemon=True)]
+        for index, stage in enumerate(self.stages):
+            target = self._stream_worker if stage.stream else self._worker
+            for _ in range(1 if stage.stream else stage.workers):
+                threads.append(
+                    threading.Thread(target=target, args=(index,), daemon=True)
+                )
+        stop = threading.Event()
+        if self.report_interval:
+            threads.append(
+                threading.Thread(target=self._reporter, args=(stop,), daemon=True)
+            )
+        for thread in threads:
+            thread.start()
+
+        results = self.queues[-1]
+        while (item := results.get()) is not _DONE:
+            yield item
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+# --- Ingestion Stages ---
+def write_chunks(collection, chunks: List[Document], vectors: List[List[float]]):
+    """Upserts chunks with precomputed embeddings into a Chroma collection."""
+    if not chunks:
+        return
+    collection.upsert(
+        ids=[doc.id or str(uuid.uuid4()) for doc in chunks],
+        embeddings=vectors,
+        documents=[doc.page_content for doc in chunks],
+        metadatas=[doc.metadata for doc in chunks],
+    )
+
+
+def stored_chunks(collection) -> List[Document]:
+    """Every chunk in a Chroma collection, with its id and metadata."""
+    stored = collection.get(include=["documents", "metadatas"])
+    return [
+        Document(id=id, page_content=text, metadata=metadata or {})
+        for id, text, metadata in zip(
+            stored["ids"], stored["documents"], stored["metadatas"]
+        )
+    ]
+
+
+def build_ingestion_pipeline(
+    *,
+    fetch: Callable[[str], Optional[str]],
+    extract: Callable[[str, str], tuple],
+    to_documents: Callable[[str, list, str], List[Document]],
+    chunker,
+    dedup_filter,
+    boilerplate,
+    embeddings,
+    collection,
+    fetch_workers: int = 4,
+    extract_workers: int = 2,
+    document_workers: int = 4,
+    embed_batch_pages: int = 4,
+    maxsize: int = 8,
+    report_interval: Optional[float] = None,
+    progress: Optional[Callable[[str, str], None]] = None,
+    table_store=None,
+    replace_sources: bool = False,
+) -> Pipeline:
+    """
+    fetch → extract → boilerplate → documents (table summaries) → chunk →
+    dedup → embed → write. Takes URLs and yields each URL once it is written.
+    `fetch(url)` returns HTML or None, `extract(html, url)` returns
+    `(text, tables)`, and `to_documents(text, tables, url)` builds Documents.
+    `progress(url, stage)` is called as each URL clears a stage, e.g. with
+    `CrawlState.set_stage` so an interrupted run can resume. With a
+    `table_store`, each page's parsed tables are also stored row by row.
+    With `replace_sources`, a page's existing chunks are replaced by its new
+    ones, for re-ingesting pages that changed. `dedup_filter` is then seeded
+    with the stored chunks, and chunks other pages share are kept, moved
+    to one of those pages.
+    """
+    progress = progress or (lambda url, stage: None)
+    if replace_sources:
+        dedup_filter.seed(stored_chunks(collection))
+
+    def fetch_stage(url):
+        html = fetch(url)
+        if not html:
+            return []
+        progress(url, "fetched")
+        return [(url, html)]
+
+    def extract_stage(page):
+        url, html = page
+        text, tables = extract(html, url)
+        if not text and not tables:
+            print(f"⚠️ Skipping {url} (no retrievable content).")
+            progress(url, "skipped")
+            return []
+        if table_store is not None:
+            table_store.replace_source(url, tables)
+        progress(url, "extracted")
+        return [(url, text, tables)]
+
+    def document_stage(page):
+        url, text, tables = page
+        docs = to_documents(text, tables, url)
+        if not docs:
+            print(f"⚠️ Skipping {url} (no valid documents).")
+            progress(url, "skipped")
+            return []
+        progress(url, "documents")
+        return [(url, docs)]
+
+    def chunk_stage(page):
+        url, docs = page
+        chunks = chunker.split_documents(docs)
+        progress(url, "chunked")
+        return [(url, chunks)]
+
+    def dedup_stage(page):
+        url, chunks = page
+        if replace_sources:
+            # Written now, so the delete in write_stage keeps moved chunks
+            moved = dedup_filter.release(url)
+            if moved:
+                collection.update(
+                    ids=[doc.id for doc in moved],
+                    metadatas=[doc.metadata for doc in moved],
+                )
+        unique = dedup_filter.filter(chunks)
+        progress(url, "deduplicated")
+        return [(url, unique)]
+
+    def embed_stage(pages):
+        chunks = [doc for _, page_chunks in pages for doc in page_chunks]
+        vectors = (
+            embeddings.embed_documents([doc.page_content for doc in chunks])
+            if chunks
+            else []
+        )
+        pipeline.count("chunks_embedded", len(chunks))
+        return [([url for url, _ in pages], chunks, vectors)]
+
+    def write_stage(batch):
+        urls, chunks, vectors = batch
+        if replace_sources and urls:
+            collection.delete(where={"source": {"$in": urls}})
+        write_chunks(collection, chunks, vectors)
+        for url in urls:
+            progress(url, "written")
+        return urls
+
+    pipeline = Pipeline(
+        [
+            Stage("fetch", fetch_stage, workers=fetch_workers, maxsize=maxsize),
+            Stage("extract", extract_stage, workers=extract_workers, maxsize=maxsize),
+            Stage("boilerplate", boilerplate.process, stream=True, maxsize=maxsize),
+            Stage(
+                "documents", document_stage, workers=document_workers, maxsize=maxsize
+            ),
+            Stage("chunk", chunk_stage, maxsize=maxsize),
+            Stage("dedup", dedup_stage, maxsize=maxsize),
+            Stage("embed", embed_stage, batch_size=embed_batch_pages, maxsize=maxsize),
+            Stage("write", write_stage, maxsize=maxsize),
+        ],
+        report_interval=report_interval,
+    )
+    return pipeline
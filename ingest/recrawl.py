@@ -0,0 +1,341 @@
+"""
+Change-frequency-aware recrawl of ingested pages.
+
+`RecrawlSchedule` keeps, for every URL, the hash of its extracted text,
+its HTTP validators (ETag / Last-Modified) and an estimate of how often it
+changes. The estimate counts the checks that found new content over the
+time observed. Both counts decay with a half-life of `HALF_LIFE`, so a
+page that starts changing is picked up. The page is revisited after
+`REVISIT_FRACTION` of its expected time between changes, within
+`MIN_INTERVAL` and `MAX_INTERVAL`. Announcements are therefore checked
+every few hours and fee pages every day or two. A page that never
+changes is checked every two weeks.
+
+`run_cycle` checks only the URLs that are due, using conditional GETs.
+It returns the pages whose text changed, for ingestion, and a
+`CycleReport` of the requests made. The text is hashed rather than the
+HTML, so markup noise such as build ids or nonces does not count as a
+change. Pages are found by the full crawl; a recrawl only refreshes
+known URLs.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from ingest.extractor import extract_page
+
+RECRAWL_SCHEDULE_PATH = "./.recrawl_schedule.sqlite"
+
+HOUR = 3600.0
+DAY = 24 * HOUR
+MIN_INTERVAL = 6 * HOUR
+MAX_INTERVAL = 14 * DAY
+# Share of a page's expected time between changes after which it is revisited;
+# lower is fresher and costs more requests (see benchmarks/bench_recrawl.py)
+REVISIT_FRACTION = 0.25
+# Revisit interval of a URL with no history
+INITIAL_INTERVAL = DAY
+# Older observations count half as much after this long
+HALF_LIFE = 90 * DAY
+
+# Outcome of a check
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+NOT_MODIFIED = "not_modified"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    content_hash TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    changes REAL NOT NULL DEFAULT 0,
+    observed REAL NOT NULL DEFAULT 0,
+    checks INTEGER NOT NULL DEFAULT 0,
+    interval REAL NOT NULL,
+    last_checked REAL,
+    last_changed REAL,
+    next_due REAL NOT NULL,
+    error TEXT,
+    needs_ingest INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS pages_due ON pages (next_due);
+"""
+
+
+def content_hash(html: str) -> str:
+    """Hash of the page's visible text."""
+    return hashlib.sha1(extract_page(html).text.encode()).hexdigest()
+
+
+def revisit_interval(changes: float, observed: float) -> float:
+    """`REVISIT_FRACTION` of the expected time between changes. A prior of one
+    change is included, so a new URL starts at `INITIAL_INTERVAL`."""
+    rate = (changes + 1) / (observed + INITIAL_INTERVAL / REVISIT_FRACTION)
+    return min(max(REVISIT_FRACTION / rate, MIN_INTERVAL), MAX_INTERVAL)
+
+
+@dataclass
+class PageSchedule:
+    url: str
+    content_hash: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    changes: float
+    observed: float
+    checks: int
+    interval: float
+    last_checked: Optional[float]
+    last_changed: Optional[float]
+    next_due: float
+    error: Optional[str]
+    # Changed content that has not made it into the index yet
+    needs_ingest: bool = False
+
+
+class RecrawlSchedule:
+    """Per-URL change history and next visit, in SQLite. Thread-safe."""
+
+    def __init__(self, path: str = RECRAWL_SCHEDULE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(pages)")}
+        if "needs_ingest" not in columns:  # schedules saved before the flag
+            self._db.execute(
+                "ALTER TABLE pages ADD COLUMN needs_ingest INTEGER NOT NULL DEFAULT 0"
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def add(self, urls, now: Optional[float] = None) -> None:
+        """Schedules URLs not seen before for a first check."""
+        now = time.time() if now is None else now
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO pages (url, interval, next_due) "
+                "VALUES (?, ?, ?)",
+                ((url, INITIAL_INTERVAL, now) for url in urls),
+            )
+
+    def get(self, url: str) -> Optional[PageSchedule]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        return PageSchedule(*row[:-1], bool(row[-1])) if row else None
+
+    def due(self, now: Optional[float] = None, limit: int = 1000) -> List[str]:
+        """URLs whose next visit has come, most overdue first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT url FROM pages WHERE next_due <= ? ORDER BY next_due LIMIT ?",
+                (now, limit),
+            ).fetchall()
+        return [url for (url,) in rows]
+
+    def record(
+        self,
+        url: str,
+        new_hash: Optional[str],
+        now: Optional[float] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> bool:
+        """
+        Records a successful check. `new_hash=None` means the server answered
+        304 Not Modified. Returns whether the content changed; the first hash
+        seen for a URL is its baseline, not a change. Clears `needs_ingest`:
+        the caller ingests what it fetched.
+        """
+        now = time.time() if now is None else now
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT content_hash, etag, last_modified, changes, observed, "
+                "last_checked, last_changed FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                row = (None, None, None, 0.0, 0.0, None, None)
+            old_hash, old_etag, old_modified, changes, observed, checked, changed_at = (
+                row
+            )
+            new_hash = new_hash or old_hash
+            changed = old_hash is not None and new_hash != old_hash
+            if checked is not None:
+                elapsed = max(now - checked, 0.0)
+                decay = 0.5 ** (elapsed / HALF_LIFE)
+                changes = changes * decay + changed
+                observed = observed * decay + elapsed
+            interval = revisit_interval(changes, observed)
+            self._db.execute(
+                "INSERT INTO pages (url, content_hash, etag, last_modified, changes, "
+                "observed, checks, interval, last_checked, last_changed, next_due, "
+                "error) VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?, NULL) "
+                "ON CONFLICT(url) DO UPDATE SET content_hash = excluded.content_hash, "
+                "etag = excluded.etag, last_modified = excluded.last_modified, "
+                "changes = excluded.changes, observed = excluded.observed, "
+                "checks = checks + 1, interval = excluded.interval, "
+                "last_checked = excluded.last_checked, "
+                "last_changed = excluded.last_changed, next_due = excluded.next_due, "
+                "error = NULL, needs_ingest = 0",
+                (
+                    url,
+                    new_hash,
+                    etag or old_etag,
+                    last_modified or old_modified,
+                    changes,
+                    observed,
+                    interval,
+                    now,
+                    now if changed else changed_at,
+                    now + interval,
+                ),
+            )
+        return changed
+
+    def record_failure(
+        self, url: str, error: str, now: Optional[float] = None
+    ) -> None:
+        """Keeps the page's history and tries again after its usual interval."""
+        now = time.time() if now is None else now
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE pages SET error = ?, next_due = ? + interval WHERE url = ?",
+                (error, now, url),
+            )
+
+    def retry(self, urls, now: Optional[float] = None) -> None:
+        """For changed pages whose ingestion failed: the next cycle fetches them
+        again in full and returns them for ingestion. Their change history is
+        left alone, so a failure does not count as another change."""
+        now = time.time() if now is None else now
+        with self._lock, self._db:
+            self._db.executemany(
+                "UPDATE pages SET needs_ingest = 1, etag = NULL, "
+                "last_modified = NULL, next_due = ? WHERE url = ?",
+                ((now, url) for url in urls),
+            )
+
+    def counts(self, now: Optional[float] = None) -> dict:
+        now = time.time() if now is None else now
+        with self._lock:
+            total, due, mean_hours = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(next_due <= ?), 0), "
+                "COALESCE(AVG(interval), 0) / 3600 FROM pages",
+                (now,),
+            ).fetchone()
+        return {"urls": total, "due": due, "mean_interval_h": round(mean_hours, 1)}
+
+
+@dataclass
+class FetchResult:
+    status: int
+    html: str = ""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    bytes: int = 0
+
+
+def conditional_fetch(
+    url: str, etag: Optional[str], last_modified: Optional[str], timeout: float = 10
+) -> FetchResult:
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    response = requests.get(url, headers=headers, timeout=timeout)
+    if response.status_code != 304:
+        response.raise_for_status()
+    return FetchResult(
+        status=response.status_code,
+        html=response.text if response.status_code != 304 else "",
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+        bytes=len(response.content),
+    )
+
+
+@dataclass
+class CycleReport:
+    due: int = 0
+    outcomes: Dict[str, int] = field(
+        default_factory=lambda: dict.fromkeys(
+            (CHANGED, UNCHANGED, NOT_MODIFIED, FAILED), 0
+        )
+    )
+    bytes: int = 0
+    fetch_s: float = 0.0
+    # Filled in by the ingestion of the changed pages
+    pages_ingested: int = 0
+    chunks_embedded: int = 0
+    embed_s: float = 0.0
+
+    @property
+    def requests(self) -> int:
+        return sum(self.outcomes.values())
+
+    def summary(self) -> List[dict]:
+        return [
+            {"measure": "URLs due", "value": self.due},
+            {"measure": "requests", "value": self.requests},
+            *(
+                {"measure": f"  {outcome}", "value": count}
+                for outcome, count in self.outcomes.items()
+            ),
+            {"measure": "downloaded MB", "value": round(self.bytes / 1e6, 2)},
+            {"measure": "fetch s", "value": round(self.fetch_s, 1)},
+            {"measure": "pages re-ingested", "value": self.pages_ingested},
+            {"measure": "chunks embedded", "value": self.chunks_embedded},
+            {"measure": "embedding s", "value": round(self.embed_s, 1)},
+        ]
+
+
+def run_cycle(
+    schedule: RecrawlSchedule,
+    fetch: Callable[..., FetchResult] = conditional_fetch,
+    now: Optional[float] = None,
+    limit: int = 1000,
+) -> Tuple[CycleReport, Dict[str, str]]:
+    """Checks the due URLs; returns the report and {url: html} of the pages to
+    ingest: those that changed, and those whose last ingestion failed."""
+    now = time.time() if now is None else now
+    report = CycleReport()
+    changed_pages: Dict[str, str] = {}
+    due = schedule.due(now, limit)
+    report.due = len(due)
+    start = time.perf_counter()
+    for url in due:
+        page = schedule.get(url)
+        try:
+            result = fetch(url, page.etag, page.last_modified)
+        except Exception as e:
+            schedule.record_failure(url, str(e), now)
+            report.outcomes[FAILED] += 1
+            continue
+        report.bytes += result.bytes
+        if result.status == 304:
+            schedule.record(url, None, now, result.etag, result.last_modified)
+            report.outcomes[NOT_MODIFIED] += 1
+            continue
+        changed = schedule.record(
+            url, content_hash(result.html), now, result.etag, result.last_modified
+        )
+        report.outcomes[CHANGED if changed else UNCHANGED] += 1
+        if changed or page.needs_ingest:
+            changed_pages[url] = result.html
+    report.fetch_s = time.perf_counter() - start
+    return report, changed_pages
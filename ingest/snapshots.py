@@ -0,0 +1,247 @@
+"""
+Versioned index snapshots with an atomically switched CURRENT pointer.
+
+An ingestion run copies the current snapshot into `<version>.building`,
+writes into the copy, then publishes it. Publishing renames the copy and
+replaces CURRENT with `os.replace`, so readers see either the old index
+or the new one, never a half-built one. `SnapshotRetriever` polls
+CURRENT and swaps in a retriever over the new snapshot without a
+restart. Queries already running on the old snapshot finish there
+before it is released.
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import PrivateAttr
+
+from ingest.index_version import (
+    INDEX_VERSION_PATH,
+    new_index_version,
+    read_index_version,
+    write_index_version,
+)
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOTS_DIR = "./.chroma-snapshots"
+# Store directories a snapshot holds, laid out as in the project root
+STORE_DIRS = (".chroma", ".chroma-extra", ".chroma-consolidated", ".tables")
+BUILDING_SUFFIX = ".building"
+# Published snapshots kept on disk, current included. Older ones may still be
+# draining queries in a serving process, which only releases them once the
+# next switch is seen, so keep at least two
+KEEP_SNAPSHOTS = int(os.getenv("KEEP_SNAPSHOTS", "3"))
+
+
+class SnapshotStore:
+    def __init__(
+        self,
+        root: str = SNAPSHOTS_DIR,
+        keep: int = KEEP_SNAPSHOTS,
+        legacy_root: str = ".",
+        index_version_path: str = INDEX_VERSION_PATH,
+    ):
+        self.root = root
+        self.keep = max(keep, 2)
+        # Unversioned stores served before the first snapshot is published
+        self.legacy_root = legacy_root
+        self.current_path = os.path.join(root, "CURRENT")
+        self.index_version_path = index_version_path
+
+    def current(self) -> Optional[str]:
+        version = read_index_version(self.current_path)
+        if not os.path.isdir(os.path.join(self.root, version)):
+            return None
+        return version
+
+    def path(self, name: Optional[str]) -> str:
+        return os.path.join(self.root, name) if name else self.legacy_root
+
+    def snapshots(self) -> List[str]:
+        """Published snapshots, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name
+            for name in os.listdir(self.root)
+            if not name.endswith(BUILDING_SUFFIX)
+            and os.path.isdir(os.path.join(self.root, name))
+        )
+
+    def pending_build(self) -> Optional[str]:
+        if not os.path.isdir(self.root):
+            return None
+        for name in sorted(os.listdir(self.root)):
+            if name.endswith(BUILDING_SUFFIX):
+                return os.path.join(self.root, name)
+        return None
+
+    def begin(self) -> str:
+        """
+        Returns the directory to build the next snapshot in. An unfinished
+        build is resumed; otherwise the current snapshot (or the legacy
+        stores) is copied, so an incremental ingestion run starts from
+        what is being served.
+        """
+        pending = self.pending_build()
+        if pending:
+            logger.info("Resuming snapshot build %s", pending)
+            return pending
+
+        # Sequence prefix keeps names in publish order within the same second
+        published = self.snapshots()
+        sequence = int(published[-1].split("-", 1)[0]) + 1 if published else 1
+        name = f"{sequence:06d}-{new_index_version()}"
+        building = os.path.join(self.root, name + BUILDING_SUFFIX)
+        seed = self.path(self.current())
+        os.makedirs(building)  # creates the snapshots directory on first use
+        for store in STORE_DIRS:
+            source = os.path.join(seed, store)
+            if os.path.isdir(source):
+                shutil.copytree(source, os.path.join(building, store))
+        return building
+
+    def publish(self, building: str) -> str:
+        """Makes a finished build current and garbage-collects old snapshots."""
+        if not building.endswith(BUILDING_SUFFIX):
+            raise ValueError(f"Not a snapshot build directory: {building}")
+        final = building[: -len(BUILDING_SUFFIX)]
+        name = os.path.basename(final)
+        os.replace(building, final)
+        write_index_version(name, self.current_path)
+        # Invalidates warm answers computed against the previous snapshot
+        write_index_version(name, self.index_version_path)
+        self.gc()
+        return name
+
+    @contextmanager
+    def build(self) -> Iterator[str]:
+        """Builds a snapshot and publishes it if the block finishes without error.
+        A failed build is kept and resumed by the next run."""
+        building = self.begin()
+        yield building
+        self.publish(building)
+
+    def gc(self) -> List[str]:
+        current = self.current()
+        published = self.snapshots()
+        removed = []
+        for name in published[: max(len(published) - self.keep, 0)]:
+            if name == current:
+                continue
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+            removed.append(name)
+        if removed:
+            logger.info("Removed old snapshots: %s", ", ".join(removed))
+        return removed
+
+
+class _Lease:
+    def __init__(self, name: Optional[str], retriever: BaseRetriever):
+        self.name = name
+        self.retriever = retriever
+        self.in_flight = 0
+        self.retired = False
+
+
+class SnapshotRetriever(BaseRetriever):
+    """
+    Serves from the current snapshot and hot-swaps to a newly published one.
+    `factory` builds the retriever for a snapshot directory. CURRENT is
+    checked at most every `check_interval` seconds, on the query path. Once
+    the last query on a replaced snapshot finishes, its retriever is passed
+    to `close`, e.g. to close its Chroma clients, so the snapshot's files
+    are no longer held open.
+    """
+
+    store: Any
+    factory: Callable[[str], BaseRetriever]
+    close: Optional[Callable[[BaseRetriever], None]] = None
+    check_interval: float = 2.0
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _swap_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _active: Optional[_Lease] = PrivateAttr(default=None)
+    _draining: List[_Lease] = PrivateAttr(default_factory=list)
+    _checked_at: float = PrivateAttr(default=0.0)
+
+    @property
+    def snapshot(self) -> Optional[str]:
+        self._refresh()
+        return self._active.name
+
+    def draining(self) -> List[Optional[str]]:
+        with self._lock:
+            return [lease.name for lease in self._draining]
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if self._active is not None and now - self._checked_at < self.check_interval:
+            return
+        # One thread builds the new retriever; the others keep serving meanwhile
+        if not self._swap_lock.acquire(blocking=self._active is None):
+            return
+        try:
+            self._checked_at = now
+            name = self.store.current()
+            if self._active is not None and name == self._active.name:
+                return
+            lease = _Lease(name, self.factory(self.store.path(name)))
+            idle = None
+            with self._lock:
+                previous, self._active = self._active, lease
+                if previous is not None:
+                    previous.retired = True
+                    if previous.in_flight:
+                        self._draining.append(previous)
+                    else:
+                        idle = previous
+            if previous is not None:
+                logger.info("Switched index snapshot %s -> %s", previous.name, name)
+            if idle is not None:
+                self._close(idle)
+        finally:
+            self._swap_lock.release()
+
+    def _acquire(self) -> _Lease:
+        self._refresh()
+        with self._lock:
+            lease = self._active
+            lease.in_flight += 1
+            return lease
+
+    def _release(self, lease: _Lease) -> None:
+        with self._lock:
+            lease.in_flight -= 1
+            drained = lease.retired and not lease.in_flight and lease in self._draining
+            if drained:
+                self._draining.remove(lease)
+        if drained:
+            logger.info("Drained index snapshot %s", lease.name)
+            self._close(lease)
+
+    def _close(self, lease: _Lease) -> None:
+        if self.close is None:
+            return
+        try:
+            self.close(lease.retriever)
+        except Exception:
+            logger.exception("Could not close index snapshot %s", lease.name)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        lease = self._acquire()
+        try:
+            return lease.retriever.invoke(query)
+        finally:
+            self._release(lease)
@@ -0,0 +1,314 @@
+"""
+SQLite store of the tables found on ingested pages, searchable row by row.
+
+Every table keeps its source URL and position on the page, its columns
+(indexed by normalized name) and its rows. Each row is also indexed in
+FTS5 together with the column names, so "fee for the foundation level"
+matches the row whose cells say "Foundation" in the table whose header
+says "Fee". A table can then be answered from the matching rows instead
+of an LLM-written summary.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+from langchain_core.documents import Document
+
+# Location inside the project root or an index snapshot
+TABLES_DIR = ".tables"
+TABLE_STORE_FILE = "tables.sqlite"
+
+# Rows returned per question, and rows shown per matching table
+MAX_ROWS = 8
+MAX_ROWS_PER_TABLE = 4
+# Question terms a row (cells plus column names) must contain to count as a
+# match; one-term questions need that term
+MIN_MATCHED_TERMS = 2
+
+STOPWORDS = frozenset(
+    """a about all am an and any are as at be can could do does for from get
+    give how i in is it list me my of on or please show tell than that the
+    there this to under what when where which who whom will with would you""".split()
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tables (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    columns TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    updated REAL NOT NULL,
+    UNIQUE (source, position)
+);
+CREATE TABLE IF NOT EXISTS columns (
+    table_id INTEGER NOT NULL REFERENCES tables (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    term TEXT NOT NULL,
+    PRIMARY KEY (table_id, position)
+);
+CREATE INDEX IF NOT EXISTS columns_term ON columns (term);
+CREATE TABLE IF NOT EXISTS rows (
+    id INTEGER PRIMARY KEY,
+    table_id INTEGER NOT NULL REFERENCES tables (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    cells TEXT NOT NULL,
+    UNIQUE (table_id, position)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS rows_fts USING fts5 (cells, header);
+"""
+
+
+def terms(text: str) -> List[str]:
+    """Lowercased words with a plural 's' removed, so 'fees' finds 'Fee'."""
+    found = []
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        found.append(word)
+    return found
+
+
+def query_terms(question: str) -> List[str]:
+    return list(dict.fromkeys(t for t in terms(question) if t not in STOPWORDS))
+
+
+def _cell(value) -> str:
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def _column_name(column) -> str:
+    # Multi-row headers come back from read_html as tuples
+    if isinstance(column, tuple):
+        parts = [_cell(part) for part in column if not str(part).startswith("Unnamed")]
+        return " / ".join(dict.fromkeys(part for part in parts if part))
+    name = _cell(column)
+    return "" if name.startswith("Unnamed") else name
+
+
+@dataclass
+class TableMatch:
+    source: str
+    position: int
+    columns: List[str]
+    rows: List[List[str]] = field(default_factory=list)
+    score: float = 0.0
+    # Share of the question's terms found in the best row's cells or columns
+    coverage: float = 0.0
+
+    def to_text(self) -> str:
+        """Compact pipe-separated rows under the column names."""
+        lines = [" | ".join(self.columns)] if any(self.columns) else []
+        lines.extend(" | ".join(row) for row in self.rows)
+        return "\n".join(lines)
+
+    def to_document(self) -> Document:
+        return Document(
+            page_content=self.to_text(),
+            metadata={
+                "source": self.source,
+                "table": self.position,
+                "kind": "table_rows",
+            },
+        )
+
+
+class TableStore:
+    """Thread-safe; `readonly=True` opens an existing store for serving."""
+
+    def __init__(self, path: str, readonly: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        if readonly:
+            self._db = sqlite3.connect(
+                f"file:{path}?mode=ro", uri=True, check_same_thread=False
+            )
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+        self._db.execute("PRAGMA foreign_keys=ON")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # --- Ingestion ---
+    def _delete_source(self, source: str) -> None:
+        for (table_id,) in self._db.execute(
+            "SELECT id FROM tables WHERE source = ?", (source,)
+        ).fetchall():
+            self._db.execute(
+                "DELETE FROM rows_fts WHERE rowid IN "
+                "(SELECT id FROM rows WHERE table_id = ?)",
+                (table_id,),
+            )
+            self._db.execute("DELETE FROM tables WHERE id = ?", (table_id,))
+
+    def replace_source(self, source: str, tables: Iterable[pd.DataFrame]) -> int:
+        """Replaces every table stored for `source`; returns the rows stored."""
+        stored = 0
+        with self._lock, self._db:
+            self._delete_source(source)
+            for position, df in enumerate(tables):
+                columns = [_column_name(column) for column in df.columns]
+                rows = [
+                    [_cell(value) for value in row]
+                    for row in df.itertuples(index=False, name=None)
+                ]
+                rows = [row for row in rows if any(row)]
+                if not rows:
+                    continue
+                table_id = self._db.execute(
+                    "INSERT INTO tables (source, position, columns, row_count, "
+                    "updated) VALUES (?, ?, ?, ?, ?)",
+                    (source, position, json.dumps(columns), len(rows), time.time()),
+                ).lastrowid
+                self._db.executemany(
+                    "INSERT INTO columns (table_id, position, name, term) "
+                    "VALUES (?, ?, ?, ?)",
+                    (
+                        (table_id, i, name, " ".join(terms(name)))
+                        for i, name in enumerate(columns)
+                    ),
+                )
+                header = " ".join(terms(" ".join(columns)))
+                for index, row in enumerate(rows):
+                    row_id = self._db.execute(
+                        "INSERT INTO rows (table_id, position, cells) VALUES (?, ?, ?)",
+                        (table_id, index, json.dumps(row)),
+                    ).lastrowid
+                    self._db.execute(
+                        "INSERT INTO rows_fts (rowid, cells, header) VALUES (?, ?, ?)",
+                        (row_id, " ".join(terms(" ".join(row))), header),
+                    )
+                stored += len(rows)
+        return stored
+
+    # --- Lookup ---
+    def search(
+        self,
+        question: str,
+        limit: int = MAX_ROWS,
+        min_terms: int = MIN_MATCHED_TERMS,
+    ) -> List[TableMatch]:
+        """Best matching rows, grouped by table, best table first."""
+        wanted = query_terms(question)
+        if not wanted:
+            return []
+        needed = min(min_terms, len(wanted))
+        match = " OR ".join(f'"{term}"' for term in wanted)
+        with self._lock:
+            candidates = self._db.execute(
+                "SELECT rows.table_id, rows.cells, rows_fts.cells, rows_fts.header, "
+                "bm25(rows_fts) FROM rows_fts JOIN rows ON rows.id = rows_fts.rowid "
+                "WHERE rows_fts MATCH ? ORDER BY bm25(rows_fts) LIMIT ?",
+                (match, limit * 8),
+            ).fetchall()
+            tables = {
+                table_id: self._db.execute(
+                    "SELECT source, position, columns FROM tables WHERE id = ?",
+                    (table_id,),
+                ).fetchone()
+                for table_id in {candidate[0] for candidate in candidates}
+            }
+
+        ranked = []
+        for table_id, cells, cell_terms, header_terms, rank in candidates:
+            in_cells = set(cell_terms.split())
+            in_header = set(header_terms.split())
+            hits = sum(term in in_cells or term in in_header for term in wanted)
+            if hits >= needed:
+                cell_hits = sum(term in in_cells for term in wanted)
+                ranked.append((cell_hits, hits, -rank, table_id, cells))
+        # Rows picked out by their own cells, dropping weak partial matches; if
+        # none are, the question is about whole tables whose columns match,
+        # e.g. "fee for each level"
+        best = max((row[0] for row in ranked), default=0)
+        ranked = [row for row in ranked if row[0] * 2 >= best]
+        ranked.sort(key=lambda row: (-row[0], -row[1], -row[2]))
+
+        matches: Dict[int, TableMatch] = {}
+        kept = 0
+        for cell_hits, hits, _, table_id, cells in ranked:
+            if table_id not in matches:
+                source, position, columns = tables[table_id]
+                matches[table_id] = TableMatch(
+                    source,
+                    position,
+                    json.loads(columns),
+                    score=cell_hits + hits,
+                    coverage=hits / len(wanted),
+                )
+            table = matches[table_id]
+            if len(table.rows) < MAX_ROWS_PER_TABLE:
+                table.rows.append(json.loads(cells))
+                kept += 1
+                if kept == limit:
+                    break
+        return sorted(matches.values(), key=lambda match: -match.score)
+
+    def tables_with_column(self, name: str) -> List[TableMatch]:
+        """Tables having a column called `name` (compared as normalized terms)."""
+        with self._lock:
+            found = self._db.execute(
+                "SELECT DISTINCT tables.source, tables.position, tables.columns "
+                "FROM columns JOIN tables ON tables.id = columns.table_id "
+                "WHERE columns.term = ? ORDER BY tables.source, tables.position",
+                (" ".join(terms(name)),),
+            ).fetchall()
+        return [
+            TableMatch(source, position, json.loads(columns))
+            for source, position, columns in found
+        ]
+
+    def counts(self) -> dict:
+        with self._lock:
+            tables, rows = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(row_count), 0) FROM tables"
+            ).fetchone()
+        return {"tables": tables, "rows": rows}
+
+
+def table_store_path(root: str = ".") -> str:
+    return os.path.join(root, TABLES_DIR, TABLE_STORE_FILE)
+
+
+# Stores kept open: the snapshot being served and the one before it, which
+# requests started before a hot-swap may still be reading
+MAX_OPEN_STORES = 2
+
+_open_stores: "OrderedDict[str, TableStore]" = OrderedDict()
+_open_lock = threading.Lock()
+
+
+def open_table_store(root: str) -> Optional[TableStore]:
+    """Read-only store in `root` (a snapshot or the project root), if ingested.
+    Snapshots are never modified once published, so each stays open until
+    newer ones replace it."""
+    with _open_lock:
+        store = _open_stores.get(root)
+        if store is None and os.path.exists(table_store_path(root)):
+            store = _open_stores[root] = TableStore(
+                table_store_path(root), readonly=True
+            )
+            while len(_open_stores) > MAX_OPEN_STORES:
+                _, oldest = _open_stores.popitem(last=False)
+                oldest.close()
+        elif store is not None:
+            _open_stores.move_to_end(root)
+        return store
@@ -0,0 +1,92 @@
+from ingest.boilerplate import BoilerplateDetector
+
+MENU = "Home | Academics | Admissions"
+FOOTER = "Copyright 2024 IIT Madras"
+SUBJECTS = "statistics python databases algorithms calculus networks".split()
+
+
+def body(i):
+    return f"The {SUBJECTS[i % len(SUBJECTS)]} course"
+
+
+def page(i, site="study.iitm.ac.in"):
+    url = f"https://{site}/ds/course-{i}.html"
+    # Numbers vary between copies of the template and still match
+    footer = FOOTER.replace("2024", str(2020 + i))
+    return (url, f"{MENU}\n{body(i)}\n{footer}", {"page": i})
+
+
+def test_warm_up_holds_pages_back_then_releases_them_cleaned():
+    detector = BoilerplateDetector(min_ratio=0.5, min_pages=3, warmup_pages=3)
+    stream = iter([page(i) for i in range(5)])
+    output = detector.process(stream)
+
+    # Nothing comes out until the site has warmed up
+    first = next(output)
+    assert detector.sites["study.iitm.ac.in"].pages == 3
+    rest = list(output)
+
+    pages = [first] + rest
+    assert [p[2]["page"] for p in pages] == [0, 1, 2, 3, 4]
+    assert [p[1] for p in pages] == [body(i) for i in range(5)]
+    assert detector.lines_removed == 10
+    assert detector.removal_ratio == 10 / 15
+
+
+def test_lines_are_stripped_only_past_the_frequency_threshold():
+    detector = BoilerplateDetector(min_ratio=0.5, min_pages=4, warmup_pages=0)
+    url = "https://study.iitm.ac.in/ds/a.html"
+    for name, text in zip("abc", (f"{MENU}\nA", f"{MENU}\nB", "Banner\nC")):
+        detector.observe(f"https://study.iitm.ac.in/ds/{name}.html", text)
+    # Too few pages for statistics yet
+    assert not detector.is_boilerplate(url, MENU)
+
+    detector.observe("https://study.iitm.ac.in/ds/d.html", "Banner\nD")
+    assert detector.is_boilerplate(url, MENU)
+    assert detector.is_boilerplate(url, " home |  ACADEMICS | admissions ")
+    assert detector.is_boilerplate(url, "Banner")
+    assert not detector.is_boilerplate(url, "A")
+    # Statistics are per site
+    assert not detector.is_boilerplate("https://example.com/a", MENU)
+
+
+def test_saved_statistics_skip_the_warm_up(tmp_path):
+    path = str(tmp_path / "boilerplate.json")
+    trained = BoilerplateDetector(min_pages=3, warmup_pages=3)
+    list(trained.process(page(i) for i in range(4)))
+    trained.save(path)
+
+    loaded = BoilerplateDetector(min_pages=3, warmup_pages=3)
+    loaded.load(path)
+    output = loaded.process(iter([page(4), page(5, site="example.com")]))
+
+    # The known site is cleaned at once; the new one still warms up
+    assert next(output)[1] == body(4)
+    assert next(output)[1].startswith(MENU)
+    assert loaded.sites["study.iitm.ac.in"].pages == 5
+
+
+def test_pruning_forgets_lines_seen_on_a_single_page():
+    detector = BoilerplateDetector(max_lines_per_site=4)
+    detector.observe("https://study.iitm.ac.in/ds/a.html", f"{MENU}\nA\nB")
+    detector.observe("https://study.iitm.ac.in/ds/b.html", f"{MENU}\nC\nD")
+
+    template = detector.sites["study.iitm.ac.in"]
+    assert len(template.line_pages) == 1
+    assert template.pages == 2
+
+
+def test_recrawled_pages_replace_their_earlier_lines(tmp_path):
+    path = str(tmp_path / "boilerplate.json")
+    detector = BoilerplateDetector(min_ratio=0.5, min_pages=3, warmup_pages=3)
+    list(detector.process(page(i) for i in range(4)))
+    detector.save(path)
+
+    # Each recrawl of a page loads the saved statistics and observes it again
+    for _ in range(3):
+        detector = BoilerplateDetector(min_ratio=0.5, min_pages=3, warmup_pages=3)
+        detector.load(path)
+        assert [p[1] for p in detector.process(iter([page(0)]))] == [body(0)]
+        detector.save(path)
+
+    assert detector.sites["study.iitm.ac.in"].pages == 4
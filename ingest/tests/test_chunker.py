@@ -0,0 +1,39 @@
+from langchain_core.documents import Document
+
+from ingest.chunker import TokenChunker, get_encoding, split_html_sections
+
+
+def test_chunks_respect_size_and_overlap():
+    chunker = TokenChunker(chunk_size=60, chunk_overlap=20)
+    lines = [f"Line {i} of the programme handbook covers one topic." for i in range(40)]
+    doc = Document(page_content="\n".join(lines), metadata={"source": "handbook"})
+
+    chunks = chunker.split_documents([doc])
+
+    encoding = get_encoding()
+    assert len(chunks) > 1
+    assert all(len(encoding.encode(c.page_content)) <= 60 for c in chunks)
+    assert all(c.metadata == {"source": "handbook"} for c in chunks)
+    # Consecutive chunks share their boundary line
+    for previous, current in zip(chunks, chunks[1:]):
+        assert previous.page_content.splitlines()[-1] in current.page_content
+    # A single line longer than a chunk is windowed on tokens
+    long_line = " ".join(["word"] * 300)
+    assert len(chunker.split_text(long_line)) > 1
+
+
+def test_html_sections_carry_header_path():
+    html = (
+        "<html><body><p>Intro</p><h1>Admissions</h1><p>Apply online.</p>"
+        "<h2>Fees</h2><p>Fee waivers exist.</p><h1>Courses</h1><p>Foundation</p>"
+        "<script>var x = 1;</script></body></html>"
+    )
+
+    sections = split_html_sections(html)
+
+    assert sections == [
+        ({}, "Intro"),
+        ({"Header 1": "Admissions"}, "Apply online."),
+        ({"Header 1": "Admissions", "Header 2": "Fees"}, "Fee waivers exist."),
+        ({"Header 1": "Courses"}, "Foundation"),
+    ]
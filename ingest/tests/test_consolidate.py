@@ -0,0 +1,55 @@
+import chromadb
+import numpy as np
+
+from ingest.consolidate import (
+    SOURCE_TAG,
+    HnswConfig,
+    StoreSource,
+    consolidate,
+    exact_top_k,
+    load_records,
+)
+
+
+def _store(path, name, ids, vectors):
+    client = chromadb.PersistentClient(path=str(path))
+    collection = client.create_collection(name)
+    collection.add(
+        ids=ids,
+        embeddings=vectors,
+        documents=[f"text of {i}" for i in ids],
+        metadatas=[{"source": f"https://site/{i}"} for i in ids],
+    )
+
+
+def test_consolidate_merges_stores_with_source_tags(tmp_path):
+    rng = np.random.default_rng(0)
+    primary = rng.normal(size=(60, 8)).astype(np.float32)
+    extra = rng.normal(size=(40, 8)).astype(np.float32)
+    # Same ids in both stores must not collide after the merge
+    _store(tmp_path / "a", "rag-a", [f"c{i}" for i in range(60)], primary)
+    _store(tmp_path / "b", "rag-b", [f"c{i}" for i in range(40)], extra)
+    sources = [
+        StoreSource(str(tmp_path / "a"), "rag-a", "primary"),
+        StoreSource(str(tmp_path / "b"), "rag-b", "extra"),
+    ]
+    target = str(tmp_path / "merged")
+
+    row = consolidate(
+        sources, target, "rag-merged", HnswConfig(m=8, ef_search=50), k=3, queries=20
+    )
+
+    assert row["records"] == 100
+    assert row["recall@3"] >= 0.9
+    merged = load_records(StoreSource(target, "rag-merged", "merged"))
+    assert len(merged) == 100
+    assert len(set(merged.ids)) == 100
+    client = chromadb.PersistentClient(path=target)
+    collection = client.get_collection("rag-merged")
+    assert collection.configuration["hnsw"]["max_neighbors"] == 8
+    extra_only = collection.get(where={SOURCE_TAG: "extra"})
+    assert len(extra_only["ids"]) == 40
+    assert extra_only["metadatas"][0]["source"].startswith("https://site/")
+
+    # Exact search finds a stored vector as its own nearest neighbour
+    assert "merged:primary:c5" in exact_top_k(merged, primary[5:6], 1)[0]
@@ -0,0 +1,32 @@
+import pytest
+
+from ingest.crawl_state import CrawlState
+
+
+@pytest.mark.parametrize("bounded_memory", [False, True])
+def test_crawl_resumes_from_persisted_frontier(tmp_path, bounded_memory):
+    path = str(tmp_path / "crawl.sqlite")
+    state = CrawlState(path, bounded_memory=bounded_memory)
+    state.enqueue([("https://site/a", 0)])
+    state.mark_visited("https://site/a")
+    state.enqueue([("https://site/b", 2), ("https://site/c", 1), ("https://site/a", 1)])
+    # Found again through a shorter path
+    state.enqueue([("https://site/b", 1)])
+    state.set_stage("https://site/a", "written")
+    state.set_stage("Acronym Glossary", "written")
+    state.close()
+
+    resumed = CrawlState(path, bounded_memory=bounded_memory)
+
+    assert resumed.next_batch() == [("https://site/b", 1), ("https://site/c", 1)]
+    assert resumed.is_known("https://site/a")
+    resumed.mark_visited("https://site/b")
+    resumed.mark_failed("https://site/c", "timeout")
+    assert resumed.next_batch() == []
+    visited = list(resumed.visited_urls(page_size=1))
+    # Documents ingested without a crawl are not crawled pages
+    assert visited == ["https://site/a", "https://site/b"]
+    assert resumed.is_known("Acronym Glossary")
+    assert list(resumed.pending_ingest(["https://site/a", "https://site/b"])) == [
+        "https://site/b"
+    ]
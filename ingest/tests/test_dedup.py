@@ -0,0 +1,46 @@
+from langchain_core.documents import Document
+
+from ingest.dedup import NearDuplicateFilter
+
+FOOTER = (
+    "Copyright IIT Madras. All rights reserved. Follow us on YouTube, LinkedIn, "
+    "Instagram and Twitter. Write to support for any queries about the program."
+)
+SYLLABUS = (
+    "Database Management Systems syllabus: relational model, SQL, normalization, "
+    "indexing and hashing, transactions, concurrency control and recovery."
+)
+
+
+def test_near_duplicates_keep_first_and_record_sources() -> None:
+    dedup_filter = NearDuplicateFilter(threshold=0.8)
+    docs = [
+        Document(page_content=FOOTER, metadata={"source": "https://a"}),
+        Document(page_content=SYLLABUS, metadata={"source": "https://a"}),
+        Document(page_content=FOOTER + " Thanks.", metadata={"source": "https://b"}),
+        Document(page_content=FOOTER, metadata={"source": "https://c"}),
+    ]
+
+    kept = dedup_filter.filter(docs)
+
+    assert [d.page_content for d in kept] == [FOOTER, SYLLABUS]
+    assert kept[0].metadata["duplicate_sources"] == "https://b | https://c"
+    assert kept[0].metadata["duplicate_count"] == 2
+    assert dedup_filter.stats.dropped == 2
+
+
+def test_late_duplicates_are_reported_as_pending_updates() -> None:
+    dedup_filter = NearDuplicateFilter(threshold=0.8)
+    first = dedup_filter.filter(
+        [Document(page_content=FOOTER, metadata={"source": "https://a"})]
+    )
+    assert dedup_filter.pending_updates() == []
+
+    second = dedup_filter.filter(
+        [Document(page_content=FOOTER, metadata={"source": "https://b"})]
+    )
+
+    assert second == []
+    updates = dedup_filter.pending_updates()
+    assert updates == first
+    assert updates[0].id and updates[0].metadata["duplicate_sources"] == "https://b"
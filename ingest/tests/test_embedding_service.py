@@ -0,0 +1,41 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from ingest.embedding_service import MicroBatcher, RemoteEmbeddings, make_server
+
+
+class SlowEmbedding(DeterministicFakeEmbedding):
+    """Records batch sizes; each forward pass takes a little while."""
+
+    batch_sizes: List[int] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.batch_sizes.append(len(texts))
+        threading.Event().wait(0.02)
+        return super().embed_documents(texts)
+
+
+def test_concurrent_queries_are_micro_batched():
+    model = SlowEmbedding(size=8, batch_sizes=[])
+    batcher = MicroBatcher(model, max_batch_size=8, max_wait_ms=20)
+    server = make_server(batcher, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = RemoteEmbeddings(f"http://127.0.0.1:{server.server_address[1]}")
+    questions = [f"question {i}" for i in range(24)]
+
+    try:
+        with ThreadPoolExecutor(max_workers=24) as pool:
+            vectors = list(pool.map(client.embed_query, questions))
+        documents = client.embed_documents(["a", "b", "c"])
+    finally:
+        server.shutdown()
+
+    reference = DeterministicFakeEmbedding(size=8)
+    assert vectors == [reference.embed_query(q) for q in questions]
+    assert documents == reference.embed_documents(["a", "b", "c"])
+    assert max(model.batch_sizes) <= 8
+    assert batcher.stats.batches < batcher.stats.requests
+    assert batcher.stats.requests == 25
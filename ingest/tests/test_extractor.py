@@ -0,0 +1,51 @@
+from io import StringIO
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from ingest.extractor import _extract_streaming, extract_page
+
+PAGE = """<!DOCTYPE html><html><head><title>IITM BS Degree</title>
+<style>p { color: red }</style><script>var tracking = 1;</script></head>
+<body><!-- navigation --><h1>Data <b>Science</b> Programme</h1>
+<p>Fees &amp; credits&nbsp;overview<br>for every level</p>
+<noscript>Please enable JavaScript</noscript>
+<div>Before<span>inner</span>after</div>
+<table><thead><tr><th>Level</th><th>Credits</th></tr></thead>
+<tbody><tr><td>Foundation</td><td>32</td></tr>
+<tr><td rowspan="2">Diploma</td><td>27</td></tr><tr><td>27</td></tr></tbody></table>
+<h2>Courses</h2>
+<table><tr><th>Code</th><th colspan="2">Course   name</th></tr>
+<tr><td>BSMA1001</td><td>Mathematics</td><td>4.0</td></tr></table>
+<p>Last   updated</p><!-- footer -->tail</body></html>"""
+
+
+def bs4_extract(html):
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    text = soup.get_text(separator="\n")
+    text = "\n".join(line.strip() for line in text.splitlines() if line.strip())
+    tables = [pd.read_html(StringIO(str(t)))[0] for t in soup.find_all("table")]
+    return text, tables
+
+
+def test_text_and_tables_match_beautifulsoup_and_read_html():
+    text, tables = bs4_extract(PAGE)
+
+    for page in (
+        extract_page(PAGE, bounded=False),
+        extract_page(PAGE, bounded=True),
+        # Text and tags split across parser feeds
+        _extract_streaming(PAGE, feed_size=7),
+    ):
+        assert page.text == text
+        assert page.headings == [(1, "Data Science Programme"), (2, "Courses")]
+        assert len(page.tables) == len(tables)
+        for frame, expected in zip(page.tables, tables):
+            pd.testing.assert_frame_equal(frame, expected)
+
+
+def test_empty_and_fragment_pages():
+    assert extract_page("").text == ""
+    assert extract_page("<p>Just a</p> fragment").text == "Just a\nfragment"
@@ -0,0 +1,201 @@
+import threading
+import time
+
+import chromadb
+from bs4 import BeautifulSoup
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import FakeListChatModel
+
+from ingest.boilerplate import BoilerplateDetector
+from ingest.chunker import TokenChunker
+from ingest.dedup import NearDuplicateFilter
+from ingest.pipeline import Pipeline, Stage, build_ingestion_pipeline
+
+FOOTER = "<p>Copyright IIT Madras. Follow us on YouTube and LinkedIn.</p>"
+SUBJECTS = (
+    "statistics python databases algorithms calculus networks "
+    "compilers vision robotics economics genomics finance"
+).split()
+PAGES = {
+    f"https://study.iitm.ac.in/ds/{subject}.html": (
+        f"<html><body><h1>{subject.title()}</h1><p>The {subject} course covers "
+        f"{subject} fundamentals with weekly {subject} assignments.</p>"
+        f"<table><tr><th>Term</th><th>Fee</th></tr><tr><td>{subject}</td>"
+        f"<td>1000</td></tr></table>{FOOTER}</body></html>"
+    )
+    for subject in SUBJECTS
+}
+
+
+def extract(html, url):
+    soup = BeautifulSoup(html, "html.parser")
+    tables = [table.get_text(" ") for table in soup.find_all("table")]
+    for table in soup.find_all("table"):
+        table.decompose()
+    return soup.get_text("\n").strip(), tables
+
+
+def test_pipeline_ingests_fixture_pages_with_fake_llm():
+    llm = FakeListChatModel(responses=["The fee table lists one term and its fee."])
+    collection = chromadb.EphemeralClient().get_or_create_collection("test-pipeline")
+    embeddings = DeterministicFakeEmbedding(size=16)
+
+    def to_documents(text, tables, url):
+        summaries = [llm.invoke(f"Summarize: {table}").content for table in tables]
+        return [Document(page_content=text, metadata={"source": url})] + [
+            Document(page_content=s, metadata={"source": url, "type": "table"})
+            for s in summaries
+        ]
+
+    pipeline = build_ingestion_pipeline(
+        fetch=PAGES.get,
+        extract=extract,
+        to_documents=to_documents,
+        chunker=TokenChunker(chunk_size=100, chunk_overlap=20),
+        dedup_filter=NearDuplicateFilter(),
+        boilerplate=BoilerplateDetector(min_pages=3, warmup_pages=3),
+        embeddings=embeddings,
+        collection=collection,
+        maxsize=2,
+    )
+    urls = list(PAGES) + ["https://study.iitm.ac.in/ds/missing.html"]
+
+    written = list(pipeline.run(urls))
+
+    assert sorted(written) == sorted(PAGES)
+    stored = collection.get()
+    # One text chunk per page; identical table summaries collapse into one
+    assert len(stored["ids"]) == len(PAGES) + 1
+    assert not any("Copyright" in text for text in stored["documents"])
+    summary = {row["stage"]: row for row in pipeline.summary()}
+    assert summary["fetch"]["in"] == len(urls)
+    assert summary["fetch"]["out"] == len(PAGES)
+    assert summary["dedup"]["errors"] == 0
+
+
+def test_bounded_queues_apply_backpressure_and_errors_are_counted():
+    in_flight = []
+    lock = threading.Lock()
+    produced = 0
+
+    def source():
+        nonlocal produced
+        for i in range(50):
+            with lock:
+                produced += 1
+            yield i
+
+    def slow(item):
+        with lock:
+            in_flight.append(produced)
+        time.sleep(0.002)
+        if item == 7:
+            raise ValueError("bad item")
+        return [item]
+
+    pipeline = Pipeline(
+        [
+            Stage("double", lambda x: [x, x], workers=3, maxsize=2),
+            Stage("slow", slow, maxsize=2),
+            Stage("batch", lambda items: [sum(items)], batch_size=4, maxsize=2),
+        ]
+    )
+
+    total = sum(pipeline.run(source()))
+
+    assert total == 2 * (sum(range(50)) - 7)
+    stats = {row["stage"]: row for row in pipeline.summary()}
+    assert stats["slow"]["errors"] == 2
+    # The source never runs far ahead of the slow stage
+    assert max(p - i // 2 for i, p in enumerate(in_flight)) <= 12
+
+
+def test_replace_sources_swaps_the_chunks_of_changed_pages():
+    collection = chromadb.EphemeralClient().get_or_create_collection("test-replace")
+    url = "https://study.iitm.ac.in/ds/fees.html"
+
+    def ingest(html, replace_sources):
+        pipeline = build_ingestion_pipeline(
+            fetch={url: html}.get,
+            extract=extract,
+            to_documents=lambda text, tables, url: [
+                Document(page_content=text, metadata={"source": url})
+            ],
+            chunker=TokenChunker(chunk_size=100, chunk_overlap=20),
+            dedup_filter=NearDuplicateFilter(),
+            boilerplate=BoilerplateDetector(),
+            embeddings=DeterministicFakeEmbedding(size=16),
+            collection=collection,
+            replace_sources=replace_sources,
+        )
+        assert list(pipeline.run([url])) == [url]
+        return pipeline
+
+    ingest("<p>The term fee is 1000 rupees.</p>", replace_sources=False)
+    pipeline = ingest("<p>The term fee is 1200 rupees.</p>", replace_sources=True)
+
+    assert collection.get()["documents"] == ["The term fee is 1200 rupees."]
+    assert pipeline.counters == {"chunks_embedded": 1}
+
+
+def test_replacing_a_page_keeps_the_chunks_other_pages_share():
+    collection = chromadb.EphemeralClient().get_or_create_collection("test-shared")
+    shared = "Fees are paid online through the student portal before each term."
+    a, b = "https://study.iitm.ac.in/ds/a.html", "https://study.iitm.ac.in/ds/b.html"
+
+    def ingest(pages, replace_sources):
+        # A fresh filter per run, as each recrawl builds one
+        dedup_filter = NearDuplicateFilter()
+        pipeline = build_ingestion_pipeline(
+            fetch={url: f"<p>{text}</p>" for url, text in pages.items()}.get,
+            extract=extract,
+            to_documents=lambda text, tables, url: [
+                Document(page_content=line, metadata={"source": url})
+                for line in text.splitlines()
+            ],
+            chunker=TokenChunker(chunk_size=100, chunk_overlap=20),
+            dedup_filter=dedup_filter,
+            boilerplate=BoilerplateDetector(),
+            embeddings=DeterministicFakeEmbedding(size=16),
+            collection=collection,
+            replace_sources=replace_sources,
+        )
+        assert sorted(pipeline.run(pages)) == sorted(pages)
+        for doc in dedup_filter.pending_updates():
+            collection.update(ids=[doc.id], metadatas=[doc.metadata])
+
+    def stored():
+        result = collection.get()
+        return {
+            text: (meta["source"], meta.get("duplicate_sources", ""))
+            for text, meta in zip(result["documents"], result["metadatas"])
+        }
+
+    ingest(
+        {
+            a: f"The statistics course has weekly quizzes.</p><p>{shared}",
+            b: f"The python course has programming exams.</p><p>{shared}",
+        },
+        replace_sources=False,
+    )
+    assert stored()[shared] == (a, b)
+
+    # Only page a changes; the shared paragraph is neither lost nor written twice
+    ingest(
+        {a: f"The statistics course has biweekly quizzes.</p><p>{shared}"},
+        replace_sources=True,
+    )
+    assert stored() == {
+        "The statistics course has biweekly quizzes.": (a, ""),
+        "The python course has programming exams.": (b, ""),
+        shared: (b, a),
+    }
+
+    # Page a drops the paragraph, which stays with page b
+    ingest({a: "The statistics course has no quizzes."}, replace_sources=True)
+    assert stored() == {
+        "The statistics course has no quizzes.": (a, ""),
+        "The python course has programming exams.": (b, ""),
+        shared: (b, ""),
+    }
@@ -0,0 +1,98 @@
+from ingest.recrawl import (
+    CHANGED,
+    DAY,
+    FAILED,
+    INITIAL_INTERVAL,
+    MIN_INTERVAL,
+    NOT_MODIFIED,
+    UNCHANGED,
+    FetchResult,
+    RecrawlSchedule,
+    content_hash,
+    run_cycle,
+)
+
+FEES = "https://study.iitm.ac.in/ds/fees.html"
+ABOUT = "https://study.iitm.ac.in/ds/about.html"
+
+
+def page(text, markup=""):
+    return f"<html><body><main><p>{text}</p></main>{markup}</body></html>"
+
+
+class Site:
+    """Fake server: the fee text changes on every other visit and its markup on
+    every visit; the about page never changes and answers 304 to its ETag."""
+
+    def __init__(self):
+        self.fee_visits = 0
+
+    def fetch(self, url, etag, last_modified):
+        if url == ABOUT:
+            if etag == "about-v1":
+                return FetchResult(status=304)
+            return FetchResult(200, page("About the programme"), etag="about-v1")
+        self.fee_visits += 1
+        text = f"Term fee {1000 + self.fee_visits // 2 * 100}"
+        return FetchResult(200, page(text, f"<script>build={self.fee_visits}</script>"))
+
+
+def test_intervals_follow_each_pages_change_rate(tmp_path):
+    schedule = RecrawlSchedule(str(tmp_path / "recrawl.sqlite"))
+    site = Site()
+    schedule.add([FEES, ABOUT], now=0)
+
+    report, changed = run_cycle(schedule, site.fetch, now=0)
+    # The first visit is the baseline
+    assert report.requests == 2 and changed == {}
+
+    outcomes = dict.fromkeys((CHANGED, UNCHANGED, NOT_MODIFIED, FAILED), 0)
+    for _ in range(12):
+        now = min(schedule.get(FEES).next_due, schedule.get(ABOUT).next_due)
+        assert schedule.due(now - 1) == []
+        report, changed = run_cycle(schedule, site.fetch, now=now)
+        assert report.requests == report.due >= 1
+        assert set(changed) <= {FEES}
+        for outcome, count in report.outcomes.items():
+            outcomes[outcome] += count
+
+    fees, about = schedule.get(FEES), schedule.get(ABOUT)
+    assert MIN_INTERVAL <= fees.interval < INITIAL_INTERVAL < about.interval
+    assert about.checks < fees.checks
+    assert about.last_changed is None
+    assert outcomes[NOT_MODIFIED] == about.checks - 1
+    # Markup-only changes are not content changes
+    assert outcomes[UNCHANGED] > 0 and outcomes[CHANGED] > 0
+    schedule.close()
+
+
+def test_failed_fetches_and_ingestion_are_retried(tmp_path):
+    schedule = RecrawlSchedule(str(tmp_path / "recrawl.sqlite"))
+    schedule.record(FEES, content_hash(page("Term fee 1000")), now=0)
+
+    def unreachable(url, etag, last_modified):
+        raise TimeoutError("timed out")
+
+    report, _ = run_cycle(schedule, unreachable, now=DAY)
+    assert report.outcomes[FAILED] == 1
+    assert schedule.get(FEES).error == "timed out"
+    assert schedule.due(DAY) == []
+
+    def updated(url, etag, last_modified):
+        if etag == "v2":
+            return FetchResult(status=304)
+        return FetchResult(200, page("Term fee 1100"), etag="v2")
+
+    _, changed = run_cycle(schedule, updated, now=3 * DAY)
+    assert list(changed) == [FEES]
+    changes = schedule.get(FEES).changes
+    # Ingestion failed: fetched again at once and re-ingested though unchanged
+    schedule.retry(changed, now=3 * DAY)
+    assert schedule.due(3 * DAY) == [FEES]
+    report, changed = run_cycle(schedule, updated, now=3 * DAY)
+    assert list(changed) == [FEES]
+    # The retry is not another change to the page
+    assert report.outcomes[UNCHANGED] == 1
+    assert schedule.get(FEES).changes == changes
+    assert not schedule.get(FEES).needs_ingest
+    schedule.close()
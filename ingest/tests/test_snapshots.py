@@ -0,0 +1,107 @@
+import os
+import threading
+from typing import List
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from ingest.snapshots import SnapshotRetriever, SnapshotStore
+
+
+class DirectoryRetriever(BaseRetriever):
+    """Returns the text stored in the snapshot, optionally blocking first."""
+
+    root: str
+    release: threading.Event
+    started: threading.Event
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        self.started.set()
+        self.release.wait(timeout=5)
+        with open(os.path.join(self.root, ".chroma", "data")) as f:
+            return [Document(page_content=f.read())]
+
+
+def _write(root: str, text: str) -> None:
+    os.makedirs(os.path.join(root, ".chroma"), exist_ok=True)
+    with open(os.path.join(root, ".chroma", "data"), "w") as f:
+        f.write(text)
+
+
+def test_hot_swap_drains_in_flight_queries(tmp_path):
+    legacy = tmp_path / "legacy"
+    _write(str(legacy), "v0")
+    store = SnapshotStore(
+        str(tmp_path / "snapshots"),
+        keep=2,
+        legacy_root=str(legacy),
+        index_version_path=str(tmp_path / "INDEX_VERSION"),
+    )
+    release, started = threading.Event(), threading.Event()
+    release.set()
+    closed = []
+    retriever = SnapshotRetriever(
+        store=store,
+        factory=lambda root: DirectoryRetriever(
+            root=root, release=release, started=started
+        ),
+        close=lambda old: closed.append(old.root),
+        check_interval=0,
+    )
+    assert retriever.invoke("q")[0].page_content == "v0"
+
+    # A query still running on the old index when the new snapshot is published
+    release.clear()
+    started.clear()
+    results = []
+    slow = threading.Thread(target=lambda: results.extend(retriever.invoke("q")))
+    slow.start()
+    assert started.wait(timeout=5)
+
+    with store.build() as building:
+        # Seeded from what is served; readers never see this directory
+        assert open(os.path.join(building, ".chroma", "data")).read() == "v0"
+        _write(building, "v1")
+    first = store.current()
+
+    assert retriever.snapshot == first
+    assert retriever.draining() == [None]
+    # Still serving a query: not closed yet
+    assert closed == []
+    release.set()
+    slow.join(timeout=5)
+    assert results[0].page_content == "v0"
+    assert retriever.draining() == []
+    assert closed == [str(legacy)]
+    assert retriever.invoke("q")[0].page_content == "v1"
+
+    for version in ("v2", "v3"):
+        with store.build() as building:
+            _write(building, version)
+    assert retriever.invoke("q")[0].page_content == "v3"
+    # Nothing was running on the previous snapshot: closed at the swap
+    assert closed == [str(legacy), store.path(first)]
+    assert open(tmp_path / "INDEX_VERSION").read() == store.current()
+    # The oldest snapshot is garbage-collected; current and previous are kept
+    assert first not in store.snapshots()
+    assert len(store.snapshots()) == 2
+
+
+def test_failed_build_is_resumed_not_published(tmp_path):
+    store = SnapshotStore(
+        str(tmp_path / "snapshots"),
+        legacy_root=str(tmp_path),
+        index_version_path=str(tmp_path / "INDEX_VERSION"),
+    )
+    try:
+        with store.build() as building:
+            _write(building, "partial")
+            raise RuntimeError("crawl interrupted")
+    except RuntimeError:
+        pass
+
+    assert store.current() is None
+    assert store.begin() == building
@@ -0,0 +1,80 @@
+import pandas as pd
+
+from ingest import table_store
+from ingest.table_store import TableStore, open_table_store, table_store_path
+
+FEES = pd.DataFrame(
+    {
+        "Level": ["Foundation", "Diploma", "BSc Degree"],
+        "Fee (INR)": [32000, 62500, 94500],
+        "Credits": [32, 54, 142],
+    }
+)
+COURSES = pd.DataFrame(
+    {
+        "Code": ["BSCS2001", "BSCS2003", "BSMS2001"],
+        "Course": [
+            "Database Management Systems",
+            "Modern Application Development I",
+            "Business Data Management",
+        ],
+        "Level": ["Diploma", "Diploma", "Diploma"],
+    }
+)
+
+
+def test_search_returns_matching_rows_with_provenance(tmp_path):
+    store = TableStore(table_store_path(str(tmp_path)))
+    assert store.replace_source("https://site/fees", [FEES]) == 3
+    store.replace_source("https://site/courses", [pd.DataFrame(), COURSES])
+
+    matches = store.search("What are the fees for the foundation level?")
+
+    assert matches[0].source == "https://site/fees"
+    assert matches[0].rows[0] == ["Foundation", "32000", "32"]
+    assert matches[0].coverage == 1.0
+    # A weak partial match: two of the question's six terms
+    partial = store.search("refund policy for diploma fee after withdrawal")
+    assert partial and partial[0].coverage < 0.6
+    assert matches[0].to_text().splitlines() == [
+        "Level | Fee (INR) | Credits",
+        "Foundation | 32000 | 32",
+    ]
+    courses = store.search("course code of database management systems")
+    assert courses[0].source == "https://site/courses"
+    assert courses[0].position == 1
+    assert courses[0].rows == [["BSCS2001", "Database Management Systems", "Diploma"]]
+    whole = store.search("fee for each level")
+    assert [len(match.rows) for match in whole] == [3]
+    assert store.search("what is the weather like today") == []
+    assert [t.source for t in store.tables_with_column("fee inr")] == [
+        "https://site/fees"
+    ]
+
+    # Re-ingesting a page replaces its tables
+    store.replace_source("https://site/fees", [FEES.head(1)])
+    assert store.counts() == {"tables": 2, "rows": 4}
+    assert store.search("diploma fee") == []
+    store.close()
+
+    served = open_table_store(str(tmp_path))
+    assert served.search("foundation fee")[0].rows == [["Foundation", "32000", "32"]]
+    assert open_table_store(str(tmp_path / "missing")) is None
+
+
+def test_only_the_latest_snapshots_stay_open(tmp_path, monkeypatch):
+    monkeypatch.setattr(table_store, "_open_stores", type(table_store._open_stores)())
+    roots = [str(tmp_path / f"snapshot-{i}") for i in range(3)]
+    for root in roots:
+        writer = TableStore(table_store_path(root))
+        writer.replace_source("https://site/fees", [FEES])
+        writer.close()
+
+    first = open_table_store(roots[0])
+    open_table_store(roots[1])
+    assert open_table_store(roots[0]) is first
+    # Serving a third snapshot closes the least recently used one
+    open_table_store(roots[2])
+
+    assert list(table_store._open_stores) == [roots[0], roots[2]]
+    assert open_table_store(roots[0]).search("foundation fee")
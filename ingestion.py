@@ -1,4 +1,6 @@
+import os
 import re
+from typing import Optional
 from urllib.parse import urljoin, urlparse
 
 import requests
@@ -12,8 +14,21 @@ from langchain_chroma import Chroma
 from langchain_community.document_loaders import WebBaseLoader
 from langchain_huggingface import HuggingFaceEmbeddings
 
+from ingest.consolidate import (CONSOLIDATED_COLLECTION, CONSOLIDATED_PATH,
+                                SOURCE_TAG)
+from ingest.embedding_service import RemoteEmbeddings
+from ingest.index_version import read_index_version
+from ingest.snapshots import SnapshotRetriever, SnapshotStore
+from ingest.table_store import TableStore, open_table_store
+
 load_dotenv()
-embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+# A shared embedding service (`python -m ingest.embedding_service`) loads the
+# model once for every app process and batches their queries together
+EMBEDDING_SERVICE_URL = os.getenv("EMBEDDING_SERVICE_URL")
+if EMBEDDING_SERVICE_URL:
+    embeddings = RemoteEmbeddings(EMBEDDING_SERVICE_URL)
+else:
+    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
 
 
 def clean_text(text: str) -> str:
@@ -175,20 +190,63 @@ def extract_all_internal_links(base_url: str, max_depth=2) -> list[str]:
 #     embedding_function=embeddings,
 # ).as_retriever()
 
-retriever1 = Chroma(
-    collection_name="rag-chroma",
-    persist_directory="./.chroma",
-    embedding_function=embeddings,
-).as_retriever(search_kwargs={"k": 2})
-
-retriever2 = Chroma(
-    collection_name="rag-chroma-extra",
-    persist_directory="./.chroma-extra",
-    embedding_function=embeddings,
-).as_retriever(search_kwargs={"k": 3})
 
-# Combine both
-retriever = EnsembleRetriever(retrievers=[retriever1, retriever2], weights=[0.3, 0.7])
+def build_retriever(root: str = ".") -> EnsembleRetriever:
+    """Ensemble over the stores in `root`: the project root or a snapshot."""
+    consolidated_path = os.path.join(root, CONSOLIDATED_PATH)
+    if os.path.isdir(consolidated_path):
+        # Both stores merged into one index by `python -m ingest.consolidate`;
+        # filtering on the source tag keeps the per-store k and weights
+        consolidated = Chroma(
+            collection_name=CONSOLIDATED_COLLECTION,
+            persist_directory=consolidated_path,
+            embedding_function=embeddings,
+        )
+        retriever1 = consolidated.as_retriever(
+            search_kwargs={"k": 2, "filter": {SOURCE_TAG: "primary"}}
+        )
+        retriever2 = consolidated.as_retriever(
+            search_kwargs={"k": 3, "filter": {SOURCE_TAG: "extra"}}
+        )
+    else:
+        retriever1 = Chroma(
+            collection_name="rag-chroma",
+            persist_directory=os.path.join(root, ".chroma"),
+            embedding_function=embeddings,
+        ).as_retriever(search_kwargs={"k": 2})
+
+        retriever2 = Chroma(
+            collection_name="rag-chroma-extra",
+            persist_directory=os.path.join(root, ".chroma-extra"),
+            embedding_function=embeddings,
+        ).as_retriever(search_kwargs={"k": 3})
+
+    # Combine both
+    return EnsembleRetriever(retrievers=[retriever1, retriever2], weights=[0.3, 0.7])
+
+
+def close_retriever(retriever: EnsembleRetriever) -> None:
+    """Closes the Chroma clients of a retriever from `build_retriever`."""
+    for inner in retriever.retrievers:
+        inner.vectorstore._client.close()
+
+
+# Follows the published index snapshot, switching without a restart
+snapshots = SnapshotStore()
+retriever = SnapshotRetriever(
+    store=snapshots, factory=build_retriever, close=close_retriever
+)
+
+
+def index_version() -> str:
+    """Version of the index being served: the snapshot the retriever is on,
+    or the legacy stores' INDEX_VERSION."""
+    return retriever.snapshot or read_index_version()
+
+
+def table_store() -> Optional[TableStore]:
+    """Table rows stored with the snapshot being served, if it has any."""
+    return open_table_store(snapshots.path(retriever.snapshot))
 
 # if __name__ == "__main__":
 #     print(f"✓ Ingested {len(all_chunks)} chunks into Chroma.")
@@ -1,24 +1,62 @@
 import os
 import re
+import sys
 import uuid
-from io import StringIO
-from typing import List, Tuple
+from itertools import chain
+from typing import Callable, Iterable, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 
 import pandas as pd
 import requests
 from bs4 import BeautifulSoup
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
 from langchain_groq import ChatGroq
 from langchain_huggingface import HuggingFaceEmbeddings
+from tabulate import tabulate
+
+from ingest.boilerplate import BoilerplateDetector
+from ingest.chunker import TokenChunker
+from ingest.consolidate import (
+    CONSOLIDATED_PATH,
+    consolidate,
+    read_config,
+    sources_in,
+)
+from ingest.crawl_state import WRITTEN, CrawlState
+from ingest.dedup import NearDuplicateFilter
+from ingest.extractor import extract_page
+from ingest.pipeline import Pipeline, build_ingestion_pipeline
+from ingest.recrawl import (
+    RECRAWL_SCHEDULE_PATH,
+    CycleReport,
+    RecrawlSchedule,
+    content_hash,
+    run_cycle,
+)
+from ingest.snapshots import SnapshotStore
+from ingest.table_store import TableStore, table_store_path
 
 # --- CONFIGURATION ---
 GROQ_KEY = os.getenv("GROQ_API_KEY")
 os.environ["LANGCHAIN_PROJECT"] = "rag-project-ingestion"
 llm = ChatGroq(groq_api_key=GROQ_KEY, model_name="llama3-70b-8192")
 embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+# MinHash similarity above which two chunks are treated as near-duplicates
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+# Per-site line statistics learned by the boilerplate detector, reused across crawls
+BOILERPLATE_STATS_PATH = "./.boilerplate_stats.json"
+# Built once: loads the tokenizer a single time for the whole crawl
+chunker = TokenChunker(chunk_size=500, chunk_overlap=100)
+# Seconds between live per-stage throughput / queue depth lines
+PIPELINE_REPORT_INTERVAL = float(os.getenv("PIPELINE_REPORT_INTERVAL", "10"))
+# Frontier, visited set and ingestion progress; delete to start a crawl from scratch
+CRAWL_STATE_PATH = "./.crawl_state.sqlite"
+# Keep crawl bookkeeping on disk only, for very large sites
+CRAWL_BOUNDED_MEMORY = os.getenv("CRAWL_BOUNDED_MEMORY", "0") == "1"
+# Tables are always stored row by row for direct lookup; TABLE_SUMMARIES=0 also
+# skips the LLM-written summary of each table
+TABLE_SUMMARIES = os.getenv("TABLE_SUMMARIES", "1") != "0"
 
 # --- Acronym Definitions ---
 ACRONYM_MAP = {
@@ -45,66 +83,75 @@ ACRONYM_MAP = {
 }
 
 
-# --- Extract All Internal Links ---
-def extract_all_internal_links(base_url: str, max_depth=2) -> list[str]:
-    visited = set()
-    to_visit = [(base_url, 0)]
+# --- Crawl Internal Links ---
+def crawl_internal_links(base_url: str, state: CrawlState, max_depth=2):
+    """Breadth-first crawl whose frontier lives in `state`; resumes if interrupted."""
     domain = urlparse(base_url).netloc
+    if not state.is_known(base_url):
+        state.enqueue([(base_url, 0)])
+
+    while batch := state.next_batch():
+        for current_url, depth in batch:
+            try:
+                response = requests.get(current_url, timeout=10)
+                response.raise_for_status()
+                soup = BeautifulSoup(response.text, "html.parser")
+            except Exception as e:
+                print(f"Failed to access {current_url}: {e}")
+                state.mark_failed(current_url, str(e))
+                continue
+
+            links = []
+            if depth < max_depth:
+                for a_tag in soup.find_all("a", href=True):
+                    href = a_tag["href"]
+                    full_url = urljoin(current_url, href)
+                    parsed = urlparse(full_url)
+
+                    # Skip external links and PDFs
+                    if parsed.netloc == domain:
+                        clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+                        if clean_url.endswith(".pdf"):
+                            continue
+                        links.append((clean_url, depth + 1))
+            state.enqueue(links)
+            state.mark_visited(current_url)
 
-    while to_visit:
-        current_url, depth = to_visit.pop()
-        if current_url in visited or depth > max_depth:
-            continue
-        visited.add(current_url)
-
-        try:
-            response = requests.get(current_url, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-        except Exception as e:
-            print(f"Failed to access {current_url}: {e}")
-            continue
-
-        for a_tag in soup.find_all("a", href=True):
-            href = a_tag["href"]
-            full_url = urljoin(current_url, href)
-            parsed = urlparse(full_url)
 
-            # Skip external links and PDFs
-            if parsed.netloc == domain:
-                clean_url = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
-                if clean_url.endswith(".pdf"):
-                    continue
-                if clean_url not in visited:
-                    to_visit.append((clean_url, depth + 1))
-
-    return list(sorted(visited))
+# --- Extract All Internal Links ---
+def extract_all_internal_links(
+    base_url: str, max_depth=2, state: Optional[CrawlState] = None
+) -> list[str]:
+    state = state or CrawlState(":memory:")
+    crawl_internal_links(base_url, state, max_depth=max_depth)
+    return list(state.visited_urls())
 
 
-# --- Extract Text and Tables ---
-def extract_text_and_tables(url: str) -> Tuple[str, List[pd.DataFrame]]:
+# --- Fetch Page ---
+def fetch_html(url: str) -> str:
     try:
         response = requests.get(url, timeout=10)
         response.raise_for_status()
     except Exception as e:
         print(f"Failed to retrieve {url}: {e}")
-        return "", []
+        return ""
+    return response.text
 
-    soup = BeautifulSoup(response.text, "html.parser")
-    for tag in soup(["script", "style", "noscript"]):
-        tag.decompose()
 
-    text = soup.get_text(separator="\n")
-    text = "\n".join(line.strip() for line in text.splitlines() if line.strip())
+# --- Extract Text and Tables ---
+def extract_html(html: str, url: str) -> Tuple[str, List[pd.DataFrame]]:
+    # One lxml parse for the text and every table
+    try:
+        page = extract_page(html)
+    except Exception as e:
+        print(f"Failed to parse {url}: {e}")
+        return "", []
+    return page.text, page.tables
 
-    tables = []
-    for index, table in enumerate(soup.find_all("table")):
-        try:
-            df = pd.read_html(StringIO(str(table)))[0]
-            tables.append(df)
-        except Exception as e:
-            print(f"Failed to parse table {index} on {url}: {e}")
-    return text, tables
+
+def extract_text_and_tables(url: str) -> Tuple[str, List[pd.DataFrame]]:
+    html = fetch_html(url)
+    return extract_html(html, url) if html else ("", [])
 
 
 # --- Expand Acronyms ---
@@ -144,7 +191,8 @@ def create_documents_from_text_and_tables(
         documents.append(Document(page_content=expanded_text, metadata={"source": url}))
 
     # Each table summary as its own document
-    for df in tables:
+    summarized = tables if TABLE_SUMMARIES else []
+    for df in summarized:
         summary = summarize_table(df, url)
         expanded_summary = expand_acronyms(summary, ACRONYM_MAP)
         if expanded_summary:
@@ -156,14 +204,11 @@ def create_documents_from_text_and_tables(
 
 # --- Chunk Documents ---
 def chunk_documents(documents: List[Document]) -> List[Document]:
-    splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-        chunk_size=500, chunk_overlap=100
-    )
-    return splitter.split_documents(documents)
+    return chunker.split_documents(documents)
 
 
 # --- Ingest to Chroma ---
-def ingest_to_chroma(documents: List[Document]):
+def ingest_to_chroma(documents: List[Document], persist_directory: str = "./.chroma"):
     if not documents:
         print("⚠️ No documents to ingest. Skipping.")
         return
@@ -172,39 +217,150 @@ def ingest_to_chroma(documents: List[Document]):
         documents=documents,
         collection_name="rag-chroma",
         embedding=embeddings,
-        persist_directory="./.chroma",
+        persist_directory=persist_directory,
     )
     print("✓ Ingested into Chroma.")
 
 
+# --- Update Duplicate Sources ---
+def update_duplicate_sources(
+    documents: List[Document], persist_directory: str = "./.chroma"
+):
+    """Writes `duplicate_sources` found after a representative chunk was ingested."""
+    if not documents:
+        return
+    vectorstore = Chroma(
+        collection_name="rag-chroma",
+        embedding_function=embeddings,
+        persist_directory=persist_directory,
+    )
+    vectorstore._collection.update(
+        ids=[doc.id for doc in documents],
+        metadatas=[doc.metadata for doc in documents],
+    )
+    print(f"✓ Updated duplicate sources on {len(documents)} chunks.")
+
+
 # --- Ingest Acronyms ---
-def ingest_acronym_definitions(acronym_map: dict):
+def ingest_acronym_definitions(acronym_map: dict, persist_directory: str = "./.chroma"):
     glossary_text = "\n".join(f"{k}: {v}" for k, v in acronym_map.items())
     doc = Document(page_content=glossary_text, metadata={"source": "Acronym Glossary"})
     chunks = chunk_documents([doc])
-    ingest_to_chroma(chunks)
+    ingest_to_chroma(chunks, persist_directory)
     print("✓ Acronym glossary ingested")
 
 
 # --- Main Processing Pipeline ---
-def process_urls(url_list: List[str]):
-    for url in url_list:
-        print(f"\n--- Processing {url} ---")
-        text, tables = extract_text_and_tables(url)
-
-        if not text and not tables:
-            print(f"⚠️ Skipping {url} (no retrievable content).")
-            continue
-
-        docs = create_documents_from_text_and_tables(text, tables, url)
-        if not docs:
-            print(f"⚠️ Skipping {url} (no valid documents).")
-            continue
-
-        chunked_docs = chunk_documents(docs)
-        ingest_to_chroma(chunked_docs)
+def process_urls(
+    url_list: Iterable[str],
+    dedup_threshold: float = DEDUP_THRESHOLD,
+    state: Optional[CrawlState] = None,
+    persist_directory: str = "./.chroma",
+    table_store: Optional[TableStore] = None,
+    fetch: Callable[[str], Optional[str]] = fetch_html,
+    replace_sources: bool = False,
+) -> Tuple[List[str], Pipeline]:
+    """Ingests the URLs; returns those written and the pipeline, for its stats.
+    `replace_sources` replaces the chunks of pages ingested before."""
+    dedup_filter = NearDuplicateFilter(threshold=dedup_threshold)
+    boilerplate = BoilerplateDetector()
+    if os.path.exists(BOILERPLATE_STATS_PATH):
+        boilerplate.load(BOILERPLATE_STATS_PATH)
+    vectorstore = Chroma(
+        collection_name="rag-chroma",
+        embedding_function=embeddings,
+        persist_directory=persist_directory,
+    )
+
+    pipeline = build_ingestion_pipeline(
+        fetch=fetch,
+        extract=extract_html,
+        to_documents=create_documents_from_text_and_tables,
+        chunker=chunker,
+        dedup_filter=dedup_filter,
+        boilerplate=boilerplate,
+        embeddings=embeddings,
+        collection=vectorstore._collection,
+        report_interval=PIPELINE_REPORT_INTERVAL,
+        progress=state.set_stage if state else None,
+        table_store=table_store,
+        replace_sources=replace_sources,
+    )
+    if state:
+        # Resume: URLs written by an earlier run are not processed again
+        url_list = state.pending_ingest(url_list)
+    written = []
+    for url in pipeline.run(url_list):
+        written.append(url)
         print(f"✓ Finished processing: {url}")
 
+    print(tabulate(pipeline.summary(), headers="keys", floatfmt=".2f"))
+    update_duplicate_sources(dedup_filter.pending_updates(), persist_directory)
+    boilerplate.save(BOILERPLATE_STATS_PATH)
+    print(
+        f"✓ Boilerplate: removed {boilerplate.lines_removed} of "
+        f"{boilerplate.lines_in} lines ({boilerplate.removal_ratio:.0%})"
+    )
+    print(f"✓ Deduplication: {dedup_filter.stats.summary()}")
+    if table_store is not None:
+        print(f"✓ Table store: {table_store.counts()}")
+    return written, pipeline
+
+
+def reconsolidate(snapshot: str) -> None:
+    """Keeps the merged collection in step with the stores it was built from."""
+    consolidated = os.path.join(snapshot, CONSOLIDATED_PATH)
+    if os.path.isdir(consolidated):
+        consolidate(
+            sources_in(snapshot), consolidated, config=read_config(consolidated)
+        )
+        print("✓ Re-consolidated Chroma stores")
+
+
+def tracking_fetch(schedule: RecrawlSchedule) -> Callable[[str], str]:
+    """`fetch_html` that records each page's content hash as the recrawl
+    baseline, so the first recrawl only re-ingests pages changed since."""
+
+    def fetch(url: str) -> str:
+        html = fetch_html(url)
+        if html:
+            schedule.record(url, content_hash(html))
+        return html
+
+    return fetch
+
+
+# --- Recrawl ---
+def recrawl_changed_pages(
+    snapshots: SnapshotStore, schedule: RecrawlSchedule
+) -> CycleReport:
+    """Checks the URLs that are due and re-ingests the pages that changed into a
+    new index snapshot. Nothing is published when no page changed."""
+    report, changed = run_cycle(schedule)
+    if not changed:
+        return report
+    written = []
+    try:
+        with snapshots.build() as snapshot:
+            table_store = TableStore(table_store_path(snapshot))
+            written, pipeline = process_urls(
+                list(changed),
+                persist_directory=os.path.join(snapshot, ".chroma"),
+                table_store=table_store,
+                fetch=changed.get,
+                replace_sources=True,
+            )
+            table_store.close()
+            reconsolidate(snapshot)
+        print(f"✓ Published index snapshot {snapshots.current()}")
+        report.chunks_embedded = pipeline.counters.get("chunks_embedded", 0)
+        report.embed_s = pipeline.stage_stats("embed").busy_s
+    finally:
+        report.pages_ingested = len(written)
+        # Pages that did not make it into the index are retried next cycle
+        schedule.retry(set(changed) - set(written))
+    return report
+
 
 # --- Entry Point ---
 if __name__ == "__main__":
@@ -214,11 +370,40 @@ if __name__ == "__main__":
         "https://docs.google.com/document/d/e/2PACX-1vSHXM0T-Rl2h0M9_33mEGChYIHo29UUJ0coR5YEt1_KfFaybnHlBUawBODHUwlBKqjMTc2Ie18gRRnm/pub",
     ]
 
-    # Ingest acronyms
-    ingest_acronym_definitions(ACRONYM_MAP)
-
-    # Crawl site and ingest
-    all_urls = urls + extract_all_internal_links(
-        "https://study.iitm.ac.in/ds/", max_depth=11
-    )
-    process_urls(all_urls)
+    snapshots = SnapshotStore()
+    schedule = RecrawlSchedule(RECRAWL_SCHEDULE_PATH)
+
+    # `--recrawl`: refresh only the pages that are due and have changed
+    if "--recrawl" in sys.argv[1:]:
+        cycle = recrawl_changed_pages(snapshots, schedule)
+        print(tabulate(cycle.summary(), headers="keys", floatfmt=".2f"))
+        print(f"✓ Recrawl schedule: {schedule.counts()}")
+        sys.exit(0)
+
+    crawl_state = CrawlState(CRAWL_STATE_PATH, bounded_memory=CRAWL_BOUNDED_MEMORY)
+
+    # Written into a copy of the served index, published once complete
+    with snapshots.build() as snapshot:
+        store = os.path.join(snapshot, ".chroma")
+
+        # Ingest acronyms
+        if crawl_state.stage_of("Acronym Glossary") != WRITTEN:
+            ingest_acronym_definitions(ACRONYM_MAP, store)
+            crawl_state.set_stage("Acronym Glossary", WRITTEN)
+
+        # Crawl site and ingest
+        crawl_internal_links("https://study.iitm.ac.in/ds/", crawl_state, max_depth=11)
+        table_store = TableStore(table_store_path(snapshot))
+        process_urls(
+            chain(urls, crawl_state.visited_urls()),
+            state=crawl_state,
+            persist_directory=store,
+            table_store=table_store,
+            fetch=tracking_fetch(schedule),
+        )
+        table_store.close()
+        schedule.add(chain(urls, crawl_state.visited_urls()))
+        print(f"✓ Crawl state: {crawl_state.counts()}")
+        reconsolidate(snapshot)
+    print(f"✓ Published index snapshot {snapshots.current()}")
+    print(f"✓ Recrawl schedule: {schedule.counts()}")
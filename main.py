@@ -4,25 +4,24 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import streamlit as st
-from graph.graph import app  # Your RAG pipeline
-
-# --- Greeting Handler ---
-def is_greeting(message):
-    greetings = ["hi", "hello", "hey", "good morning", "good evening", "good afternoon"]
-    return message.lower().strip() in greetings
-
-def is_identity_question(message: str) -> bool:
-    identity_keywords = [
-        "who are you",
-        "what is your name",
-        "tell me about yourself",
-        "what can you do",
-        "what are you",
-        "are you a bot",
-        "are you human",
-    ]
-    msg = message.lower().strip()
-    return any(k in msg for k in identity_keywords)
+from graph.chat_history import ChatHistory, render_history, render_sources_html
+from graph.consts import (
+    GREETING_RESPONSE,
+    IDENTITY_RESPONSE,
+    MODEL_OPTIONS,
+    SAMPLE_QUESTIONS,
+)
+from graph.intent import GREETING, IDENTITY, classify_intent
+from graph.service import (  # Your RAG pipeline
+    answer_question,
+    collect_sources,
+    start_warm_answers,
+    warm_answer,
+)
+from graph.session import SessionWorkingSet
+
+# Precomputes sample/popular answers in the background (once per process)
+start_warm_answers()
 
 try:
     # --- Page config ---
@@ -82,20 +81,15 @@ try:
 
     # --- Initialize Chat State ---
     if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []
+        st.session_state.chat_history = ChatHistory()
+    if "working_set" not in st.session_state:
+        st.session_state.working_set = SessionWorkingSet()
 
     # --- Sidebar ---
     with st.sidebar:
         st.subheader("🧠 Choose Model")
         # Define the models
-        default_model_options = [
-            "llama-3.1-8b-instant",
-            "llama-3.3-70b-versatile",
-            "llama3-8b-8192",
-            "gemma2-9b-it",
-            "mistral-saba-24b",
-            "meta-llama/llama-4-maverick-17b-128e-instruct",
-        ]
+        default_model_options = MODEL_OPTIONS
 
         # Shuffle only once per session
         if "shuffled_models" not in st.session_state:
@@ -111,17 +105,9 @@ try:
 
         st.divider()
         st.header("💡 Sample Questions")
-        sample_questions = [
-            "What is the syllabus for DBMS course?",
-            "What is the full form of MLT in BS Degree Course?",
-            "How can I apply for the IITM BS Degree Program?",
-            "What are the courses offered in Diploma in Data Science?",
-            "Is there a scholarship option available for the BS Degree Course?",
-            "What are the eligibility criteria for the Data Science course?",
-        ]
-        for q in sample_questions:
+        for q in SAMPLE_QUESTIONS:
             if st.button(q):
-                st.session_state.chat_history.append({"role": "user", "content": q})
+                st.session_state.chat_history.add_user(q)
                 st.session_state.process_latest = True
 
         # --- Footer ---
@@ -140,26 +126,12 @@ try:
     user_input = st.chat_input("Type your question here...")
 
     if user_input:
-        st.session_state.chat_history.append({"role": "user", "content": user_input})
+        st.session_state.chat_history.add_user(user_input)
         st.session_state.process_latest = True
 
-    # --- Display All Chat Except the Latest User Message ---
-    history_len = len(st.session_state.chat_history)
+    # --- Display Recent Chat Except the Latest User Message ---
     pending_response = st.session_state.get("process_latest", False)
-    display_count = history_len if not pending_response else history_len - 1
-
-    for msg in st.session_state.chat_history[:display_count]:
-        with st.chat_message(msg["role"]):
-            if msg["role"] == "assistant":
-                st.write(msg["content"]["text"])
-                if msg["content"].get("sources_html"):
-                    st.markdown(msg["content"]["sources_html"], unsafe_allow_html=True)
-                if msg["content"].get("response_time"):
-                    st.caption(
-                        f"🕒 Responded in {msg['content']['response_time']:.2f} seconds"
-                    )
-            else:
-                st.markdown(msg["content"])
+    render_history(st.session_state.chat_history, exclude_last=pending_response)
 
     # --- Process Latest Input & Show Result ---
     if pending_response:
@@ -167,40 +139,34 @@ try:
 
         # Show user question immediately
         with st.chat_message("user"):
-            st.markdown(last_user_msg["content"])
+            st.markdown(last_user_msg.text)
 
-        # Check for greeting
-        if is_greeting(last_user_msg["content"]):
+        # Greetings and questions about the bot are answered without the graph
+        # Passed on to the graph, which then does not classify it again
+        intent = classify_intent(last_user_msg.text)
+        if intent.intent == GREETING:
             with st.chat_message("assistant"):
-                greeting_response = "👋 Hello! I'm here to help you with any questions about the IIT Madras BS Program. Ask me anything!"
-                st.markdown(greeting_response)
-                st.session_state.chat_history.append(
-                    {
-                        "role": "assistant",
-                        "content": {
-                            "text": greeting_response,
-                            "sources_html": "",
-                            "response_time": 0.0,
-                        },
-                    }
-                )
+                st.markdown(GREETING_RESPONSE)
+                st.session_state.chat_history.add_assistant(GREETING_RESPONSE)
+            st.session_state.process_latest = False
+        elif intent.intent == IDENTITY:
+            with st.chat_message("assistant"):
+                st.markdown(IDENTITY_RESPONSE)
+                st.session_state.chat_history.add_assistant(IDENTITY_RESPONSE)
             st.session_state.process_latest = False
-        elif is_identity_question(last_user_msg["content"]):
+        elif (warm := warm_answer(last_user_msg.text, selected_model)) is not None:
+            # Precomputed answer for the current index
             with st.chat_message("assistant"):
-                identity_response = (
-                    "I’m an AI-powered assistant designed to help you know about the IIT Madras BS Degree Program. "
-                    "You can ask me about courses, eligibility, admissions, scholarships, and more!"
+                references = render_sources_html(warm["sources"])
+                refreshed = time.strftime(
+                    "%d %b %Y, %H:%M", time.localtime(warm["generated_at"])
                 )
-                st.markdown(identity_response)
-                st.session_state.chat_history.append(
-                    {
-                        "role": "assistant",
-                        "content": {
-                            "text": identity_response,
-                            "sources_html": "",
-                            "response_time": 0.0,
-                        },
-                    }
+                st.write(warm["answer"])
+                if references:
+                    st.markdown(references, unsafe_allow_html=True)
+                st.caption(f"⚡ Precomputed answer · refreshed {refreshed}")
+                st.session_state.chat_history.add_assistant(
+                    warm["answer"], warm["sources"], refreshed=refreshed
                 )
             st.session_state.process_latest = False
         else:
@@ -208,81 +174,34 @@ try:
             with st.chat_message("assistant"):
                 with st.spinner("Searching for the answer..."):
                     start = time.time()
-                    result = None
-                    MAX_RETRIES = 2
-                    attempt = 0
-                    while attempt <= MAX_RETRIES:
-                        try:
-                            result = app.invoke(
-                                {
-                                    "question": last_user_msg["content"],
-                                    "selected_model": selected_model,
-                                },
-                                config={"max_iterations": 2},
-                            )
-                            break  # Success
-                        except Exception as e:
-                            attempt += 1
-                            st.warning(
-                                f"⚠️ Attempt {attempt} failed. Retrying..."
-                                if attempt <= MAX_RETRIES
-                                else "❌ Failed after multiple attempts."
-                            )
-                            time.sleep(1)  # Delay before retry
-                            if attempt > MAX_RETRIES:
-                                st.error(f"❌ Error: {str(e)}")
-                                result = {
-                                    "generation": "⚠️ Could not generate a valid answer.",
-                                    "documents": [],
-                                }
-                                break
+                    # LLM calls are already retried by the scheduler
+                    try:
+                        result = answer_question(
+                            last_user_msg.text,
+                            selected_model,
+                            working_set=st.session_state.working_set,
+                            intent=intent,
+                        )
+                    except Exception as e:
+                        st.error(f"❌ Error: {str(e)}")
+                        result = {
+                            "generation": "⚠️ Could not generate a valid answer.",
+                            "documents": [],
+                        }
                     end = time.time()
 
                 answer = result.get("generation", "⚠️ No answer returned.")
-                source_docs = result.get("documents", [])
-                seen_urls = set()
-                source_lines = []
-
-                for doc in source_docs:
-                    title = doc.metadata.get(
-                        "title", doc.metadata.get("source", "Unknown")
-                    )
-                    # url = doc.metadata.get("url")
-                    url = doc.metadata.get("url") or doc.metadata.get("source")
-                    if url and url.startswith("http") and url not in seen_urls:
-                        source_lines.append(
-                            f'<li><a href="{url}" target="_blank">{title}</a></li>'
-                        )
-                        seen_urls.add(url)
-                    elif not url:
-                        source_lines.append(f"<li>{title}</li>")
-
-                sources_html = ""
-                if source_lines:
-                    sources_html = f"""
-                    <div style="font-size: 0.85em; margin-top: 1em;">
-                        <strong>References:</strong>
-                        <ul style="margin-top: 0.3em; margin-bottom: 0;">
-                            {''.join(source_lines)}
-                        </ul>
-                    </div>
-                    """
+                sources = collect_sources(result.get("documents", []))
+                references = render_sources_html(sources)
 
                 st.write(answer)
-                if sources_html:
-                    st.markdown(sources_html, unsafe_allow_html=True)
+                if references:
+                    st.markdown(references, unsafe_allow_html=True)
                 st.caption(f"🕒 Responded in {end - start:.2f} seconds")
 
                 # Save response
-                st.session_state.chat_history.append(
-                    {
-                        "role": "assistant",
-                        "content": {
-                            "text": answer,
-                            "sources_html": sources_html,
-                            "response_time": end - start,
-                        },
-                    }
+                st.session_state.chat_history.add_assistant(
+                    answer, sources, response_time=end - start
                 )
 
                 st.session_state.process_latest = False